@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Plex payload benchmark: bytes transferred and JSON parse time per call site,
+with and without the Plex tool's REQUEST_PROFILES.
+
+Each call site is fetched as the tools used to request it (plain) and with
+its profile's excludeElements/excludeFields/container limits applied
+(slim), then parsed `--runs` times; the median parse time is reported.
+
+Usage:
+    python3 midnight/_plexbench.py \\
+        --base-url http://192.168.4.46:32400 \\
+        --token <plex-token> \\
+        [--query matrix] [--runs 5]
+
+Run against a real server — the numbers depend on library size and on which
+exclusions that Plex version honors. Reads REQUEST_PROFILES from
+midnight/dist/midnight_plex.py, so run build_tools.py first.
+"""
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+try:
+    import httpx
+except ImportError:
+    print("ERROR: httpx is required. Install with: pip install httpx", file=sys.stderr)
+    sys.exit(2)
+
+DIST_PLEX = Path(__file__).resolve().parent / "dist" / "midnight_plex.py"
+
+
+def load_profiles() -> dict:
+    """REQUEST_PROFILES from the built Plex tool."""
+    spec = importlib.util.spec_from_file_location("midnight_plex", DIST_PLEX)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod.REQUEST_PROFILES
+
+
+def measure(client: httpx.Client, url: str, params: dict, runs: int) -> tuple:
+    """(bytes, median parse ms) for one GET."""
+    body = client.get(url, params=params).raise_for_status().content
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        json.loads(body)
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(body), statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--query", default="matrix", help="Hub search term (default: matrix)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    profiles = load_profiles()
+    base = args.base_url.rstrip("/")
+    headers = {"X-Plex-Token": args.token, "Accept": "application/json"}
+
+    with httpx.Client(headers=headers, timeout=60.0) as client:
+        sections = client.get(f"{base}/library/sections").raise_for_status().json()
+        movie_key = next(
+            (d["key"] for d in sections["MediaContainer"].get("Directory", []) if d.get("type") == "movie"),
+            None,
+        )
+        sites = [
+            ("/hubs/search", "hubs", f"{base}/hubs/search", {"query": args.query, "limit": 50}),
+            ("/library/recentlyAdded", "recently_added", f"{base}/library/recentlyAdded",
+             {"X-Plex-Container-Start": 0, "X-Plex-Container-Size": 30}),
+            ("/library/onDeck", "on_deck", f"{base}/library/onDeck", {}),
+        ]
+        if movie_key:
+            sites.append((
+                f"/library/sections/{movie_key}/all (500)", "section_all", f"{base}/library/sections/{movie_key}/all",
+                {"type": 1, "X-Plex-Container-Start": 0, "X-Plex-Container-Size": 500},
+            ))
+
+        print("| Call site | Plain bytes | Slim bytes | Saved | Plain parse ms | Slim parse ms |")
+        print("|---|---:|---:|---:|---:|---:|")
+        for label, profile, url, params in sites:
+            plain_bytes, plain_ms = measure(client, url, params, args.runs)
+            slim_bytes, slim_ms = measure(client, url, {**profiles[profile], **params}, args.runs)
+            saved = 100 * (1 - slim_bytes / plain_bytes) if plain_bytes else 0.0
+            print(f"| {label} | {plain_bytes:,} | {slim_bytes:,} | {saved:.0f}% | {plain_ms:.2f} | {slim_ms:.2f} |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
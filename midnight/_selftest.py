@@ -15,6 +15,78 @@ Validates:
 3. Seerr _lookup_title caches the second call.
 4. Plex get_recently_added renders dates in the container's local TZ.
 5. build_tools.py is deterministic (re-running produces byte-identical output).
+6. Radarr/Sonarr storage analytics aggregate correctly, clamp `top` to at
+   least one row, and stay inside the 50 ms budget on a 50k-movie /
+   5k-series library.
+7. Multi-instance Radarr/Sonarr fan-out deduplicates by TMDb/TVDb id, tags
+   results with instance labels, and degrades to partial results.
+8. Sonarr get_recent_episodes pages history newest-first and stops at the
+   date cutoff or the display limit.
+9. Sonarr search_episodes loads a named show on demand and hydrates the
+   whole library in the background without exceeding the concurrency cap.
+10. Sonarr get_upcoming_episodes slices windows out of the prefetched
+    calendar buckets and joins series titles from the library snapshot.
+11. Sonarr get_missing_episodes stops paging /wanted/missing once its
+    budget is full and groups what it read by show and season, episodes in
+    numeric order.
+12. Sonarr get_episode_file_stats groups a cached NumPy episode-file table
+    by resolution/network/show, clamps `top`, answers "still building"
+    instead of blocking when the first build is slow, and reports a Sonarr
+    error when every build failed.
+13. Plex library snapshot: paged first load, `updatedAt>=` incremental
+    refresh, full reload on deletions, and search/cast/episode lookups that
+    answer from memory.
+14. Plex search_by_actor/search_by_director answer from a person index
+    built from full (batch-fetched) credits, with exact counts and no
+    requests once the snapshot is warm.
+15. KeyBatcher / Plex get_cast: concurrent metadata lookups coalesce into
+    one multi-key request, split back per caller; failures reach every caller.
+16. Plex get_recently_added merges every section of a type newest-first
+    (k-way heap merge) and reports an offline section as partial results.
+17. Plex requests carry their call site's payload profile (excluded
+    Media/artwork, container limits).
+18. Plex notification listener: a local stand-in WebSocket server's
+    timeline/activity events invalidate the matching snapshots, and the
+    listener reconnects (invalidating everything it may have missed) after
+    the server drops it.
+19. Plex /hubs/search results are cached per normalized query (shorter TTL
+    for empty results) and dropped when the library watermark moves.
+20. Plex search_by_person: one engine for actor/director/writer/producer;
+    live lookups (no snapshot) are memoised so a repeat costs no requests.
+21. Sonarr get_show_details resolves alternate titles, "(US)"-style
+    disambiguations and TVDb/IMDb ids through the title index, then fetches
+    only the chosen show.
+22. Plex get_episode_details with a show name resolves the show from the
+    snapshot and searches its cached /allLeaves episode list instead of
+    every episode in the library.
+23. Multi-server Plex: search, person lookups and recently added merge
+    every server's results by GUID with server labels, and a server that
+    misses its deadline degrades to partial results without delaying the rest.
+24. Tautulli get_most_watched fetches every stat group in one cached
+    get_home_stats call, fetches groups that call left out (disabled cards)
+    concurrently, and never caches an incomplete result.
+25. Tautulli history warehouse: the first sync pages all of get_history
+    into SQLite, later syncs only ask for plays `after` the newest stored
+    day, an interrupted first import resumes where it stopped, and
+    window/user queries and aggregates answer locally.
+26. Tautulli get_viewing_analytics: weekly watch time, day × hour heatmap,
+    completion rates and binge sessions from NumPy columns, under a second
+    over 500k plays. Columns built mid-import are rebuilt once the import
+    (or an upsert that changes a row) lands; plays newer than every stored
+    id are appended instead.
+27. Tautulli activity: one background poller feeds every get_activity
+    caller, get_activity_changes diffs consecutive snapshots per user, and
+    the poller stops once nobody is asking.
+28. Tautulli user mapping: OpenWebUI users resolve to Tautulli accounts by
+    UserValve, email, then name (fuzzy), from one cached get_users call;
+    "my" history/stats pass user_id server-side and get_activity marks
+    "you" by user_id.
+29. Bazarr check_subtitles pages the movie/series catalogues into a cached
+    title index, then makes one id-filtered request per matched kind for
+    current subtitle state (falling back to the snapshot with a note).
+30. Bazarr get_missing_subtitles pages both wanted lists concurrently until
+    enough rows match PREFERRED_LANGUAGES, stops paging once they are found,
+    and caps the scan for languages that never match.
 """
 
 import asyncio
@@ -24,6 +96,8 @@ import os
 import subprocess
 import sys
 import time
+from datetime import datetime
+from urllib.parse import urlsplit
 from pathlib import Path
 
 MIDNIGHT = Path(__file__).resolve().parent
@@ -55,7 +129,7 @@ def make_tools(file_name: str, **valve_overrides):
 PLEX_VALVES = {"PLEX_URL": UNREACHABLE, "PLEX_TOKEN": "x"}
 RADARR_VALVES = {"RADARR_URL": UNREACHABLE, "RADARR_API_KEY": "x"}
 SONARR_VALVES = {"SONARR_URL": UNREACHABLE, "SONARR_API_KEY": "x"}
-TAUTULLI_VALVES = {"TAUTULLI_URL": UNREACHABLE, "TAUTULLI_API_KEY": "x"}
+TAUTULLI_VALVES = {"TAUTULLI_URL": UNREACHABLE, "TAUTULLI_API_KEY": "x", "HISTORY_DB_PATH": ":memory:"}
 BAZARR_VALVES = {"BAZARR_URL": UNREACHABLE, "BAZARR_API_KEY": "x"}
 SABNZBD_VALVES = {"SABNZBD_URL": UNREACHABLE, "SABNZBD_API_KEY": "x"}
 SEERR_VALVES = {"SEERR_URL": UNREACHABLE, "SEERR_API_KEY": "x"}
@@ -66,6 +140,7 @@ CASES = [
     ("midnight_plex.py", "search_plex", ["matrix"], PLEX_VALVES, ["error"]),
     ("midnight_plex.py", "search_by_actor", ["Tom Hanks"], PLEX_VALVES, ["error"]),
     ("midnight_plex.py", "search_by_director", ["Nolan"], PLEX_VALVES, ["error"]),
+    ("midnight_plex.py", "search_by_person", ["Sorkin", "writer"], PLEX_VALVES, ["error"]),
     ("midnight_plex.py", "get_cast", ["Matrix"], PLEX_VALVES, ["error"]),
     ("midnight_plex.py", "get_recently_added", [], PLEX_VALVES, ["error"]),
     ("midnight_plex.py", "get_on_deck", [], PLEX_VALVES, ["error"]),
@@ -75,16 +150,27 @@ CASES = [
     ("midnight_radarr.py", "list_movies_by_genre", ["Action"], RADARR_VALVES, ["radarr error"]),
     ("midnight_radarr.py", "get_movie_details", ["Inception"], RADARR_VALVES, ["radarr error"]),
     ("midnight_radarr.py", "get_recent_movies", [], RADARR_VALVES, ["radarr error"]),
+    ("midnight_radarr.py", "get_storage_breakdown", [], RADARR_VALVES, ["radarr error"]),
 
     ("midnight_sonarr.py", "search_tv_shows", ["Breaking Bad"], SONARR_VALVES, ["sonarr error"]),
     ("midnight_sonarr.py", "list_shows_by_genre", ["Drama"], SONARR_VALVES, ["sonarr error"]),
     ("midnight_sonarr.py", "get_show_details", ["Breaking Bad"], SONARR_VALVES, ["sonarr error"]),
     ("midnight_sonarr.py", "get_upcoming_episodes", [], SONARR_VALVES, ["error"]),
     ("midnight_sonarr.py", "get_recent_episodes", [], SONARR_VALVES, ["error"]),
+    ("midnight_sonarr.py", "get_storage_breakdown", [], SONARR_VALVES, ["sonarr error"]),
+    ("midnight_sonarr.py", "search_episodes", ["wedding"], SONARR_VALVES, ["sonarr error"]),
+    ("midnight_sonarr.py", "get_missing_episodes", [], SONARR_VALVES, ["error"]),
+    ("midnight_sonarr.py", "get_episode_file_stats", [], SONARR_VALVES, ["sonarr error"]),
 
     ("midnight_tautulli.py", "get_activity", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "get_activity_changes", [], TAUTULLI_VALVES, ["error"]),
     ("midnight_tautulli.py", "get_watch_history", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "get_my_history", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "get_my_stats", [], TAUTULLI_VALVES, ["error"]),
     ("midnight_tautulli.py", "get_most_watched", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "query_history", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "get_history_stats", [], TAUTULLI_VALVES, ["error"]),
+    ("midnight_tautulli.py", "get_viewing_analytics", [], TAUTULLI_VALVES, ["error"]),
 
     ("midnight_bazarr.py", "check_subtitles", ["Inception"], BAZARR_VALVES, ["bazarr error"]),
     ("midnight_bazarr.py", "get_missing_subtitles", [], BAZARR_VALVES, ["bazarr error"]),
@@ -226,6 +312,1459 @@ def run_pure_tests():
     return failures, 4
 
 
+def run_storage_analytics_test():
+    """
+    Radarr/Sonarr get_storage_breakdown: correct group totals on a tiny library,
+    `top` below 1 clamped to one row, and every grouping of a 50k-movie / 5k-series snapshot answers in < 50 ms
+    once the columnar table is built (the snapshot is already cached by then).
+    """
+    failures = []
+    gb = 1024 ** 3
+    genres = ["Action", "Drama", "Comedy", "Horror", "Science Fiction", "Animation"]
+    profiles = [{"id": i, "name": f"Profile-{i}"} for i in range(4)]
+
+    def with_library(file_name, items):
+        mod = load(file_name)
+
+        async def fake_http_get_json(url, **_kwargs):
+            return profiles if url.endswith("/qualityprofile") else items
+
+        mod.http_get_json = fake_http_get_json
+        return mod.Tools()
+
+    small = [
+        {"title": "Big", "year": 1999, "sizeOnDisk": 40 * gb, "genres": ["Action", "Drama"], "qualityProfileId": 1},
+        {"title": "Small", "year": 2004, "sizeOnDisk": 2 * gb, "genres": ["Drama"], "qualityProfileId": 2},
+        {"title": "Missing", "year": 2010, "sizeOnDisk": 0, "genres": ["Action"], "qualityProfileId": 1},
+    ]
+    radarr = with_library("midnight_radarr.py", small)
+    out = asyncio.run(radarr.get_storage_breakdown("genre"))
+    expected = ("Drama — 42.0 GB (2 movies)", "Action — 40.0 GB (1 movies)", "1. Big (1999) — 40.0 GB")
+    if not all(e in out for e in expected):
+        failures.append(("storage genre totals", f"got {out!r}"))
+    out = asyncio.run(radarr.get_storage_breakdown("decade"))
+    if "1990s — 40.0 GB (1 movies)" not in out or "2000s — 2.0 GB (1 movies)" not in out:
+        failures.append(("storage decade totals", f"got {out!r}"))
+    shows = [dict(m, statistics={"sizeOnDisk": m["sizeOnDisk"]}) for m in small]
+    sonarr = with_library("midnight_sonarr.py", shows)
+    clamped = [asyncio.run(tools.get_storage_breakdown("genre", top=top)) for tools, top in ((radarr, 0), (radarr, -1), (sonarr, 0))]
+    if any("1. Big" not in out or "2. Small" in out or "Action —" in out for out in clamped):
+        failures.append(("storage top clamp", f"got {clamped!r}"))
+
+    movies = [
+        {"title": f"Movie {i}", "year": 1950 + i % 75, "sizeOnDisk": (i % 97) * gb,
+         "genres": [genres[i % 6], genres[(i * 7) % 6]], "qualityProfileId": i % 4}
+        for i in range(50_000)
+    ]
+    series = [
+        {"title": f"Show {i}", "year": 1980 + i % 45, "statistics": {"sizeOnDisk": (i % 89) * gb},
+         "genres": [genres[i % 6]], "qualityProfileId": i % 4}
+        for i in range(5_000)
+    ]
+
+    async def timed(tools):
+        await tools.get_storage_breakdown("genre")  # build snapshot + table
+        worst = 0.0
+        for group_by in ("genre", "decade", "quality"):
+            t0 = time.perf_counter()
+            await tools.get_storage_breakdown(group_by)
+            worst = max(worst, time.perf_counter() - t0)
+        return worst
+
+    for file_name, items in (("midnight_radarr.py", movies), ("midnight_sonarr.py", series)):
+        worst = asyncio.run(timed(with_library(file_name, items)))
+        if worst > 0.050:
+            failures.append((f"{file_name} storage budget", f"slowest grouping took {worst * 1000:.1f} ms"))
+
+    return failures, 5
+
+
+def run_multi_instance_test():
+    """Radarr/Sonarr *_EXTRA_INSTANCES: dedupe + instance tags + partial results."""
+    failures = []
+
+    radarr_mod = load("midnight_radarr.py")
+    try:
+        radarr_mod.parse_instances("4K|http://x")
+        failures.append(("parse_instances malformed", "no ValueError for a 2-field entry"))
+    except ValueError:
+        pass
+
+    libraries = {
+        "http://main.invalid": [{"title": "Dune", "year": 2021, "tmdbId": 1, "hasFile": True, "sizeOnDisk": 1}],
+        "http://4k.invalid": [
+            {"title": "Dune", "year": 2021, "tmdbId": 1, "hasFile": True, "sizeOnDisk": 2},
+            {"title": "Dune: Part Two", "year": 2024, "tmdbId": 2, "hasFile": True, "sizeOnDisk": 3},
+        ],
+    }
+
+    async def fake_http_get_json(url, **_kwargs):
+        base = url.split("/api/")[0]
+        if base not in libraries:
+            raise ConnectionError("unreachable")
+        return libraries[base]
+
+    radarr_mod.http_get_json = fake_http_get_json
+    tools = radarr_mod.Tools()
+    tools.valves.RADARR_URL = "http://main.invalid"
+    tools.valves.RADARR_EXTRA_INSTANCES = "4K|http://4k.invalid|k"
+    out = asyncio.run(tools.search_movies_by_title("Dune"))
+    if "**Dune** (2021) [main, 4K]" not in out or "**Dune: Part Two** (2024) [4K]" not in out:
+        failures.append(("radarr multi-instance dedupe", f"got {out!r}"))
+
+    tools = radarr_mod.Tools()
+    tools.valves.RADARR_URL = "http://main.invalid"
+    tools.valves.RADARR_EXTRA_INSTANCES = "Anime|http://down.invalid|k"
+    out = asyncio.run(tools.search_movies_by_title("Dune"))
+    if "**Dune** (2021) [main]" not in out or "Partial results" not in out or "Anime" not in out:
+        failures.append(("radarr multi-instance partial", f"got {out!r}"))
+
+    sonarr_mod = load("midnight_sonarr.py")
+
+    async def fake_sonarr(url, **_kwargs):
+        if url.startswith("http://4k.invalid"):
+            raise ConnectionError("unreachable")
+        return [{"title": "Severance", "year": 2022, "tvdbId": 9, "seasons": [], "statistics": {}}]
+
+    sonarr_mod.http_get_json = fake_sonarr
+    tools = sonarr_mod.Tools()
+    tools.valves.SONARR_URL = "http://main.invalid"
+    tools.valves.SONARR_EXTRA_INSTANCES = "4K|http://4k.invalid|k"
+    out = asyncio.run(tools.search_tv_shows("Severance"))
+    if "[main]" not in out or "Partial results" not in out:
+        failures.append(("sonarr multi-instance partial", f"got {out!r}"))
+
+    return failures, 4
+
+
+def run_history_paging_test():
+    """Sonarr history paging: stops at the cutoff, and fills the limit across pages."""
+    from datetime import datetime, timedelta, timezone
+
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+    now = datetime.now(timezone.utc)
+
+    def history(n_recent: int, n_old: int) -> list:
+        records = []
+        for i in range(n_recent + n_old):
+            age = timedelta(hours=i) if i < n_recent else timedelta(days=30 + i)
+            records.append({
+                "date": (now - age).isoformat().replace("+00:00", "Z"),
+                "episodeId": i,
+                "series": {"title": f"Show {i}", "tvdbId": i},
+                "episode": {"seasonNumber": 1, "episodeNumber": i, "title": f"Ep {i}"},
+            })
+        return records
+
+    def run(records):
+        pages_requested = []
+
+        async def fake_http_get_json(_url, params=None, **_kwargs):
+            page, size = params["page"], params["pageSize"]
+            pages_requested.append(page)
+            return {"totalRecords": len(records), "records": records[(page - 1) * size:page * size]}
+
+        sonarr_mod.http_get_json = fake_http_get_json
+        tools = sonarr_mod.Tools()
+        return asyncio.run(tools.get_recent_episodes(days=7)), pages_requested
+
+    # Busy week: 200 downloads in the window — old pageSize=30 fetch was all it saw
+    out, pages = run(history(200, 0))
+    if out.count("• **") != 15 or len(pages) != 1:
+        failures.append(("history busy week", f"{out.count('• **')} rows over pages {pages}"))
+
+    # Quiet week: 3 recent, then old records — stop at the first page past the cutoff
+    out, pages = run(history(3, 500))
+    if out.count("• **") != 3 or len(pages) != 1:
+        failures.append(("history cutoff", f"{out.count('• **')} rows over pages {pages}"))
+
+    return failures, 2
+
+
+def run_missing_report_test():
+    """Sonarr missing-episodes report: budget-bounded paging, grouped by show/season."""
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+
+    def missing(n_shows: int, per_show: int) -> list:
+        return [
+            {
+                "seriesId": show, "seasonNumber": 1 + ep // 10, "episodeNumber": 1 + ep % 10,
+                "airDateUtc": f"2026-01-{1 + ep % 28:02d}T00:00:00Z",
+                "series": {"title": f"Show {show}", "tvdbId": show},
+            }
+            for show in range(n_shows)
+            for ep in range(per_show)
+        ]
+
+    def run(records, limit):
+        pages_requested = []
+
+        async def fake_http_get_json(url, params=None, **_kwargs):
+            assert url.endswith("/api/v3/wanted/missing") and params["includeSeries"] == "true"
+            page, size = params["page"], params["pageSize"]
+            pages_requested.append(page)
+            return {"totalRecords": len(records), "records": records[(page - 1) * size:page * size]}
+
+        sonarr_mod.http_get_json = fake_http_get_json
+        return asyncio.run(sonarr_mod.Tools().get_missing_episodes(limit=limit)), pages_requested
+
+    # Huge backlog: 2000 missing episodes, budget 30 — one page, then stop
+    out, pages = run(missing(100, 20), 30)
+    if pages != [1] or "stopped at 30 episodes" not in out:
+        failures.append(("missing budget stop", f"pages {pages}, tail {out[-60:]!r}"))
+
+    # Small backlog: everything fits, grouped per show and season
+    out, pages = run(missing(2, 12), 50)
+    if (pages != [1] or out.count("• **") != 2 or "Season 2: E01, E02" not in out
+            or "— 12 missing" not in out or "stopped at" in out):
+        failures.append(("missing grouping", f"pages {pages}, got {out!r}"))
+
+    # Long-running show: episodes order numerically (E99 before E100)
+    soap = [dict(r, seasonNumber=1, episodeNumber=n) for r, n in zip(missing(1, 3), (100, 9, 99))]
+    out, _ = run(soap, 50)
+    if "Season 1: E09, E99, E100" not in out:
+        failures.append(("missing numeric order", f"got {out!r}"))
+
+    return failures, 3
+
+
+def run_episode_file_stats_test():
+    """Sonarr episode-file analytics: vectorised group-bys over a cached file table."""
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+    gb = 1024 ** 3
+    series = [
+        {"id": 1, "title": "Old Sitcom", "network": "NBC"},
+        {"id": 2, "title": "Prestige Drama", "network": "HBO"},
+        {"id": 3, "title": "Mixed Show", "network": "NBC"},
+    ]
+    files = {
+        1: [(720, "x264", 1)] * 4,
+        2: [(2160, "x265", 4)] * 2,
+        3: [(720, "x264", 1)] * 2 + [(1080, "x265", 2)] * 3,
+    }
+    calls = {"files": 0, "delay": 0.0}
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        if url.endswith("/api/v3/series"):
+            return series
+        calls["files"] += 1
+        await asyncio.sleep(calls["delay"])
+        if calls.get("unauthorized"):
+            raise PermissionError("401 Unauthorized")
+        return [
+            {"size": size * gb, "quality": {"quality": {"resolution": res}}, "mediaInfo": {"videoCodec": codec}}
+            for res, codec, size in files[params["seriesId"]]
+        ]
+
+    sonarr_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = sonarr_mod.Tools()
+        still_720 = await tools.get_episode_file_stats("show", max_resolution=720)
+        by_network = await tools.get_episode_file_stats("network")
+        by_codec = await tools.get_episode_file_stats("codec")
+        first_calls = calls["files"]
+        calls["delay"] = 0.2
+        slow = sonarr_mod.Tools()
+        building, _ = await slow._get_file_table(wait=0.01)
+        ready, _ = await slow._get_file_table(wait=5)
+        one_group = await tools.get_episode_file_stats("network", top=0)
+        calls.update(delay=0.0, unauthorized=True)
+        denied = await sonarr_mod.Tools().get_episode_file_stats("network")
+        return still_720, by_network, by_codec, first_calls, building, ready, one_group, denied
+
+    still_720, by_network, by_codec, first_calls, building, ready, one_group, denied = asyncio.run(scenario())
+    if ("Old Sitcom — 4 files" not in still_720 or "(2 of 5 episodes)" not in still_720
+            or "Prestige Drama" in still_720):
+        failures.append(("file stats 720p shows", f"got {still_720!r}"))
+    if "NBC — 9 files, 12.0 GB, 1.33 GB/episode" not in by_network or "HBO — 2 files, 8.0 GB, 4.00 GB/episode" not in by_network:
+        failures.append(("file stats by network", f"got {by_network!r}"))
+    if "HEVC — 5 files" not in by_codec or first_calls != 3:
+        failures.append(("file stats table reuse", f"{first_calls} episodefile requests; got {by_codec!r}"))
+    if building is not None or ready is None:
+        failures.append(("file stats background build", f"building={building is not None}, ready={ready is not None}"))
+    if one_group.count("  • ") != 1 or "NBC —" not in one_group:
+        failures.append(("file stats top clamp", f"got {one_group!r}"))
+    if not denied.startswith("Sonarr error:") or "401" not in denied or "still being built" in denied:
+        failures.append(("file stats failed build", f"got {denied!r}"))
+    return failures, 6
+
+
+def run_episode_index_test():
+    """Sonarr episode index: on-demand per-show load + capped background hydration."""
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+    series = [{"id": i, "title": f"Show {i}", "tvdbId": 100 + i} for i in range(12)]
+    series[3]["title"] = "The Office (US)"
+    in_flight = {"now": 0, "max": 0, "episode_calls": 0}
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        if url.endswith("/api/v3/series"):
+            return series
+        in_flight["episode_calls"] += 1
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        sid = params["seriesId"]
+        return [
+            {"seasonNumber": 1, "episodeNumber": 1, "title": "Pilot", "airDate": "2005-03-24", "overview": "Intro."},
+            {"seasonNumber": 6, "episodeNumber": 4, "title": f"Niagara {sid}", "airDate": "2009-10-08",
+             "overview": "Jim and Pam's wedding." if sid == 3 else "A road trip."},
+        ]
+
+    sonarr_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = sonarr_mod.Tools()
+        tools.valves.EPISODE_INDEX_CONCURRENCY = 2
+        named = await tools.search_episodes("wedding", show_name="the office")
+        calls_for_named = in_flight["episode_calls"]
+        first = await tools.search_episodes("wedding")
+        await tools._hydration_task
+        second = await tools.search_episodes("wedding")
+        return named, calls_for_named, first, second
+
+    named, calls_for_named, first, second = asyncio.run(scenario())
+    if "**The Office (US)** S06E04 - Niagara 3" not in named or calls_for_named != 1:
+        failures.append(("episode index on-demand", f"{calls_for_named} episode calls, got {named!r}"))
+    if "still building" not in first:
+        failures.append(("episode index partial note", f"got {first!r}"))
+    if "Niagara 3" not in second or "still building" in second:
+        failures.append(("episode index hydrated search", f"got {second!r}"))
+    if in_flight["max"] > 2:
+        failures.append(("episode index concurrency cap", f"{in_flight['max']} concurrent requests > cap 2"))
+    return failures, 4
+
+
+def run_calendar_cache_test():
+    """Sonarr calendar: windows inside the prefetch horizon cost no extra request."""
+    from datetime import date, datetime, time as dtime, timedelta, timezone
+
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+    today = date.today()
+    calendar_calls = []
+
+    def airs(offset_days: int) -> str:
+        # Noon local time, so the local-date bucket is unambiguous in any TZ
+        local_noon = datetime.combine(today + timedelta(days=offset_days), dtime(12)).astimezone()
+        return local_noon.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    episodes = [
+        {"seriesId": 1, "seasonNumber": 2, "episodeNumber": i, "title": f"Ep {i}", "airDateUtc": airs(i)}
+        for i in range(0, 60, 3)
+    ]
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        if url.endswith("/api/v3/series"):
+            return [{"id": 1, "title": "Severance", "tvdbId": 9}]
+        calendar_calls.append(params)
+        start = date.fromisoformat(params["start"])
+        end = date.fromisoformat(params["end"])
+        return [
+            ep for ep in episodes
+            if start <= datetime.fromisoformat(ep["airDateUtc"].replace("Z", "+00:00")).date() <= end
+        ]
+
+    sonarr_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = sonarr_mod.Tools()
+        default = await tools.get_upcoming_episodes()
+        weekend = await tools.get_upcoming_episodes(days=2, start=(today + timedelta(days=6)).isoformat())
+        calls_inside = len(calendar_calls)
+        far = await tools.get_upcoming_episodes(days=7, start=(today + timedelta(days=50)).isoformat())
+        return default, weekend, calls_inside, far
+
+    default, weekend, calls_inside, far = asyncio.run(scenario())
+    if "**Severance** S02E12" not in default or "S02E15" in default or calendar_calls[0].get("includeSeries") != "false":
+        failures.append(("calendar default window", f"got {default!r} with params {calendar_calls[:1]}"))
+    if "S02E06" not in weekend or "S02E09" in weekend or calls_inside != 1:
+        failures.append(("calendar slice from buckets", f"{calls_inside} calendar calls, got {weekend!r}"))
+    if "S02E51" not in far or len(calendar_calls) != 2:
+        failures.append(("calendar beyond horizon", f"{len(calendar_calls)} calendar calls, got {far!r}"))
+    return failures, 3
+
+
+class FakePlex:
+    """
+    In-memory stand-in for the Plex endpoints the snapshot uses.
+
+    `items[(section_key, type_code)]` lists the metadata dicts served by
+    /library/sections/{key}/all (paged, `updatedAt>=` filtered) and
+    `items[(section_key, "recent")]` those of /recentlyAdded (a section
+    without one fails, as if offline); `leaves[show_key]` answers
+    /library/metadata/{key}/allLeaves; `requests` logs (path, params) for every call so tests can count round-trips.
+    """
+
+    SECTIONS = [
+        {"key": "1", "type": "movie", "title": "Movies"},
+        {"key": "2", "type": "show", "title": "TV Shows"},
+    ]
+
+    def __init__(self, items: dict, metadata: dict = None, sections: list = None):
+        self.items = items
+        self.metadata = metadata or {}
+        self.sections = sections or self.SECTIONS
+        self.hubs = {}  # lowercased query -> /hubs/search hubs
+        self.leaves = {}  # show ratingKey -> its episodes
+        self.requests = []
+
+    async def __call__(self, url, params=None, **_kwargs):
+        path = urlsplit(url).path
+        params = dict(params or {})
+        self.requests.append((path, params))
+        if path == "/library/sections":
+            return {"MediaContainer": {"Directory": self.sections}}
+        if path.startswith("/library/sections/") and path.endswith("/all"):
+            rows = self.items.get((path.split("/")[3], params["type"]), [])
+            if "updatedAt>=" in params:
+                rows = [r for r in rows if r["updatedAt"] >= params["updatedAt>="]]
+            start, size = params["X-Plex-Container-Start"], params["X-Plex-Container-Size"]
+            return {"MediaContainer": {"totalSize": len(rows), "Metadata": rows[start:start + size]}}
+        if path.startswith("/library/sections/") and path.endswith("/recentlyAdded"):
+            rows = self.items.get((path.split("/")[3], "recent"))
+            if rows is None:
+                raise RuntimeError("section offline")
+            rows = sorted(rows, key=lambda r: r["addedAt"], reverse=True)
+            return {"MediaContainer": {"Metadata": rows[:params.get("X-Plex-Container-Size", len(rows))]}}
+        if path.startswith("/library/metadata/") and path.endswith("/allLeaves"):
+            return {"MediaContainer": {"Metadata": self.leaves[path.split("/")[3]]}}
+        if path.startswith("/library/metadata/"):
+            keys = path.rsplit("/", 1)[1].split(",")
+            return {"MediaContainer": {"Metadata": [self.metadata[k] for k in keys if k in self.metadata]}}
+        if path == "/hubs/search":
+            return {"MediaContainer": {"Hub": self.hubs.get(params["query"].lower(), [])}}
+        raise AssertionError(f"unexpected Plex request {path}")
+
+    def count(self, predicate) -> int:
+        return sum(1 for path, params in self.requests if predicate(path, params))
+
+
+def run_plex_snapshot_test():
+    """Plex snapshot: paged load, incremental refresh, and lookups from memory."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    movies = [
+        {"ratingKey": str(i), "type": "movie", "title": f"Filler Movie {i}", "year": 2000, "updatedAt": 50,
+         "Media": [{"Part": [{"Stream": []}]}]}
+        for i in range(1200)
+    ]
+    movies[700].update(title="Inception", updatedAt=100)  # the watermark, re-sent by `>=` refreshes
+    episodes = [
+        {"ratingKey": "e1", "type": "episode", "title": "Ozymandias", "grandparentTitle": "Breaking Bad",
+         "parentIndex": 5, "index": 14, "summary": "Walt's empire collapses.", "updatedAt": 100},
+    ]
+    fake = FakePlex(
+        {("1", 1): movies, ("2", 2): [], ("2", 4): episodes},
+        metadata={"700": {"ratingKey": "700", "title": "Inception", "year": 2010,
+                          "Role": [{"tag": "Leonardo DiCaprio", "role": "Cobb"}]}},
+    )
+    plex_mod.http_get_json = fake
+
+    def is_page(path, params):
+        return path == "/library/sections/1/all" and params.get("X-Plex-Container-Size")
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        found = await tools.search_plex("inception")
+        first_pages = fake.count(is_page)
+        stripped = "Media" not in tools._library[("1", 1)].value["items"]["0"]
+
+        fake.requests.clear()
+        cast = await tools.get_cast("Inception")
+        episode = await tools.get_episode_details("Ozymandias", "Breaking Bad")
+        # Only the cast's metadata fetch goes live (plus the episode snapshot's first load)
+        live_lookups = [path for path, _ in fake.requests if not path.startswith("/library/sections")]
+
+        # Incremental refresh: one changed item, nothing deleted
+        movies.append({"ratingKey": "9000", "type": "movie", "title": "Tenet", "year": 2020, "updatedAt": 200})
+        fake.requests.clear()
+        snap = tools._library[("1", 1)]
+        snap.invalidate()
+        await snap.get(0, force=True)
+        incremental = [params for path, params in fake.requests if path == "/library/sections/1/all"]
+        tenet = await tools.search_plex("tenet")
+
+        # A second item stamped in the watermark's own second still arrives
+        movies.append({"ratingKey": "9001", "type": "movie", "title": "Dunkirk", "year": 2017, "updatedAt": 200})
+        fake.requests.clear()
+        snap.invalidate()
+        await snap.get(0, force=True)
+        same_second = [path for path, _ in fake.requests if path.startswith("/library/metadata/")]
+        tenet = (tenet, await tools.search_plex("dunkirk"), same_second)
+
+        # A deletion changes the count — next refresh reloads the section in full
+        del movies[0]
+        fake.requests.clear()
+        snap.invalidate()
+        await snap.get(0, force=True)
+        reloaded = fake.count(is_page)
+        gone = "0" not in snap.value["items"]
+        return found, first_pages, stripped, cast, episode, live_lookups, incremental, tenet, reloaded, gone
+
+    (found, first_pages, stripped, cast, episode, live_lookups,
+     incremental, tenet, reloaded, gone) = asyncio.run(scenario())
+    if "Inception" not in found or first_pages != 3 or not stripped:
+        failures.append(("snapshot paged load", f"{first_pages} pages, stripped={stripped}, got {found[:80]!r}"))
+    if "Leonardo DiCaprio" not in cast or "Walt's empire" not in episode or live_lookups != ["/library/metadata/700"]:
+        failures.append(("lookups from memory", f"live requests {live_lookups}"))
+    tenet, dunkirk, same_second = tenet
+    if (len(incremental) != 2 or incremental[0].get("updatedAt>=") != 100
+            or incremental[1]["X-Plex-Container-Size"] != 0 or "Tenet" not in tenet
+            or "Dunkirk" not in dunkirk or same_second != ["/library/metadata/9001"]):
+        failures.append(("incremental refresh", f"requests {incremental}, credit fetches {same_second}"))
+    if reloaded != 4 or not gone:
+        failures.append(("full reload on deletion", f"{reloaded} page requests, deleted item gone={gone}"))
+    return failures, 4
+
+
+def run_person_index_test():
+    """Plex person index: full credits, exact counts, zero requests when warm."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    cast = [{"tag": f"Actor {n}"} for n in range(8)]
+    listing = [
+        {"ratingKey": str(i), "type": "movie", "title": f"Movie {i}", "year": 1990 + i % 30,
+         "guid": f"plex://movie/{i}", "updatedAt": 1, "Role": cast[:3],
+         "Director": [{"tag": "Prolific Director" if i < 30 else "Someone Else"}]}
+        for i in range(40)
+    ]
+    full = {item["ratingKey"]: dict(item, Role=cast) for item in listing}
+    sections = FakePlex.SECTIONS + [{"key": "3", "type": "movie", "title": "4K Movies"}]
+    # The 4K section holds a second copy of the first ten movies
+    fake = FakePlex({("1", 1): listing, ("3", 1): listing[:10], ("2", 2): []}, metadata=full, sections=sections)
+    plex_mod.http_get_json = fake
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        await tools._get_person_index()  # warm the snapshot
+        batches = fake.count(lambda path, _: path.startswith("/library/metadata/"))
+        fake.requests.clear()
+        actor = await tools.search_by_actor("actor 6")
+        director = await tools.search_by_director("Prolific Directr")
+        warm_requests = [path for path, _ in fake.requests if path != "/library/sections"]
+        unknown = await tools.search_by_actor("Nobody Atall")
+        hub_searches = fake.count(lambda path, _: path == "/hubs/search")
+
+        # A deletion forces a full reload; only the one updated movie needs its credits again
+        del listing[0]
+        listing[0] = dict(listing[0], updatedAt=2)  # ratingKey "1"
+        fake.requests.clear()
+        snap = tools._library[("1", 1)]
+        snap.invalidate()
+        await snap.get(0, force=True)
+        refetched = sorted(key for path, _ in fake.requests if path.startswith("/library/metadata/")
+                           for key in path.rsplit("/", 1)[1].split(","))
+        kept = snap.value["items"]["5"]["credits"]["actor"] if "5" in snap.value["items"] else None
+        return batches, actor, director, warm_requests, unknown, hub_searches, refetched, kept
+
+    (batches, actor, director, warm_requests, unknown, hub_searches,
+     refetched, kept) = asyncio.run(scenario())
+    # Both sections load concurrently, so their credit lookups share one batch
+    if "**Actor 6**" not in actor or "(40 total)" not in actor or batches != 1:
+        failures.append(("full credits via batched metadata", f"{batches} batches; got {actor[:80]!r}"))
+    if ("**Prolific Director**" not in director or "(30 total)" not in director
+            or "... and 5 more movies" not in director or warm_requests):
+        failures.append(("exact counts from memory", f"requests {warm_requests}; got {director[:120]!r}"))
+    if hub_searches != 1 or "not found" not in unknown:
+        failures.append(("unknown person falls back live", f"{hub_searches} hub searches; got {unknown!r}"))
+    if refetched != ["1"] or not kept or len(kept) != len(cast):
+        failures.append(("full reload reuses unchanged credits", f"refetched {refetched}, kept {kept}"))
+    return failures, 4
+
+
+def run_metadata_batching_test():
+    """Concurrent Plex metadata lookups share one /library/metadata/{k1,k2,...} request."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    listing = [
+        {"ratingKey": str(i), "type": "movie", "title": title, "year": 2000 + i, "updatedAt": 1}
+        for i, title in enumerate(["Alien", "Heat", "Ronin"])
+    ]
+    full = {
+        item["ratingKey"]: dict(item, Role=[{"tag": f"Star of {item['title']}", "role": "Lead"}])
+        for item in listing
+    }
+    fake = FakePlex({("1", 1): listing, ("2", 2): []}, metadata=full)
+    plex_mod.http_get_json = fake
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        await tools._get_library("movie", 1)
+        fake.requests.clear()
+        casts = await asyncio.gather(*[tools.get_cast(title) for title in ("Alien", "Heat", "Ronin", "Heat")])
+        cast_batches = [path for path, _ in fake.requests if path.startswith("/library/metadata/")]
+
+        calls = []
+
+        async def failing_fetch(keys):
+            calls.append(keys)
+            raise RuntimeError("plex down")
+
+        batcher = plex_mod.KeyBatcher(failing_fetch, window=0.01, max_batch=2)
+        outcomes = await asyncio.gather(*[batcher.get(k) for k in ("a", "b", "c")], return_exceptions=True)
+        return casts, cast_batches, calls, outcomes
+
+    casts, cast_batches, calls, outcomes = asyncio.run(scenario())
+    wrong = [c for c, title in zip(casts, ("Alien", "Heat", "Ronin", "Heat")) if f"Star of {title}" not in c]
+    if wrong or len(cast_batches) != 1 or sorted(cast_batches[0].rsplit("/", 1)[1].split(",")) != ["0", "1", "2"]:
+        failures.append(("coalesced get_cast", f"requests {cast_batches}, {len(wrong)} wrong casts"))
+    if calls != [["a", "b"], ["c"]] or not all(isinstance(o, RuntimeError) for o in outcomes):
+        failures.append(("batch size cap + failure fan-out", f"calls {calls}, outcomes {outcomes}"))
+    return failures, 2
+
+
+def run_multi_section_test():
+    """Plex recently-added across Movies / 4K / Kids sections, merged by addedAt."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    sections = [
+        {"key": "1", "type": "movie", "title": "Movies"},
+        {"key": "5", "type": "movie", "title": "4K Movies"},
+        {"key": "6", "type": "movie", "title": "Kids Movies"},
+    ]
+
+    def movie(title, added_at):
+        return {"type": "movie", "title": title, "year": 2026, "addedAt": added_at}
+
+    recent = {
+        ("1", "recent"): [movie("HD Old", 100), movie("HD New", 400)],
+        ("5", "recent"): [movie("4K Newest", 500), movie("4K Mid", 300)],
+        ("6", "recent"): [movie("Kids", 350)],
+    }
+
+    async def run(items):
+        plex_mod.http_get_json = FakePlex(items, sections=sections)
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        return await tools.get_recently_added(limit=4, media_type="movies")
+
+    merged = asyncio.run(run(recent))
+    order = [line.split("**")[1] for line in merged.splitlines() if line.startswith("🎬")]
+    if order != ["4K Newest", "HD New", "Kids", "4K Mid"]:
+        failures.append(("k-way merge by addedAt", f"got {order}"))
+
+    offline = asyncio.run(run({k: v for k, v in recent.items() if k[0] != "6"}))
+    if "4K Newest" not in offline or "Partial results — 1 section(s) unreachable: Kids Movies" not in offline:
+        failures.append(("offline section is partial", f"got {offline!r}"))
+    return failures, 2
+
+
+def run_payload_profile_test():
+    """Every Plex listing/hub/metadata request asks Plex to drop Media and artwork."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    listing = [{"ratingKey": "1", "type": "movie", "title": "Heat", "updatedAt": 1}]
+    recent = [{"type": "movie", "title": "Heat", "addedAt": 1}]
+    fake = FakePlex({("1", 1): listing, ("2", 2): [], ("2", 4): [], ("1", "recent"): recent},
+                    metadata={"1": dict(listing[0], Role=[{"tag": "Al Pacino", "role": "Hanna"}])})
+
+    async def on_deck_and_hubs(url, params=None, **kwargs):
+        if url.endswith("/library/onDeck") or url.endswith("/library/recentlyAdded"):
+            fake.requests.append((url.split("example.invalid", 1)[-1], dict(params or {})))
+            return {"MediaContainer": {"Metadata": []}}
+        return await fake(url, params=params, **kwargs)
+
+    plex_mod.http_get_json = on_deck_and_hubs
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        await tools.get_cast("Heat")
+        await tools.search_plex("zzz unmatched")
+        await tools.get_recently_added(media_type="movies")
+        await tools.get_recently_added(media_type="all")
+        await tools.get_on_deck()
+
+    asyncio.run(scenario())
+    item_requests = [
+        (path, params) for path, params in fake.requests
+        if path != "/library/sections" and params.get("X-Plex-Container-Size") != 0
+    ]
+    unslimmed = [path for path, params in item_requests if "Media" not in params.get("excludeElements", "")]
+    paths = {path for path, _ in item_requests}
+    if unslimmed or not {"/hubs/search", "/library/onDeck", "/library/recentlyAdded", "/library/metadata/1"} <= paths:
+        failures.append(("profiles applied", f"unslimmed {unslimmed}, saw {sorted(paths)}"))
+    on_deck = [params for path, params in item_requests if path == "/library/onDeck"]
+    if not on_deck or on_deck[0].get("X-Plex-Container-Size") != 10:
+        failures.append(("on-deck container limit", f"params {on_deck}"))
+    return failures, 2
+
+
+def run_notification_listener_test():
+    """Plex /:/websockets/notifications events invalidate snapshots; reconnects."""
+    try:
+        import websockets
+    except ImportError:
+        print("      (websockets not installed — optional dependency, skipped)")
+        return [], 0
+
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    fake = FakePlex({("1", 1): [{"ratingKey": "1", "type": "movie", "title": "Heat", "updatedAt": 1}],
+                     ("2", 2): [], ("2", 4): []})
+    plex_mod.http_get_json = fake
+    timeline = {"NotificationContainer": {"type": "timeline", "TimelineEntry": [
+        {"itemID": "7", "sectionID": "1", "type": 1, "state": 5},
+    ]}}
+    scan_ended = {"NotificationContainer": {"type": "activity", "ActivityNotification": [
+        {"event": "ended", "Activity": {"type": "library.update.section", "Context": {"librarySectionID": "2"}}},
+    ]}}
+    connections = []
+
+    async def plex_stand_in(ws, *_path):
+        connections.append(ws.request.path if hasattr(ws, "request") else _path[0])
+        if len(connections) == 1:
+            await ws.send("not json")
+            await ws.send(json.dumps(timeline))
+            await asyncio.sleep(0.05)
+            return  # drop the client; it should reconnect
+        await asyncio.sleep(0.2)
+        await ws.send(json.dumps(scan_ended))
+        await asyncio.sleep(1)
+
+    async def scenario():
+        async with websockets.serve(plex_stand_in, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            tools = plex_mod.Tools()
+            tools.valves.PLEX_URL = f"http://127.0.0.1:{port}"
+            tools.valves.PLEX_TOKEN = "tok"
+            tools.valves.PLEX_NOTIFICATIONS = True
+            tools._listener_backoff = 0.01
+            for type_code in (1, 2, 4):
+                await tools._section_snapshot({"key": "1" if type_code == 1 else "2", "type": "x", "title": "t"},
+                                              type_code).get(300)
+            await asyncio.sleep(0)  # fresh loads above
+            tools._ensure_listener()
+            await asyncio.sleep(0.03)
+            after_timeline = {key: snap.loaded_at == 0 for key, snap in tools._library.items()}
+            for snap in tools._library.values():
+                snap.loaded_at = 1e12  # "fresh" again, so only later events show
+            await asyncio.sleep(0.1)
+            after_reconnect = all(snap.loaded_at == 0 for snap in tools._library.values())
+            for snap in tools._library.values():
+                snap.loaded_at = 1e12
+            await asyncio.sleep(0.3)
+            after_scan = {key: snap.loaded_at == 0 for key, snap in tools._library.items()}
+            tools.valves.PLEX_NOTIFICATIONS = False
+            tools._listener.cancel()
+            return after_timeline, after_reconnect, after_scan
+
+    after_timeline, after_reconnect, after_scan = asyncio.run(scenario())
+    if after_timeline != {("1", 1): True, ("2", 2): False, ("2", 4): False}:
+        failures.append(("timeline invalidates one snapshot", f"{after_timeline}"))
+    if (len(connections) < 2 or not after_reconnect
+            or not connections[0].startswith("/:/websockets/notifications?X-Plex-Token=tok")):
+        failures.append(("reconnect after drop", f"connections {connections}, all invalidated={after_reconnect}"))
+    if after_scan != {("1", 1): False, ("2", 2): True, ("2", 4): True}:
+        failures.append(("library scan invalidates its section", f"{after_scan}"))
+    return failures, 3
+
+
+def run_hub_cache_test():
+    """Plex hub-search cache: repeats and typos skip Plex until the library changes."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    movies = [{"ratingKey": "1", "type": "movie", "title": "Heat", "updatedAt": 1}]
+    fake = FakePlex({("1", 1): movies, ("2", 2): [], ("2", 4): []})
+    fake.hubs["tom hanks"] = [{"type": "movie", "Metadata": [{"title": "Cast Away", "year": 2000}]}]
+    plex_mod.http_get_json = fake
+
+    def hub_requests() -> int:
+        return fake.count(lambda path, _: path == "/hubs/search")
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        for query in ("Tom Hanks", "tom  hanks", " TOM HANKS"):
+            person = await tools.search_plex(query)
+        repeats = hub_requests()
+        for _ in range(3):
+            typo = await tools.search_plex("Tom Hnaks")
+        typos = hub_requests() - repeats
+        ttls = {key[0]: expires - time.monotonic() for key, (expires, _) in tools._hub_cache._entries.items()}
+
+        # A refresh that moves the watermark makes cached searches stale
+        movies.append({"ratingKey": "2", "type": "movie", "title": "Big", "updatedAt": 50})
+        snap = tools._library[("1", 1)]
+        snap.invalidate()
+        await snap.get(0, force=True)
+        await tools.search_plex("Tom Hanks")
+        after_refresh = hub_requests() - repeats - typos
+        return person, typo, repeats, typos, ttls, after_refresh
+
+    person, typo, repeats, typos, ttls, after_refresh = asyncio.run(scenario())
+    if "Cast Away" not in person or repeats != 1:
+        failures.append(("repeat queries cached", f"{repeats} hub searches"))
+    if "No results" not in typo or typos != 1 or not ttls.get("tom hnaks", 999) <= 60 < ttls.get("tom hanks", 0):
+        failures.append(("negative caching", f"{typos} hub searches, ttls {ttls}"))
+    if after_refresh != 1:
+        failures.append(("watermark invalidation", f"{after_refresh} hub searches after refresh"))
+    return failures, 3
+
+
+def run_person_engine_test():
+    """Plex person engine: live actor/writer lookups, memoised under LRU-TTL."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+    fake = FakePlex({})
+    fake.hubs["tom hanks"] = [{"type": "actor", "Directory": [
+        {"tag": "Tom Hanks", "key": "/library/sections/1/all?actor=11", "librarySectionTitle": "Movies"},
+        {"tag": "Tom Hanks", "key": "/library/sections/2/all?actor=11", "librarySectionTitle": "TV Shows"},
+        {"tag": "Tom Hardy", "key": "/library/sections/1/all?actor=12", "librarySectionTitle": "Movies"},
+    ]}]
+    credits = {
+        "actor=11": [{"type": "movie", "title": "Cast Away", "year": 2000}, {"type": "show", "title": "Band of Brothers", "year": 2001}],
+        "actor=12": [{"type": "movie", "title": "Locke", "year": 2013}],
+        "writer=21": [{"type": "movie", "title": "The Social Network", "year": 2010}],
+    }
+    requests = []
+
+    async def no_snapshot(url, params=None, **kwargs):
+        parts = urlsplit(url)
+        requests.append(parts.path)
+        if parts.query:  # a person-section filter key
+            section_type = "movie" if parts.path.startswith("/library/sections/1/") else "show"
+            return {"MediaContainer": {"Metadata": [i for i in credits.get(parts.query, []) if i["type"] == section_type]}}
+        if parts.path.endswith("/all"):
+            raise RuntimeError("listing unavailable")  # keep the person index out of play
+        if parts.path == "/library/sections/1/writer":
+            return {"MediaContainer": {"Directory": [{"key": "21", "title": "Aaron Sorkin"}]}}
+        if parts.path == "/library/sections/2/writer":
+            return {"MediaContainer": {"Directory": []}}
+        return await fake(url, params=params, **kwargs)
+
+    plex_mod.http_get_json = no_snapshot
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        actor = await tools.search_by_actor("Tom Hanks")
+        first = len(requests)
+        again = await tools.search_by_person("tom  hanks", "actor")
+        live_repeat = [p for p in requests[first:] if not p.endswith("/all") and p != "/library/sections"]
+        writer = await tools.search_by_person("Aaron Sorkn", "writer")
+        bogus = await tools.search_by_person("Someone", "gaffer")
+        return actor, again, live_repeat, writer, bogus
+
+    actor, again, live_repeat, writer, bogus = asyncio.run(scenario())
+    if "Cast Away" not in actor or "Band of Brothers" not in actor or "Locke" in actor or "(2 total)" not in actor:
+        failures.append(("live actor lookup", f"got {actor!r}"))
+    if "Cast Away" not in again or live_repeat:
+        failures.append(("memoised repeat", f"extra requests {live_repeat}"))
+    if "Content written by **Aaron Sorkin**" not in writer or "The Social Network" not in writer or "Unsupported role" not in bogus:
+        failures.append(("writer via tag listing", f"got {writer!r} / {bogus!r}"))
+    return failures, 3
+
+
+def run_show_episodes_test():
+    """Plex get_episode_details: show-scoped /allLeaves lookup, cached per show."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+
+    def pilot(key, show, summary):
+        return {"ratingKey": key, "type": "episode", "title": "Pilot", "grandparentTitle": show,
+                "parentIndex": 1, "index": 1, "summary": summary, "updatedAt": 100}
+
+    shows = [
+        {"ratingKey": "10", "type": "show", "title": "Breaking Bad", "updatedAt": 100},
+        {"ratingKey": "20", "type": "show", "title": "Better Call Saul", "updatedAt": 100},
+    ]
+    fake = FakePlex({
+        ("2", 2): shows,
+        ("2", 4): [pilot(f"e{i}", f"Show {i}", "Someone else's pilot.") for i in range(300)]
+                  + [pilot("lost1", "Lost", "Flight 815 crashes.")],
+    })
+    fake.leaves = {
+        "10": [pilot("b1", "Breaking Bad", "Walt gets a diagnosis.")],
+        "20": [pilot("s1", "Better Call Saul", "Jimmy takes a case."),
+               dict(pilot("s2", "Better Call Saul", "Kim decides."), title="Bagman", parentIndex=5, index=8)],
+    }
+    plex_mod.http_get_json = fake
+
+    def is_leaves(path, _params):
+        return path.endswith("/allLeaves")
+
+    def is_episode_listing(path, params):
+        return path.startswith("/library/sections/") and params.get("type") == 4
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://example.invalid"
+        saul = await tools.get_episode_details("Pilot", "Better Caul Saul")
+        listings = fake.count(is_episode_listing)
+        bagman = await tools.get_episode_details("bagman", "better call saul")
+        leaves = fake.count(is_leaves)
+        lost = await tools.get_episode_details("Pilot", "Lost")
+        return saul, listings, bagman, leaves, lost
+
+    saul, listings, bagman, leaves, lost = asyncio.run(scenario())
+    if "Jimmy takes a case." not in saul or "matched show 'Better Call Saul'" not in saul or listings:
+        failures.append(("show-scoped lookup", f"{listings} episode listings; got {saul!r}"))
+    if "S05E08: Bagman" not in bagman or leaves != 1:
+        failures.append(("cached allLeaves", f"{leaves} /allLeaves requests; got {bagman!r}"))
+    if "Flight 815 crashes." not in lost:
+        failures.append(("library-wide fallback", f"got {lost!r}"))
+    return failures, 3
+
+
+def run_multi_server_test():
+    """Multi-server Plex: GUID-merged, labelled results; a slow server is cut off."""
+    failures = []
+    plex_mod = load("midnight_plex.py")
+
+    def movie(key, title, year, added, actors=()):
+        return {"ratingKey": key, "guid": f"plex://movie/{title.lower()}", "type": "movie", "title": title,
+                "year": year, "addedAt": added, "updatedAt": 100, "Role": [{"tag": a} for a in actors]}
+
+    main_movies = [movie("1", "Inception", 2010, 300, ["Leonardo DiCaprio"]), movie("2", "Heat", 1995, 100)]
+    mom_movies = [movie("71", "Inception", 2010, 250, ["Leonardo DiCaprio"]),
+                  movie("72", "The Revenant", 2015, 200, ["Leonardo DiCaprio"])]
+    servers = {
+        "main.invalid": FakePlex({("1", 1): main_movies, ("1", "recent"): main_movies}, sections=FakePlex.SECTIONS[:1]),
+        "mom.invalid": FakePlex({("1", 1): mom_movies, ("1", "recent"): mom_movies}, sections=FakePlex.SECTIONS[:1]),
+    }
+
+    async def route(url, **kwargs):
+        host = urlsplit(url).hostname
+        if host == "slow.invalid":
+            await asyncio.sleep(5)
+        return await servers[host](url, **kwargs)
+
+    plex_mod.http_get_json = route
+
+    async def scenario():
+        tools = plex_mod.Tools()
+        tools.valves.PLEX_URL = "http://main.invalid"
+        tools.valves.PLEX_EXTRA_SERVERS = "Mom|http://mom.invalid|t1; Slow|http://slow.invalid|t2"
+        tools.valves.PLEX_SERVER_TIMEOUT = 0.3
+        start = time.perf_counter()
+        search = await tools.search_plex("inception")
+        elapsed = time.perf_counter() - start
+        actor = await tools.search_by_actor("Leonardo DiCaprio")
+        recent = await tools.get_recently_added(media_type="movies")
+        return search, elapsed, actor, recent
+
+    search, elapsed, actor, recent = asyncio.run(scenario())
+    if "Inception (2010)" not in search or "[main, Mom]" not in search or "Slow server: no answer within 0.3s" not in search or elapsed > 2:
+        failures.append(("federated search", f"{elapsed:.2f}s; got {search!r}"))
+    if "(2 total)" not in actor or "The Revenant (2015)" not in actor or "[Mom]" not in actor:
+        failures.append(("federated filmography", f"got {actor!r}"))
+    order = [recent.find(title) for title in ("Inception", "The Revenant", "Heat")]
+    if -1 in order or order != sorted(order) or recent.count("Inception") != 1:
+        failures.append(("merged recently added", f"got {recent!r}"))
+    return failures, 3
+
+
+def run_home_stats_test():
+    """Tautulli get_most_watched: one combined, cached call; concurrent fallback."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+    groups = {
+        "top_movies": [{"title": "Dune", "year": 2021, "total_plays": 9}],
+        "top_tv": [{"title": "Severance", "total_plays": 12}],
+        "top_users": [{"friendly_name": "peter", "total_plays": 30}],
+        "top_platforms": [{"platform": "Roku", "total_plays": 18}],
+        "top_libraries": [{"section_name": "4K Movies", "total_plays": 7}],
+        "most_concurrent": [{"title": "Concurrent Streams", "count": 4}],
+    }
+    calls = []
+    combined = {"supported": True}
+    disabled = {"top_platforms", "most_concurrent"}  # cards turned off on this server
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        calls.append(params)
+        stat_id = params.get("stat_id")
+        if stat_id is None:
+            if combined["supported"]:
+                return {"response": {"data": [{"stat_id": k, "rows": v} for k, v in groups.items() if k not in disabled]}}
+            return {"response": {"data": {}}}
+        await asyncio.sleep(0.1)
+        if stat_id == "top_users":
+            raise ConnectionError("timed out")
+        return {"response": {"data": {"stat_id": stat_id, "rows": groups[stat_id]}}}
+
+    tautulli_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = tautulli_mod.Tools()
+        start = time.perf_counter()
+        everything = await tools.get_most_watched(30, categories="all")
+        filled_in = time.perf_counter() - start
+        first = list(calls)
+        default = await tools.get_most_watched(30)
+        repeat = len(calls) - len(first)
+        combined["supported"] = False
+        start = time.perf_counter()
+        fallback = await tools.get_most_watched(7)
+        elapsed = time.perf_counter() - start
+        before_retry = len(calls)
+        await tools.get_most_watched(7)
+        retried = [c.get("stat_id") for c in calls[before_retry:]]
+        return everything, first, filled_in, default, repeat, fallback, elapsed, retried
+
+    everything, first, filled_in, default, repeat, fallback, elapsed, retried = asyncio.run(scenario())
+    if len(first) != 3 or sorted(c.get("stat_id") or "" for c in first) != ["", "most_concurrent", "top_platforms"] \
+            or "Roku (18 plays)" not in everything or "Concurrent Streams: 4" not in everything or filled_in > 0.18:
+        failures.append(("combined call + missing groups", f"{first!r} in {filled_in:.2f}s; got {everything!r}"))
+    if repeat or "Dune (2021) (9 plays)" not in default or "Roku" in default:
+        failures.append(("cached per time range", f"{repeat} extra calls; got {default!r}"))
+    if "Severance (12 plays)" not in fallback or "Partial results — top_users" not in fallback or elapsed > 0.25:
+        failures.append(("concurrent fallback", f"{elapsed:.2f}s; got {fallback!r}"))
+    if None not in retried:
+        failures.append(("incomplete result not cached", f"retry requested {retried!r}"))
+    return failures, 4
+
+
+def run_history_warehouse_test():
+    """Tautulli history warehouse: full then incremental sync; local queries."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+    day = 86400
+    base = int(datetime(2024, 1, 1, 12).timestamp())
+    plays = [
+        {"id": i, "started": base + (i // 10) * day, "duration": 1800, "user_id": 1 + i % 2,
+         "friendly_name": "Peter" if i % 2 else "Sam", "media_type": "episode", "title": f"Episode {i}",
+         "grandparent_title": "Severance" if i % 3 else "Landman", "parent_media_index": 1, "media_index": i % 10,
+         "platform": "Roku"}
+        for i in range(2500)
+    ]
+    requests = []
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        requests.append(dict(params))
+        rows = sorted(plays, key=lambda r: r["started"], reverse=True)
+        if "after" in params:
+            after = datetime.strptime(params["after"], "%Y-%m-%d").timestamp()
+            rows = [r for r in rows if r["started"] >= after]
+        start, length = params["start"], params["length"]
+        return {"response": {"data": {"recordsFiltered": len(rows), "data": rows[start:start + length]}}}
+
+    tautulli_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = tautulli_mod.Tools()
+        tools.valves.HISTORY_DB_PATH = ":memory:"
+        stats = await tools.get_history_stats("2024-01-01", "2024-01-10", group_by="user")
+        full_sync = list(requests)
+        plays.append({"id": 9999, "started": plays[-1]["started"] + 3600, "duration": 5400, "user_id": 3,
+                      "friendly_name": "Alex", "media_type": "movie", "title": "Dune", "year": 2021,
+                      "platform": "Apple TV"})
+        tools.valves.HISTORY_SYNC_SECONDS = 0
+        await tools.get_history_stats()  # serves the current copy, syncs in the background
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        alex = await tools.query_history(user="alx")
+        shows = await tools.get_history_stats(user="petr", group_by="title")
+        elapsed = time.perf_counter() - start
+        return stats, full_sync, requests[len(full_sync):], alex, shows, elapsed
+
+    stats, full_sync, incremental, alex, shows, elapsed = asyncio.run(scenario())
+    if len(full_sync) != 3 or "100 plays, 50.0 hours" not in stats or "Peter — 50 plays, 25.0 h" not in stats:
+        failures.append(("full sync + window", f"{len(full_sync)} pages; got {stats!r}"))
+    if not incremental or not all("after" in r for r in incremental) or "**Alex** watched **Dune** (2021)" not in alex:
+        failures.append(("incremental sync", f"requests {incremental}; got {alex!r}"))
+    if "for **Peter**" not in shows or "Severance — 833 plays" not in shows or elapsed > 0.5:
+        failures.append(("local aggregates", f"{elapsed:.2f}s; got {shows!r}"))
+
+    # A first import that fails on page 2 resumes from that offset on the next sync
+    flaky = {"fail": True}
+
+    async def flaky_http_get_json(url, params=None, **kwargs):
+        if params["start"] == 1000 and "after" not in params and flaky.pop("fail", False):
+            raise ConnectionError("502 Bad Gateway")
+        return await fake_http_get_json(url, params=params, **kwargs)
+
+    tautulli_mod.http_get_json = flaky_http_get_json
+
+    async def interrupted():
+        tools = tautulli_mod.Tools()
+        tools.valves.HISTORY_DB_PATH = ":memory:"
+        failed = await tools.query_history()
+        requests.clear()
+        resumed = await tools.get_history_stats()
+        count = tools._connect().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        return failed, list(requests), resumed, count
+
+    failed, resumed_requests, resumed, count = asyncio.run(interrupted())
+    backfill = [r["start"] for r in resumed_requests if "after" not in r]
+    if "error" not in failed.lower() or count != len(plays) or backfill[:1] != [1000] or "Still importing" in resumed:
+        failures.append(("resumed import", f"{count} of {len(plays)} plays; backfill starts {backfill}; got {resumed!r}"))
+    return failures, 4
+
+
+def run_viewing_analytics_test():
+    """Tautulli viewing analytics: binges, heatmap and completion; 500k-play budget."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+
+    async def no_new_plays(url, params=None, **_kwargs):
+        return {"response": {"data": {"recordsFiltered": 0, "data": []}}}
+
+    tautulli_mod.http_get_json = no_new_plays
+
+    def play(i, started, user, show, percent=100, media_type="episode"):
+        return (i, started, started + 1800, 1800, 1, user, media_type, f"Ep {i}", show, 1, i, None, i, 7,
+                "Roku", "Roku", percent)
+
+    saturday_9pm = int(datetime(2024, 3, 2, 21).timestamp())
+    crafted = [play(i, saturday_9pm + i * 1200, "Peter", "Severance") for i in range(4)]  # one 4-episode binge
+    crafted += [play(10 + i, saturday_9pm + 86400 * 3 + i * 2400, "Sam", "Landman", percent=40) for i in range(2)]
+    crafted += [play(20, saturday_9pm + 86400 * 5, "Sam", None, percent=95, media_type="movie")]
+
+    async def scenario():
+        small = tautulli_mod.Tools()
+        small.valves.HISTORY_DB_PATH = ":memory:"
+        db = small._connect()
+        db.executemany(f"INSERT INTO history VALUES ({', '.join('?' * 17)})", crafted)
+        report = await small.get_viewing_analytics()
+
+        big = tautulli_mod.Tools()
+        big.valves.HISTORY_DB_PATH = ":memory:"
+        db = big._connect()
+        base = int(datetime(2020, 1, 1).timestamp())
+        db.executemany(
+            f"INSERT INTO history VALUES ({', '.join('?' * 17)})",
+            (play(i, base + i * 300, f"user{i % 7}", f"show{i % 50}", percent=i % 101) for i in range(500_000)),
+        )
+        await big.get_viewing_analytics()  # builds the column table
+        start = time.perf_counter()
+        bulk = await big.get_viewing_analytics(binge_episodes=4, binge_hours=6)
+        return report, bulk, time.perf_counter() - start
+
+    report, bulk, elapsed = asyncio.run(scenario())
+    if "1 sessions — Peter 1" not in report or "Peter — Severance: 4 episodes" not in report:
+        failures.append(("binge detection", f"got {report!r}"))
+    if "Busiest slot: Sat 2" not in report or "Episodes: 67% (4 of 6 plays)" not in report or "Movies: 100%" not in report:
+        failures.append(("heatmap + completion", f"got {report!r}"))
+    if elapsed > 1.0 or "(500000 plays)" not in bulk:
+        failures.append(("500k-play budget", f"{elapsed:.2f}s"))
+    return failures, 3
+
+
+def run_play_table_refresh_test():
+    """Tautulli analytics table: built mid-import, rebuilt when the warehouse changes."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+    base = int(datetime(2024, 1, 1, 12).timestamp())
+    plays = [
+        {"id": i, "started": base + i * 3600, "duration": 1800, "user_id": 1, "friendly_name": "Peter",
+         "media_type": "movie", "title": f"Movie {i}", "percent_complete": 50}
+        for i in range(3000)
+    ]
+    gate = asyncio.Event()
+    served = []
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        if served and not gate.is_set():
+            await gate.wait()  # hold the first import after its newest page
+        served.append(params["start"])
+        rows = sorted(plays, key=lambda r: r["started"], reverse=True)
+        if "after" in params:
+            after = datetime.strptime(params["after"], "%Y-%m-%d").timestamp()
+            rows = [r for r in rows if r["started"] >= after]
+        start, length = params["start"], params["length"]
+        return {"response": {"data": {"recordsFiltered": len(rows), "data": rows[start:start + length]}}}
+
+    tautulli_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = tautulli_mod.Tools()
+        tools.valves.HISTORY_DB_PATH = ":memory:"
+        get_history_db = tools._get_history_db
+        tools._get_history_db = lambda wait=15.0: get_history_db(wait=0.05)
+        partial, note = await tools._get_play_table()
+        gate.set()
+        while tools._history._task is not None:
+            await asyncio.sleep(0.01)
+        full, _ = await tools._get_play_table()
+        full_count = len(full["started"])
+        again, _ = await tools._get_play_table()
+        plays[0] = dict(plays[0], percent_complete=100)
+        await tools._sync_history()  # the edited play predates `after`, so no row changes
+        unchanged, _ = await tools._get_play_table()
+        plays.append(dict(plays[-1], id=3000, started=plays[-1]["started"] + 3600))
+        await tools._sync_history()
+        appended, _ = await tools._get_play_table()
+        appended_count = len(appended["started"])
+        plays[-1] = dict(plays[-1], percent_complete=100)
+        await tools._sync_history()
+        updated, _ = await tools._get_play_table()
+        return partial, note, full, full_count, again, unchanged, (appended is full, appended_count), updated
+
+    partial, note, full, full_count, again, unchanged, appended, updated = asyncio.run(scenario())
+    if len(partial["started"]) != 1000 or "Still importing" not in note:
+        failures.append(("mid-import build", f"{len(partial['started'])} plays; note {note!r}"))
+    if full_count != 3000 or again is not full:
+        failures.append(("rebuild after import", f"{full_count} plays; reused: {again is full}"))
+    if appended != (True, 3001):
+        failures.append(("append new plays", f"(same table, plays) = {appended}"))
+    if unchanged is not full or updated is full or int(updated["percent"].max()) != 100 or len(updated["started"]) != 3001:
+        failures.append(("upsert rebuild", f"reused: {unchanged is full}; max percent {int(updated['percent'].max())}"))
+    return failures, 4
+
+
+def run_activity_poller_test():
+    """Tautulli activity: shared poller snapshot, per-user change feed, idle stop."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+    peter = {"session_key": "1", "friendly_name": "Peter", "media_type": "episode", "grandparent_title": "Severance",
+             "parent_media_index": 1, "media_index": 2, "state": "playing"}
+    sam = {"session_key": "2", "friendly_name": "Sam", "media_type": "movie", "title": "Dune", "year": 2021,
+           "state": "playing"}
+    live = {"sessions": [peter]}
+    calls = []
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        if params["cmd"] == "get_users":
+            return {"response": {"data": []}}
+        calls.append(params["cmd"])
+        return {"response": {"data": {"stream_count": len(live["sessions"]), "sessions": list(live["sessions"])}}}
+
+    tautulli_mod.http_get_json = fake_http_get_json
+    tautulli_mod.ACTIVITY_IDLE_SECONDS = 0.3
+
+    async def scenario():
+        tools = tautulli_mod.Tools()
+        tools.valves.ACTIVITY_POLL_SECONDS = 0.05
+        burst = await asyncio.gather(*[tools.get_activity() for _ in range(5)])
+        first_calls = len(calls)
+        baseline = await tools.get_activity_changes(__user__={"id": "a"})
+        live["sessions"] = [sam]
+        await asyncio.sleep(0.12)
+        for _ in range(20):
+            await tools.get_activity()
+        changes = await tools.get_activity_changes(__user__={"id": "a"})
+        repeat = await tools.get_activity_changes(__user__={"id": "a"})
+        polls = len(calls)
+        await asyncio.sleep(0.5)
+        idle_calls = len(calls)
+        await asyncio.sleep(0.2)
+        return burst, first_calls, baseline, changes, repeat, polls, idle_calls, tools._poller
+
+    burst, first_calls, baseline, changes, repeat, polls, idle_calls, poller = asyncio.run(scenario())
+    if first_calls != 1 or not all("**Severance** S01E02" in b for b in burst) or polls > 8:
+        failures.append(("shared snapshot", f"{first_calls} calls for 5 readers, {polls} after 20 more reads"))
+    if "No streams started or stopped" not in baseline or "**Sam** started **Dune** (2021)" not in changes \
+            or "**Peter** stopped **Severance** S01E02" not in changes or "No streams started or stopped" not in repeat:
+        failures.append(("change feed", f"got {baseline!r} / {changes!r} / {repeat!r}"))
+    if poller is not None or len(calls) != idle_calls:
+        failures.append(("idle stop", f"poller {poller}, {len(calls) - idle_calls} polls after going idle"))
+    return failures, 3
+
+
+def run_user_mapping_test():
+    """Tautulli user mapping: email/name/UserValve resolution; server-side user_id."""
+    failures = []
+    tautulli_mod = load("midnight_tautulli.py")
+    users = [
+        {"user_id": 11, "username": "pmarino", "friendly_name": "Pete", "email": "peter@example.com"},
+        {"user_id": 12, "username": "samantha_k", "friendly_name": "Sam", "email": "sam@example.com"},
+        {"user_id": 13, "username": "peterjr", "friendly_name": "Peter Jr", "email": ""},
+    ]
+    calls = []
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        calls.append(dict(params))
+        cmd = params["cmd"]
+        if cmd == "get_users":
+            data = users
+        elif cmd == "get_history":
+            data = {"data": [{"date": 1700000000, "media_type": "movie", "title": f"Movie for {params.get('user_id')}",
+                              "year": 2020, "percent_complete": 100}]}
+        elif cmd == "get_activity":
+            data = {"stream_count": 2, "sessions": [
+                {"session_key": "1", "user_id": 11, "friendly_name": "Pete", "media_type": "movie", "title": "Heat", "year": 1995},
+                {"session_key": "2", "user_id": 13, "friendly_name": "Peter Jr", "media_type": "movie", "title": "Cars", "year": 2006},
+            ]}
+        elif cmd == "get_user_watch_time_stats":
+            data = [{"query_days": 1, "total_plays": 2, "total_time": 7200}, {"query_days": 0, "total_plays": 90, "total_time": 360000}]
+        elif cmd == "get_user_player_stats":
+            data = [{"player_name": "Living Room TV", "total_plays": 60}]
+        else:
+            data = [{"stat_id": "top_movies", "rows": [{"title": "Heat", "total_plays": 3}]}]
+        return {"response": {"data": data}}
+
+    tautulli_mod.http_get_json = fake_http_get_json
+    by_email = {"id": "u1", "name": "Peter Marino", "email": "peter@example.com"}
+    by_name = {"id": "u2", "name": "Samantha K", "email": "sk@elsewhere.org"}
+    by_valve = {"id": "u3", "name": "Junior", "email": "", "valves": {"TAUTULLI_USERNAME": "peterjr"}}
+
+    async def scenario():
+        tools = tautulli_mod.Tools()
+        mapped = [await tools._resolve_user(u) for u in (by_email, by_name, by_valve, by_email)]
+        history = await tools.get_my_history(5, __user__=by_valve)
+        stats = await tools.get_my_stats(__user__=by_email)
+        activity = await tools.get_activity(__user__=by_email)
+        return mapped, history, stats, activity
+
+    mapped, history, stats, activity = asyncio.run(scenario())
+    ids = [m and m["user_id"] for m in mapped]
+    if ids != [11, 12, 13, 11] or sum(c["cmd"] == "get_users" for c in calls) != 1:
+        failures.append(("account mapping", f"got {ids}, {sum(c['cmd'] == 'get_users' for c in calls)} get_users calls"))
+    history_calls = [c for c in calls if c["cmd"] == "get_history"]
+    if [c.get("user_id") for c in history_calls] != [13] or "Movie for 13" not in history \
+            or "All time: 90 plays, 100.0 h" not in stats or "Living Room TV (60 plays)" not in stats:
+        failures.append(("server-side user_id", f"history calls {history_calls}; got {history!r} / {stats!r}"))
+    if "**you** (Pete)" not in activity or "**you** (Peter Jr)" in activity:
+        failures.append(("'you' by user_id", f"got {activity!r}"))
+    return failures, 3
+
+
+def run_show_resolution_test():
+    """Sonarr title/ID index: AKAs, disambiguators and ids resolve in one lookup."""
+    failures = []
+    sonarr_mod = load("midnight_sonarr.py")
+    series = [
+        {"id": 1, "title": "Money Heist", "tvdbId": 327417, "imdbId": "tt6468322", "cleanTitle": "moneyheist",
+         "alternateTitles": [{"title": "La Casa de Papel"}], "seasons": []},
+        {"id": 2, "title": "The Office (US)", "sortTitle": "office us", "tvdbId": 73244, "imdbId": "tt0386676",
+         "alternateTitles": [], "seasons": []},
+        {"id": 3, "title": "The Office (UK)", "tvdbId": 78107, "alternateTitles": [], "seasons": []},
+    ]
+    calls = []
+
+    async def fake_http_get_json(url, **_kwargs):
+        calls.append(url)
+        if url.endswith("/api/v3/series"):
+            return series
+        series_id = int(url.rsplit("/", 1)[1])
+        return dict(next(s for s in series if s["id"] == series_id), overview="Fresh from /series/{id}")
+
+    sonarr_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = sonarr_mod.Tools()
+        return [await tools.get_show_details(q) for q in ("La Casa de Papel", "the office", "Office US", "327417", "tt0386676")]
+
+    aka, office, office_us, tvdb, imdb = asyncio.run(scenario())
+    if "**Money Heist**" not in aka or "Fresh from /series/{id}" not in aka:
+        failures.append(("resolve alternate title", f"got {aka!r}"))
+    if "**The Office (US)**" not in office or "also matches: The Office (UK)" not in office:
+        failures.append(("resolve disambiguated title", f"got {office!r}"))
+    if "**The Office (US)**" not in office_us or "also matches" in office_us:
+        failures.append(("resolve exact disambiguator", f"got {office_us!r}"))
+    if "**Money Heist**" not in tvdb or "**The Office (US)**" not in imdb:
+        failures.append(("resolve tvdb/imdb id", f"got {tvdb[:40]!r} / {imdb[:40]!r}"))
+    list_calls = sum(url.endswith("/api/v3/series") for url in calls)
+    if list_calls != 1 or len(calls) != 6:
+        failures.append(("resolve request count", f"{list_calls} library fetches, {len(calls)} requests total"))
+    return failures, 5
+
+
+def run_bazarr_catalogue_test():
+    """Bazarr catalogue: paged load once, index lookups, one targeted state refresh."""
+    failures = []
+    bazarr_mod = load("midnight_bazarr.py")
+    movies = [{"radarrId": i, "title": f"Filler Movie {i}", "subtitles": [], "missing_subtitles": []} for i in range(1, 1200)]
+    movies.append({"radarrId": 5000, "title": "The Matrix", "subtitles": [{"code2": "en"}], "missing_subtitles": [{"code2": "es"}]})
+    movies.append({"radarrId": 5001, "title": "The Matrix Reloaded", "subtitles": [], "missing_subtitles": []})
+    series = [{"sonarrSeriesId": 7, "title": "Amélie Stories", "episodeMissingCount": 3, "episodeFileCount": 10}]
+    calls = []
+    live = {"fail": False}
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        params = params or {}
+        calls.append((url, dict(params)))
+        rows = movies if url.endswith("/api/movies") else series
+        id_field, id_param = ("radarrId", "radarrid[]") if url.endswith("/api/movies") else ("sonarrSeriesId", "seriesid[]")
+        if id_param in params:
+            if live["fail"]:
+                raise RuntimeError("timeout")
+            wanted = set(params[id_param])
+            fresh = [dict(r) for r in rows if r[id_field] in wanted]
+            for r in fresh:
+                if "subtitles" in r:
+                    r["subtitles"] = r["subtitles"] + [{"code2": "fr"}]
+            return {"data": fresh, "total": len(fresh)}
+        start = params.get("start", 0)
+        return {"data": rows[start:start + params.get("length", len(rows))], "total": len(rows)}
+
+    bazarr_mod.http_get_json = fake_http_get_json
+
+    async def scenario():
+        tools = bazarr_mod.Tools()
+        first = await tools.check_subtitles("the matrix")
+        catalogue_calls = [c for c in calls if "radarrid[]" not in c[1] and "seriesid[]" not in c[1]]
+        calls.clear()
+        amelie = await tools.check_subtitles("Amelie Stories")
+        warm_calls = list(calls)
+        live["fail"] = True
+        stale = await tools.check_subtitles("The Matrix Reloaded")
+        return first, catalogue_calls, amelie, warm_calls, stale
+
+    first, catalogue_calls, amelie, warm_calls, stale = asyncio.run(scenario())
+    movie_starts = sorted(p["start"] for url, p in catalogue_calls if url.endswith("/api/movies"))
+    if movie_starts != [0, 500, 1000]:
+        failures.append(("paged catalogue load", f"movie page starts {movie_starts}"))
+    if "**The Matrix**" not in first or "Reloaded" in first:
+        failures.append(("exact index hit", f"got {first!r}"))
+    if "Subtitles: en, fr" not in first or "Missing: es" not in first:
+        failures.append(("live subtitle state", f"got {first!r}"))
+    if "**Amélie Stories**" not in amelie or "3 episodes missing" not in amelie:
+        failures.append(("ascii-folded lookup", f"got {amelie!r}"))
+    if len(warm_calls) != 1 or warm_calls[0][1] != {"seriesid[]": [7]}:
+        failures.append(("warm lookup requests", f"got {warm_calls!r}"))
+    if "**The Matrix Reloaded**" not in stale or "cached catalogue" not in stale or "bazarr error" in stale.lower():
+        failures.append(("snapshot fallback", f"got {stale!r}"))
+    return failures, 6
+
+
+def run_bazarr_wanted_test():
+    """Bazarr wanted lists: language-filtered paging, early stop, scan cap."""
+    failures = []
+    bazarr_mod = load("midnight_bazarr.py")
+    wanted = {
+        "movies": [{"title": f"Movie {i}", "missing_subtitles": [{"code2": "sv" if i in (150, 220) else "en"}]}
+                   for i in range(300)],
+        "episodes": [{"seriesTitle": f"Show {i}", "season": 1, "episode": i % 100,
+                      "missing_subtitles": [{"code2": "en"}, {"code2": "sv" if i % 10 == 9 else "de"}]}
+                     for i in range(6000)],
+    }
+    calls = []
+
+    async def fake_http_get_json(url, params=None, **_kwargs):
+        kind = url.rsplit("/", 2)[-2]
+        calls.append((kind, params["start"], params["length"]))
+        await asyncio.sleep(0)
+        rows = wanted[kind]
+        return {"data": rows[params["start"]:params["start"] + params["length"]], "total": len(rows)}
+
+    bazarr_mod.http_get_json = fake_http_get_json
+    tools = bazarr_mod.Tools()
+
+    def ask(langs):
+        calls.clear()
+        out = asyncio.run(tools.get_missing_subtitles(__user__={"valves": {"PREFERRED_LANGUAGES": langs}}))
+        return out, list(calls)
+
+    rare, rare_calls = ask("sv")
+    if "Movie 150" not in rare or "Movie 220" not in rare or rare.count("• Show") != 10 or "…and more" not in rare:
+        failures.append(("rare language rows", f"got {rare!r}"))
+    episode_pages = [c for c in rare_calls if c[0] == "episodes"]
+    if len(episode_pages) != 2 or len([c for c in rare_calls if c[0] == "movies"]) != 3:
+        failures.append(("early stop", f"got {rare_calls!r}"))
+    if {rare_calls[0][0], rare_calls[1][0]} != {"movies", "episodes"}:
+        failures.append(("concurrent walks", f"first requests {rare_calls[:2]!r}"))
+
+    plain, plain_calls = ask("")
+    if sorted(plain_calls) != [("episodes", 0, 11), ("movies", 0, 11)] or plain.count("…and more") != 2:
+        failures.append(("unfiltered single page", f"got {plain_calls!r}"))
+
+    none, none_calls = ask("xx")
+    if "first 5000" not in none or sum(c[0] == "episodes" for c in none_calls) != 50 or "✓" in none:
+        failures.append(("scan cap", f"got {none!r} after {len(none_calls)} requests"))
+    return failures, 5
+
+
 def run_build_determinism_test():
     """Verify build_tools.py is idempotent — re-running produces byte-identical output."""
     failures = []
@@ -250,40 +1789,72 @@ def run_build_determinism_test():
     return failures, 1
 
 
+# (heading, runner, noun) — each runner returns (failures, total_checks)
+SECTIONS = [
+    ("Timezone rendering (Plex addedAt under TZ=UTC vs TZ=America/New_York)", run_tz_test, "TZ checks"),
+    ("Build determinism (re-running build_tools.py produces same output)", run_build_determinism_test, "determinism checks"),
+    ("Storage analytics (Radarr/Sonarr group-by totals + 50 ms budget)", run_storage_analytics_test, "storage analytics checks"),
+    ("Multi-instance fan-out (Radarr/Sonarr dedupe, tags, partial results)", run_multi_instance_test, "multi-instance checks"),
+    ("Sonarr history paging (cutoff + display limit)", run_history_paging_test, "history paging checks"),
+    ("Sonarr episode index (on-demand load + capped hydration)", run_episode_index_test, "episode index checks"),
+    ("Sonarr calendar cache (bucket slicing + series join)", run_calendar_cache_test, "calendar cache checks"),
+    ("Sonarr missing episodes (bounded paging + grouping)", run_missing_report_test, "missing-episode checks"),
+    ("Sonarr episode-file analytics (cached NumPy table)", run_episode_file_stats_test, "episode-file checks"),
+    ("Plex library snapshot (paged load + updatedAt refresh)", run_plex_snapshot_test, "snapshot checks"),
+    ("Plex person index (actor/director filmography)", run_person_index_test, "person index checks"),
+    ("Plex metadata batching (coalesced multi-key fetch)", run_metadata_batching_test, "batching checks"),
+    ("Plex multi-section libraries (merged recently added)", run_multi_section_test, "multi-section checks"),
+    ("Plex payload profiles (excluded elements + container limits)", run_payload_profile_test, "payload profile checks"),
+    ("Plex notification listener (stand-in WebSocket server)", run_notification_listener_test, "notification checks"),
+    ("Plex hub-search cache (negative entries + watermark)", run_hub_cache_test, "hub cache checks"),
+    ("Plex person engine (any role, memoised live lookups)", run_person_engine_test, "person engine checks"),
+    ("Plex show-scoped episode lookup (cached /allLeaves)", run_show_episodes_test, "episode lookup checks"),
+    ("Plex multi-server federation (GUID merge + deadlines)", run_multi_server_test, "multi-server checks"),
+    ("Tautulli home stats (one combined call + cache)", run_home_stats_test, "home stats checks"),
+    ("Tautulli history warehouse (SQLite + incremental sync)", run_history_warehouse_test, "warehouse checks"),
+    ("Tautulli viewing analytics (NumPy, 500k plays)", run_viewing_analytics_test, "analytics checks"),
+    ("Tautulli analytics table refresh (mid-import build + upserts)", run_play_table_refresh_test, "table refresh checks"),
+    ("Tautulli activity poller (shared snapshot + change feed)", run_activity_poller_test, "activity checks"),
+    ("Tautulli user mapping (email/name/UserValve + user_id)", run_user_mapping_test, "user mapping checks"),
+    ("Sonarr show resolution (alternate titles + ids)", run_show_resolution_test, "show resolution checks"),
+    ("Bazarr catalogue index (paged snapshot + targeted refresh)", run_bazarr_catalogue_test, "catalogue checks"),
+    ("Bazarr wanted lists (language-aware paging + early stop)", run_bazarr_wanted_test, "wanted-list checks"),
+]
+
+
 def main():
     print("=" * 72)
     print("MIDNIGHT LOCAL VALIDATION")
     print("=" * 72)
+    n_sections = 2 + len(SECTIONS)
 
-    print("\n[1/4] Anti-hallucination contract (Valves → http://127.0.0.1:1)")
+    print(f"\n[1/{n_sections}] Anti-hallucination contract (Valves → http://127.0.0.1:1)")
     p, f, contract_failures = asyncio.run(run_contract_tests())
     print(f"      {p}/{p + f} methods returned visible error strings")
     for file_name, method, msg in contract_failures:
         print(f"      ✗ {file_name}::{method} — {msg}")
 
-    print("\n[2/4] Pure-function logic")
+    print(f"\n[2/{n_sections}] Pure-function logic")
     pure_failures, pure_total = run_pure_tests()
     print(f"      {pure_total - len(pure_failures)}/{pure_total} pure tests passed")
     for name, msg in pure_failures:
         print(f"      ✗ {name} — {msg}")
 
-    print("\n[3/4] Timezone rendering (Plex addedAt under TZ=UTC vs TZ=America/New_York)")
-    tz_failures, tz_total = run_tz_test()
-    print(f"      {tz_total - len(tz_failures)}/{tz_total} TZ checks passed")
-    for name, msg in tz_failures:
-        print(f"      ✗ {name} — {msg}")
-
-    print("\n[4/4] Build determinism (re-running build_tools.py produces same output)")
-    bd_failures, bd_total = run_build_determinism_test()
-    print(f"      {bd_total - len(bd_failures)}/{bd_total} determinism checks passed")
-    for name, msg in bd_failures:
-        print(f"      ✗ {name} — {msg}")
+    total_failed = f + len(pure_failures)
+    total = p + f + pure_total
+    for i, (heading, runner, noun) in enumerate(SECTIONS, 3):
+        print(f"\n[{i}/{n_sections}] {heading}")
+        failures, checks = runner()
+        print(f"      {checks - len(failures)}/{checks} {noun} passed")
+        for name, msg in failures:
+            print(f"      ✗ {name} — {msg}")
+        total_failed += len(failures)
+        total += checks
 
-    total_failed = f + len(pure_failures) + len(tz_failures) + len(bd_failures)
     print()
     print("=" * 72)
     if total_failed == 0:
-        print(f"ALL {p + pure_total + tz_total + bd_total} CHECKS PASSED")
+        print(f"ALL {total} CHECKS PASSED")
         sys.exit(0)
     else:
         print(f"FAILURES: {total_failed}")
@@ -12,6 +12,11 @@ distributed file. The original templates in midnight/midnight_*.py carry
 the marker `# {{INLINE_SHARED}}` where the inlined block goes.
 """
 
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from difflib import SequenceMatcher
 
 import httpx
@@ -50,6 +55,31 @@ async def http_post_json(
         return response.json()
 
 
+def parse_instances(spec: str) -> list:
+    """
+    Parse extra service instances from a Valve string.
+
+    Entries are `label|url|api_key`, separated by `;` or newlines, e.g.
+    `4K|http://192.168.4.46:7879|abc123; Anime|http://192.168.4.46:7880|def456`.
+    Raises ValueError on a malformed entry so a misconfigured Valve surfaces
+    as a visible error instead of silently dropping an instance.
+
+    :param spec: Raw Valve value (may be empty)
+    :return: List of (label, url, api_key) tuples, url without trailing slash
+    """
+    instances = []
+    for entry in spec.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(f"malformed instance entry {entry!r} (expected 'label|url|api_key')")
+        label, url, api_key = parts
+        instances.append((label, url.rstrip("/"), api_key))
+    return instances
+
+
 def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     """
     Find fuzzy matches for a query in a list of candidates. Typo-tolerant.
@@ -73,6 +103,13 @@ def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     return sorted(matches, key=lambda x: x[2], reverse=True)
 
 
+def title_key(title: str) -> str:
+    """Normalise a title for index lookups: ASCII-folded, lowercase, alphanumerics only, no leading article."""
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower().strip()
+    folded = re.sub(r"^(the|a|an)\s+", "", folded)
+    return re.sub(r"[^a-z0-9]", "", folded)
+
+
 async def emit_status(emitter, description: str, done: bool = False) -> None:
     """
     Send an OpenWebUI status event if an emitter is wired.
@@ -89,3 +126,324 @@ async def emit_status(emitter, description: str, done: bool = False) -> None:
             "type": "status",
             "data": {"description": description, "done": done},
         })
+
+
+class TTLSnapshot:
+    """
+    Cached result of an async loader, reused until it is older than max_age.
+
+    The first get() awaits the loader. After that, a stale read returns the
+    cached value immediately and refreshes it in the background, so only the
+    very first call pays backend latency. Concurrent callers share a single
+    in-flight load. A failed load propagates to the callers waiting on it and
+    leaves any previous value in place (a failed background refresh is kept
+    on `.error` instead of being raised).
+
+    `version` increments on every successful load. Derived structures
+    (indexes, NumPy tables) record the version they were built from and
+    rebuild when it moves.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._task = None
+        self.value = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.error = None
+
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)."""
+        if not self.version:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def invalidate(self) -> None:
+        """Mark the value stale so the next get() starts a refresh."""
+        self.loaded_at = 0.0
+
+    async def get(self, max_age: float, force: bool = False):
+        """Return the cached value, loading or refreshing it as needed.
+
+        :param max_age: Seconds a value stays fresh before a background refresh
+        :param force: Wait for a fresh load even if a cached value exists
+        """
+        if self.version and not force:
+            if self.age() > max_age:
+                self._start()
+            return self.value
+        return await asyncio.shield(self._start())
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+            self._task.add_done_callback(self._reap)
+        return self._task
+
+    def _reap(self, task) -> None:
+        # Retrieve the exception so background failures don't log as
+        # "Task exception was never retrieved".
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self.value = value
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self.error = None
+            return value
+        finally:
+            self._task = None
+
+
+class TTLCache:
+    """
+    Small LRU map whose entries expire after a per-entry TTL.
+
+    For memoising query results: `get` returns `default` for missing or
+    expired keys, and `set` takes the TTL so negative results can be kept
+    for less time than positive ones. Once `max_entries` is reached the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyBatcher:
+    """
+    Coalesce concurrent single-key lookups into multi-key requests.
+
+    Callers await `get(key)`. Keys requested within `window` seconds of each
+    other are sent together as one `fetch_many(keys)` call, which returns
+    {key: value}; each caller receives its own value (None if the backend
+    didn't return it). A batch is sent early once it reaches `max_batch`
+    keys, and at most `concurrency` batches are in flight. Callers asking
+    for the same pending key share one slot. A failed batch raises in every
+    caller waiting on it.
+    """
+
+    def __init__(self, fetch_many, window: float = 0.02, max_batch: int = 100, concurrency: int = 4):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._max_batch = max_batch
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}
+        self._timer = None
+
+    async def get(self, key):
+        """Return the value for `key`, fetched as part of the next batch."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                results = await self._fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may all have gone; don't log "never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class ArrInstances:
+    """
+    Multi-instance plumbing shared by the Radarr and Sonarr tools.
+
+    A tool mixes this in and supplies the per-service differences:
+    `SERVICE` ("Radarr"), `VALVE_PREFIX` ("RADARR", for the *_URL /
+    *_API_KEY / *_EXTRA_INSTANCES Valves), `_fetch_library(url, api_key)`
+    for its library endpoint and `_size_on_disk(item)`. Its __init__ sets
+    `_libraries`, `_profiles` (dicts of per-instance TTLSnapshots) and
+    `_storage_table` (None); the Valves carry LIBRARY_CACHE_SECONDS.
+    """
+
+    SERVICE = ""
+    VALVE_PREFIX = ""
+
+    def _get_headers(self, api_key: str = None) -> dict:
+        """Get API headers."""
+        if api_key is None:
+            api_key = getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY")
+        return {"X-Api-Key": api_key}
+
+    def _instances(self) -> list:
+        """(label, url, api_key) for the primary URL (labelled "main") plus every *_EXTRA_INSTANCES entry."""
+        primary = (
+            "main",
+            getattr(self.valves, f"{self.VALVE_PREFIX}_URL").rstrip("/"),
+            getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY"),
+        )
+        return [primary] + parse_instances(getattr(self.valves, f"{self.VALVE_PREFIX}_EXTRA_INSTANCES"))
+
+    async def _fetch_quality_profiles(self, url: str, api_key: str) -> dict:
+        """Fetch one instance's quality profiles as {id: name}. Raises on transport/HTTP error."""
+        profiles = await http_get_json(f"{url}/api/v3/qualityprofile", headers=self._get_headers(api_key))
+        return {p.get("id"): p.get("name", "Unknown") for p in profiles}
+
+    def _snapshot(self, cache: dict, fetch, url: str, api_key: str) -> TTLSnapshot:
+        """Per-instance TTLSnapshot, created on first use (Valves may change at runtime)."""
+        snap = cache.get((url, api_key))
+        if snap is None:
+            snap = cache[(url, api_key)] = TTLSnapshot(lambda: fetch(url, api_key))
+        return snap
+
+    async def _get_libraries(self) -> tuple:
+        """
+        Fetch every instance's library snapshot concurrently.
+
+        Returns ([(label, snapshot, items)], errors). One unreachable instance
+        degrades to partial results; raises only when every instance failed.
+        """
+        instances = self._instances()
+        snaps = [self._snapshot(self._libraries, self._fetch_library, url, key) for _, url, key in instances]
+        responses = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in snaps],
+            return_exceptions=True,
+        )
+        libraries = []
+        errors = []
+        for (label, url, _), snap, resp in zip(instances, snaps, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                libraries.append((label, snap, resp))
+        if not libraries:
+            raise RuntimeError("; ".join(errors))
+        return libraries, errors
+
+    @staticmethod
+    def _instance_tag(item: dict) -> str:
+        """' [main, 4K]' when several instances are configured, else ''."""
+        labels = item.get("_instances")
+        return f" [{', '.join(labels)}]" if labels else ""
+
+    def _with_partial(self, result: str, errors: list) -> str:
+        """Append the partial-results caveat when some instances were unreachable."""
+        if errors:
+            result += f"\n\n⚠️ Partial results — {len(errors)} {self.SERVICE} instance(s) unreachable: {'; '.join(errors)}"
+        return result
+
+    async def _get_storage_table(self) -> tuple:
+        """
+        Columnar (NumPy) view of the library snapshots for storage analytics.
+
+        Returns (table, errors). Rows are per instance, not deduplicated — a
+        title held by both the HD and 4K instances occupies disk twice. The
+        table is rebuilt only when a snapshot version moves, so repeated
+        questions pay for the Python-side column extraction once and every
+        aggregate after that is a vectorised pass. Genres are multi-valued, so
+        they get their own exploded (row, genre_code) arrays.
+        """
+        import numpy as np  # only the tools that mix this in require numpy
+
+        libraries, errors = await self._get_libraries()
+        instances = {label: (url, key) for label, url, key in self._instances()}
+        profile_snaps = [
+            self._snapshot(self._profiles, self._fetch_quality_profiles, *instances[label])
+            for label, _, _ in libraries
+        ]
+        profile_maps = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in profile_snaps],
+            return_exceptions=True,
+        )
+        # Unreachable profile endpoint falls back to "Profile <id>" labels
+        profile_maps = [{} if isinstance(m, Exception) else m for m in profile_maps]
+
+        key = tuple((label, snap.version, psnap.version) for (label, snap, _), psnap in zip(libraries, profile_snaps))
+        if self._storage_table and self._storage_table["key"] == key:
+            return self._storage_table, errors
+
+        items = [item for _, _, library in libraries for item in library]
+        profiles = [pmap for (_, _, library), pmap in zip(libraries, profile_maps) for _ in library]
+        multi = len(instances) > 1
+        labels = [f" [{label}]" if multi else "" for label, _, library in libraries for _ in library]
+        n = len(items)
+        sizes = np.fromiter((self._size_on_disk(item) for item in items), dtype=np.float64, count=n)
+        years = np.fromiter((item.get("year") or 0 for item in items), dtype=np.int32, count=n)
+        profile_vocab = {}
+        profile_codes = np.fromiter(
+            (
+                profile_vocab.setdefault(
+                    pmap.get(item.get("qualityProfileId")) or f"Profile {item.get('qualityProfileId')}",
+                    len(profile_vocab),
+                )
+                for item, pmap in zip(items, profiles)
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        genre_vocab = {}
+        genre_rows = []
+        genre_codes = []
+        for i, item in enumerate(items):
+            for genre in item.get("genres") or ["Unknown"]:
+                genre_rows.append(i)
+                genre_codes.append(genre_vocab.setdefault(genre, len(genre_vocab)))
+        titles = [
+            (item.get("title", "Unknown"), item.get("year", "N/A"), label)
+            for item, label in zip(items, labels)
+        ]
+
+        self._storage_table = {
+            "key": key,
+            "sizes": sizes,
+            "years": years,
+            "profile_codes": profile_codes,
+            "profile_names": list(profile_vocab),
+            "genre_rows": np.asarray(genre_rows, dtype=np.int64),
+            "genre_codes": np.asarray(genre_codes, dtype=np.int32),
+            "genre_names": list(genre_vocab),
+            "titles": titles,
+        }
+        return self._storage_table, errors
@@ -13,6 +13,11 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 # === BEGIN inlined from midnight/_shared.py — DO NOT EDIT, regenerate via build_tools.py ===
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from difflib import SequenceMatcher
 
 import httpx
@@ -51,6 +56,31 @@ async def http_post_json(
         return response.json()
 
 
+def parse_instances(spec: str) -> list:
+    """
+    Parse extra service instances from a Valve string.
+
+    Entries are `label|url|api_key`, separated by `;` or newlines, e.g.
+    `4K|http://192.168.4.46:7879|abc123; Anime|http://192.168.4.46:7880|def456`.
+    Raises ValueError on a malformed entry so a misconfigured Valve surfaces
+    as a visible error instead of silently dropping an instance.
+
+    :param spec: Raw Valve value (may be empty)
+    :return: List of (label, url, api_key) tuples, url without trailing slash
+    """
+    instances = []
+    for entry in spec.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(f"malformed instance entry {entry!r} (expected 'label|url|api_key')")
+        label, url, api_key = parts
+        instances.append((label, url.rstrip("/"), api_key))
+    return instances
+
+
 def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     """
     Find fuzzy matches for a query in a list of candidates. Typo-tolerant.
@@ -74,6 +104,13 @@ def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     return sorted(matches, key=lambda x: x[2], reverse=True)
 
 
+def title_key(title: str) -> str:
+    """Normalise a title for index lookups: ASCII-folded, lowercase, alphanumerics only, no leading article."""
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower().strip()
+    folded = re.sub(r"^(the|a|an)\s+", "", folded)
+    return re.sub(r"[^a-z0-9]", "", folded)
+
+
 async def emit_status(emitter, description: str, done: bool = False) -> None:
     """
     Send an OpenWebUI status event if an emitter is wired.
@@ -90,9 +127,342 @@ async def emit_status(emitter, description: str, done: bool = False) -> None:
             "type": "status",
             "data": {"description": description, "done": done},
         })
+
+
+class TTLSnapshot:
+    """
+    Cached result of an async loader, reused until it is older than max_age.
+
+    The first get() awaits the loader. After that, a stale read returns the
+    cached value immediately and refreshes it in the background, so only the
+    very first call pays backend latency. Concurrent callers share a single
+    in-flight load. A failed load propagates to the callers waiting on it and
+    leaves any previous value in place (a failed background refresh is kept
+    on `.error` instead of being raised).
+
+    `version` increments on every successful load. Derived structures
+    (indexes, NumPy tables) record the version they were built from and
+    rebuild when it moves.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._task = None
+        self.value = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.error = None
+
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)."""
+        if not self.version:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def invalidate(self) -> None:
+        """Mark the value stale so the next get() starts a refresh."""
+        self.loaded_at = 0.0
+
+    async def get(self, max_age: float, force: bool = False):
+        """Return the cached value, loading or refreshing it as needed.
+
+        :param max_age: Seconds a value stays fresh before a background refresh
+        :param force: Wait for a fresh load even if a cached value exists
+        """
+        if self.version and not force:
+            if self.age() > max_age:
+                self._start()
+            return self.value
+        return await asyncio.shield(self._start())
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+            self._task.add_done_callback(self._reap)
+        return self._task
+
+    def _reap(self, task) -> None:
+        # Retrieve the exception so background failures don't log as
+        # "Task exception was never retrieved".
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self.value = value
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self.error = None
+            return value
+        finally:
+            self._task = None
+
+
+class TTLCache:
+    """
+    Small LRU map whose entries expire after a per-entry TTL.
+
+    For memoising query results: `get` returns `default` for missing or
+    expired keys, and `set` takes the TTL so negative results can be kept
+    for less time than positive ones. Once `max_entries` is reached the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyBatcher:
+    """
+    Coalesce concurrent single-key lookups into multi-key requests.
+
+    Callers await `get(key)`. Keys requested within `window` seconds of each
+    other are sent together as one `fetch_many(keys)` call, which returns
+    {key: value}; each caller receives its own value (None if the backend
+    didn't return it). A batch is sent early once it reaches `max_batch`
+    keys, and at most `concurrency` batches are in flight. Callers asking
+    for the same pending key share one slot. A failed batch raises in every
+    caller waiting on it.
+    """
+
+    def __init__(self, fetch_many, window: float = 0.02, max_batch: int = 100, concurrency: int = 4):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._max_batch = max_batch
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}
+        self._timer = None
+
+    async def get(self, key):
+        """Return the value for `key`, fetched as part of the next batch."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                results = await self._fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may all have gone; don't log "never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class ArrInstances:
+    """
+    Multi-instance plumbing shared by the Radarr and Sonarr tools.
+
+    A tool mixes this in and supplies the per-service differences:
+    `SERVICE` ("Radarr"), `VALVE_PREFIX` ("RADARR", for the *_URL /
+    *_API_KEY / *_EXTRA_INSTANCES Valves), `_fetch_library(url, api_key)`
+    for its library endpoint and `_size_on_disk(item)`. Its __init__ sets
+    `_libraries`, `_profiles` (dicts of per-instance TTLSnapshots) and
+    `_storage_table` (None); the Valves carry LIBRARY_CACHE_SECONDS.
+    """
+
+    SERVICE = ""
+    VALVE_PREFIX = ""
+
+    def _get_headers(self, api_key: str = None) -> dict:
+        """Get API headers."""
+        if api_key is None:
+            api_key = getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY")
+        return {"X-Api-Key": api_key}
+
+    def _instances(self) -> list:
+        """(label, url, api_key) for the primary URL (labelled "main") plus every *_EXTRA_INSTANCES entry."""
+        primary = (
+            "main",
+            getattr(self.valves, f"{self.VALVE_PREFIX}_URL").rstrip("/"),
+            getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY"),
+        )
+        return [primary] + parse_instances(getattr(self.valves, f"{self.VALVE_PREFIX}_EXTRA_INSTANCES"))
+
+    async def _fetch_quality_profiles(self, url: str, api_key: str) -> dict:
+        """Fetch one instance's quality profiles as {id: name}. Raises on transport/HTTP error."""
+        profiles = await http_get_json(f"{url}/api/v3/qualityprofile", headers=self._get_headers(api_key))
+        return {p.get("id"): p.get("name", "Unknown") for p in profiles}
+
+    def _snapshot(self, cache: dict, fetch, url: str, api_key: str) -> TTLSnapshot:
+        """Per-instance TTLSnapshot, created on first use (Valves may change at runtime)."""
+        snap = cache.get((url, api_key))
+        if snap is None:
+            snap = cache[(url, api_key)] = TTLSnapshot(lambda: fetch(url, api_key))
+        return snap
+
+    async def _get_libraries(self) -> tuple:
+        """
+        Fetch every instance's library snapshot concurrently.
+
+        Returns ([(label, snapshot, items)], errors). One unreachable instance
+        degrades to partial results; raises only when every instance failed.
+        """
+        instances = self._instances()
+        snaps = [self._snapshot(self._libraries, self._fetch_library, url, key) for _, url, key in instances]
+        responses = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in snaps],
+            return_exceptions=True,
+        )
+        libraries = []
+        errors = []
+        for (label, url, _), snap, resp in zip(instances, snaps, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                libraries.append((label, snap, resp))
+        if not libraries:
+            raise RuntimeError("; ".join(errors))
+        return libraries, errors
+
+    @staticmethod
+    def _instance_tag(item: dict) -> str:
+        """' [main, 4K]' when several instances are configured, else ''."""
+        labels = item.get("_instances")
+        return f" [{', '.join(labels)}]" if labels else ""
+
+    def _with_partial(self, result: str, errors: list) -> str:
+        """Append the partial-results caveat when some instances were unreachable."""
+        if errors:
+            result += f"\n\n⚠️ Partial results — {len(errors)} {self.SERVICE} instance(s) unreachable: {'; '.join(errors)}"
+        return result
+
+    async def _get_storage_table(self) -> tuple:
+        """
+        Columnar (NumPy) view of the library snapshots for storage analytics.
+
+        Returns (table, errors). Rows are per instance, not deduplicated — a
+        title held by both the HD and 4K instances occupies disk twice. The
+        table is rebuilt only when a snapshot version moves, so repeated
+        questions pay for the Python-side column extraction once and every
+        aggregate after that is a vectorised pass. Genres are multi-valued, so
+        they get their own exploded (row, genre_code) arrays.
+        """
+        import numpy as np  # only the tools that mix this in require numpy
+
+        libraries, errors = await self._get_libraries()
+        instances = {label: (url, key) for label, url, key in self._instances()}
+        profile_snaps = [
+            self._snapshot(self._profiles, self._fetch_quality_profiles, *instances[label])
+            for label, _, _ in libraries
+        ]
+        profile_maps = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in profile_snaps],
+            return_exceptions=True,
+        )
+        # Unreachable profile endpoint falls back to "Profile <id>" labels
+        profile_maps = [{} if isinstance(m, Exception) else m for m in profile_maps]
+
+        key = tuple((label, snap.version, psnap.version) for (label, snap, _), psnap in zip(libraries, profile_snaps))
+        if self._storage_table and self._storage_table["key"] == key:
+            return self._storage_table, errors
+
+        items = [item for _, _, library in libraries for item in library]
+        profiles = [pmap for (_, _, library), pmap in zip(libraries, profile_maps) for _ in library]
+        multi = len(instances) > 1
+        labels = [f" [{label}]" if multi else "" for label, _, library in libraries for _ in library]
+        n = len(items)
+        sizes = np.fromiter((self._size_on_disk(item) for item in items), dtype=np.float64, count=n)
+        years = np.fromiter((item.get("year") or 0 for item in items), dtype=np.int32, count=n)
+        profile_vocab = {}
+        profile_codes = np.fromiter(
+            (
+                profile_vocab.setdefault(
+                    pmap.get(item.get("qualityProfileId")) or f"Profile {item.get('qualityProfileId')}",
+                    len(profile_vocab),
+                )
+                for item, pmap in zip(items, profiles)
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        genre_vocab = {}
+        genre_rows = []
+        genre_codes = []
+        for i, item in enumerate(items):
+            for genre in item.get("genres") or ["Unknown"]:
+                genre_rows.append(i)
+                genre_codes.append(genre_vocab.setdefault(genre, len(genre_vocab)))
+        titles = [
+            (item.get("title", "Unknown"), item.get("year", "N/A"), label)
+            for item, label in zip(items, labels)
+        ]
+
+        self._storage_table = {
+            "key": key,
+            "sizes": sizes,
+            "years": years,
+            "profile_codes": profile_codes,
+            "profile_names": list(profile_vocab),
+            "genre_rows": np.asarray(genre_rows, dtype=np.int64),
+            "genre_codes": np.asarray(genre_codes, dtype=np.int32),
+            "genre_names": list(genre_vocab),
+            "titles": titles,
+        }
+        return self._storage_table, errors
 # === END inlined from midnight/_shared.py ===
 
 
+CATALOGUE_PAGE_SIZE = 500  # rows per /api/movies or /api/series page
+CATALOGUE_CONCURRENCY = 4  # pages requested at once after the first
+WANTED_SHOWN = 10  # rows listed per wanted list (movies, episodes)
+WANTED_PAGE_SIZE = 100  # /wanted page length when filtering by language
+WANTED_SCAN_LIMIT = 5000  # rows read per wanted list before giving up on a rare language
+
+# kind -> (label, Bazarr id field, id filter param, subtitle-state fields kept per item)
+CATALOGUES = {
+    "movies": ("Movies", "radarrId", "radarrid[]", ("subtitles", "missing_subtitles")),
+    "series": ("Series", "sonarrSeriesId", "seriesid[]", ("episodeMissingCount", "episodeFileCount")),
+}
+
 
 class Tools:
     """Bazarr subtitle management tools for Midnight."""
@@ -107,6 +477,14 @@ class Tools:
             default="",
             description="Bazarr API key"
         )
+        CATALOGUE_REFRESH_SECONDS: int = Field(
+            default=600,
+            description="Reuse the paged movie/series catalogue (the title index check_subtitles searches) for this many seconds before refreshing it in the background"
+        )
+        LIVE_SUBTITLE_STATE: bool = Field(
+            default=True,
+            description="After matching a title in the cached catalogue, fetch the matched items' current subtitle state in one targeted request. Off = answer from the catalogue snapshot alone."
+        )
 
     class UserValves(BaseModel):
         """Per-user preferences (set in OpenWebUI Account → Tools)."""
@@ -117,11 +495,152 @@ class Tools:
 
     def __init__(self):
         self.valves = self.Valves()
+        self._catalogues: dict = {}  # (url, api_key, kind) -> TTLSnapshot of compact items
+        self._title_indexes: dict = {}  # kind -> (snapshot, version, {title key: [item]})
 
     def _get_headers(self) -> dict:
         """Get API headers."""
         return {"X-API-KEY": self.valves.BAZARR_API_KEY}
 
+    @staticmethod
+    def _compact(kind: str, item: dict) -> dict:
+        """Keep only what check_subtitles renders: id, title and the kind's subtitle-state fields."""
+        _, id_field, _, fields = CATALOGUES[kind]
+        record = {"id": item.get(id_field), "title": item.get("title", "")}
+        for field in fields:
+            value = item.get(field)
+            if isinstance(value, list):
+                value = [s.get("code2", "??") for s in value]
+            record[field] = value
+        return record
+
+    async def _fetch_catalogue(self, url: str, api_key: str, kind: str) -> list:
+        """
+        Page through /api/movies or /api/series with start/length.
+
+        The first page reports `total`; the remaining pages are requested
+        concurrently (at most CATALOGUE_CONCURRENCY at a time) using the page
+        size the server actually honoured. Items are compacted and
+        deduplicated by id. Raises on transport/HTTP error.
+        """
+        headers = {"X-API-KEY": api_key}
+        first = await http_get_json(f"{url}/api/{kind}", headers=headers, params={"start": 0, "length": CATALOGUE_PAGE_SIZE})
+        items = list(first.get("data", []))
+        step = len(items)
+        gate = asyncio.Semaphore(CATALOGUE_CONCURRENCY)
+
+        async def page(start: int) -> list:
+            async with gate:
+                body = await http_get_json(f"{url}/api/{kind}", headers=headers, params={"start": start, "length": step})
+            return body.get("data", [])
+
+        if step:
+            for rows in await asyncio.gather(*[page(start) for start in range(step, first.get("total", step), step)]):
+                items.extend(rows)
+        by_id = {}
+        for item in items:
+            record = self._compact(kind, item)
+            by_id.setdefault(record["id"], record)
+        return list(by_id.values())
+
+    async def _iter_wanted(self, kind: str, page_size: int):
+        """
+        Async-iterate /api/movies/wanted or /api/episodes/wanted, one start/length page at a time.
+
+        Stops after the last page (per `total`) or an empty page. Callers
+        that stop early never request the remaining pages.
+        """
+        start = 0
+        while True:
+            body = await http_get_json(
+                f"{self.valves.BAZARR_URL.rstrip('/')}/api/{kind}/wanted",
+                headers=self._get_headers(),
+                params={"start": start, "length": page_size},
+            )
+            rows = body.get("data", [])
+            for row in rows:
+                yield row
+            start += len(rows)
+            if not rows or start >= body.get("total", 0):
+                return
+
+    async def _collect_wanted(self, kind: str, langs: list) -> tuple:
+        """
+        Walk one wanted list until WANTED_SHOWN rows missing one of `langs` are found.
+
+        Returns (rows, more). Without a language filter every row counts, so
+        a single page of WANTED_SHOWN + 1 rows is enough. With one, pages of
+        WANTED_PAGE_SIZE are read until the budget is full, the list ends, or
+        WANTED_SCAN_LIMIT rows have been read. `more` means matching rows may
+        remain unread.
+        """
+        rows = []
+        scanned = 0
+        pages = self._iter_wanted(kind, WANTED_PAGE_SIZE if langs else WANTED_SHOWN + 1)
+        try:
+            async for row in pages:
+                codes = [s.get("code2", "").lower() for s in row.get("missing_subtitles") or []]
+                if not langs or any(c in langs for c in codes):
+                    if len(rows) >= WANTED_SHOWN:
+                        return rows, True
+                    rows.append(row)
+                scanned += 1
+                if scanned >= WANTED_SCAN_LIMIT:
+                    return rows, True
+            return rows, False
+        finally:
+            await pages.aclose()
+
+    async def _get_title_index(self, kind: str) -> tuple:
+        """
+        Return (items, {title key: [item]}) for one catalogue kind.
+
+        The catalogue is a TTLSnapshot per (url, api_key, kind), so only the
+        first call waits for the paged load; the index is rebuilt only when
+        the snapshot version moves. Raises if the first load fails.
+        """
+        url = self.valves.BAZARR_URL.rstrip("/")
+        api_key = self.valves.BAZARR_API_KEY
+        snap = self._catalogues.get((url, api_key, kind))
+        if snap is None:
+            snap = self._catalogues[(url, api_key, kind)] = TTLSnapshot(lambda: self._fetch_catalogue(url, api_key, kind))
+        items = await snap.get(self.valves.CATALOGUE_REFRESH_SECONDS)
+        cached = self._title_indexes.get(kind)
+        if cached and cached[0] is snap and cached[1] == snap.version:
+            return items, cached[2]
+        index = {}
+        for item in items:
+            index.setdefault(title_key(item["title"]), []).append(item)
+        self._title_indexes[kind] = (snap, snap.version, index)
+        return items, index
+
+    async def _lookup(self, kind: str, title: str) -> tuple:
+        """
+        Match `title` in one catalogue and return (items, note).
+
+        An exact normalised-title hit is a dict lookup; otherwise the top 5
+        fuzzy matches (>= 0.6). With LIVE_SUBTITLE_STATE the matched items'
+        current state is fetched in one id-filtered request; if that fails
+        the snapshot state is returned with a note instead.
+        """
+        items, index = await self._get_title_index(kind)
+        matches = index.get(title_key(title))
+        if not matches:
+            matches = [item for _, item, _ in fuzzy_match(title, [(i["title"], i) for i in items], threshold=0.6)[:5]]
+        if not matches or not self.valves.LIVE_SUBTITLE_STATE:
+            return matches, None
+        label, _, param, _ = CATALOGUES[kind]
+        try:
+            body = await http_get_json(
+                f"{self.valves.BAZARR_URL.rstrip('/')}/api/{kind}",
+                headers=self._get_headers(),
+                params={param: [item["id"] for item in matches]},
+            )
+        except Exception as e:
+            return matches, f"{label} subtitle state is from the cached catalogue — live refresh failed: {e}"
+        fresh = {r["id"]: r for r in (self._compact(kind, item) for item in body.get("data", []))}
+        return [fresh.get(item["id"], item) for item in matches], None
+
     async def check_subtitles(self, title: str, __event_emitter__=None) -> str:
         """
         Check subtitle status for a movie or TV show.
@@ -133,12 +652,12 @@ class Tools:
         await emit_status(__event_emitter__, f"Checking Bazarr for '{title}'…")
         results = []
         errors = []
+        notes = []
 
-        # Fan out movies + series queries in parallel
-        headers = self._get_headers()
+        # Movies + series lookups in parallel; each is an index hit once the catalogue is warm
         movies_resp, series_resp = await asyncio.gather(
-            http_get_json(f"{self.valves.BAZARR_URL}/api/movies", headers=headers),
-            http_get_json(f"{self.valves.BAZARR_URL}/api/series", headers=headers),
+            self._lookup("movies", title),
+            self._lookup("series", title),
             return_exceptions=True,
         )
 
@@ -146,18 +665,17 @@ class Tools:
         if isinstance(movies_resp, Exception):
             errors.append(f"Movies query failed: {movies_resp}")
         else:
-            movies = movies_resp.get("data", [])
-            candidates = [(m.get("title", ""), m) for m in movies]
-            for movie_title, movie, score in fuzzy_match(title, candidates, threshold=0.6)[:5]:
-                missing = movie.get("missing_subtitles", [])
-                existing = movie.get("subtitles", [])
+            movies, note = movies_resp
+            if note:
+                notes.append(note)
+            for movie in movies:
+                missing = movie.get("missing_subtitles") or []
+                existing = movie.get("subtitles") or []
                 result = f"🎬 **{movie.get('title')}**\n"
                 if existing:
-                    langs = [s.get("code2", "??") for s in existing]
-                    result += f"  ✓ Subtitles: {', '.join(langs)}\n"
+                    result += f"  ✓ Subtitles: {', '.join(existing)}\n"
                 if missing:
-                    langs = [s.get("code2", "??") for s in missing]
-                    result += f"  ✗ Missing: {', '.join(langs)}\n"
+                    result += f"  ✗ Missing: {', '.join(missing)}\n"
                 if not existing and not missing:
                     result += "  No subtitle data available\n"
                 results.append(result)
@@ -166,11 +684,12 @@ class Tools:
         if isinstance(series_resp, Exception):
             errors.append(f"Series query failed: {series_resp}")
         else:
-            series = series_resp.get("data", [])
-            candidates = [(s.get("title", ""), s) for s in series]
-            for show_title, show, score in fuzzy_match(title, candidates, threshold=0.6)[:5]:
-                episodes_missing = show.get("episodeMissingCount", 0)
-                episodes_total = show.get("episodeFileCount", 0)
+            series, note = series_resp
+            if note:
+                notes.append(note)
+            for show in series:
+                episodes_missing = show.get("episodeMissingCount") or 0
+                episodes_total = show.get("episodeFileCount") or 0
                 result = f"📺 **{show.get('title')}**\n"
                 if episodes_missing > 0:
                     result += f"  ⚠️ {episodes_missing} episodes missing subtitles\n"
@@ -187,6 +706,8 @@ class Tools:
             return f"No content found matching '{title}' in Bazarr. Try checking the spelling."
 
         output = "Subtitle status:\n\n" + "\n".join(results)
+        if notes:
+            output += f"\n\n⚠️ {'; '.join(notes)}"
         if errors:
             output += f"\n\n⚠️ Partial results — {'; '.join(errors)}"
         await emit_status(__event_emitter__, f"Found {len(results)} result(s)", done=True)
@@ -210,48 +731,44 @@ class Tools:
             pref_raw = user_valves.get("PREFERRED_LANGUAGES", "") if isinstance(user_valves, dict) else ""
         pref_langs = [c.strip().lower() for c in (pref_raw or "").split(",") if c.strip()]
 
-        def langs_match(missing_list):
-            if not pref_langs:
-                return True
-            codes = [s.get("code2", "").lower() for s in (missing_list or [])]
-            return any(c in pref_langs for c in codes)
-
         result = "Content missing subtitles:\n\n"
         if pref_langs:
             result = f"Content missing subtitles (filtered to {','.join(pref_langs)}):\n\n"
         count = 0
         errors = []
+        truncated = False
 
-        # Fan out movies-wanted + episodes-wanted queries in parallel
-        headers = self._get_headers()
+        # Walk movies-wanted + episodes-wanted concurrently; each stops paging once its list is full
         movies_resp, episodes_resp = await asyncio.gather(
-            http_get_json(f"{self.valves.BAZARR_URL}/api/movies/wanted", headers=headers, params={"length": 20}),
-            http_get_json(f"{self.valves.BAZARR_URL}/api/episodes/wanted", headers=headers, params={"length": 20}),
+            self._collect_wanted("movies", pref_langs),
+            self._collect_wanted("episodes", pref_langs),
             return_exceptions=True,
         )
 
         if isinstance(movies_resp, Exception):
             errors.append(f"Movies-wanted query failed: {movies_resp}")
         else:
-            movies = movies_resp.get("data", [])
-            filtered_movies = [m for m in movies if langs_match(m.get("missing_subtitles", []))]
-            if filtered_movies:
+            movies, more = movies_resp
+            truncated = truncated or more
+            if movies:
                 result += "**Movies:**\n"
-                for movie in filtered_movies[:10]:
+                for movie in movies:
                     title = movie.get("title", "Unknown")
                     missing = movie.get("missing_subtitles", [])
                     langs = [s.get("code2", "??") for s in missing]
                     result += f"  • {title} (missing: {', '.join(langs)})\n"
                     count += 1
+                if more:
+                    result += "  • …and more\n"
 
         if isinstance(episodes_resp, Exception):
             errors.append(f"Episodes-wanted query failed: {episodes_resp}")
         else:
-            episodes = episodes_resp.get("data", [])
-            filtered_eps = [e for e in episodes if langs_match(e.get("missing_subtitles", []))]
-            if filtered_eps:
+            episodes, more = episodes_resp
+            truncated = truncated or more
+            if episodes:
                 result += "\n**TV Episodes:**\n"
-                for ep in filtered_eps[:10]:
+                for ep in episodes:
                     show = ep.get("seriesTitle", "Unknown")
                     season = ep.get("season", 0)
                     episode = ep.get("episode", 0)
@@ -259,11 +776,20 @@ class Tools:
                     langs = [s.get("code2", "??") for s in missing]
                     result += f"  • {show} S{season:02d}E{episode:02d} (missing: {', '.join(langs)})\n"
                     count += 1
+                if more:
+                    result += "  • …and more\n"
 
         if errors and count == 0:
             return f"Bazarr error: {'; '.join(errors)}"
 
         if count == 0:
+            if truncated:
+                return (
+                    f"No wanted item among the first {WANTED_SCAN_LIMIT} per list is missing "
+                    f"{','.join(pref_langs)} subtitles; older wanted items were not checked."
+                )
+            if pref_langs:
+                return f"✓ No content is missing {','.join(pref_langs)} subtitles!"
             return "✓ No content is missing subtitles!"
 
         if errors:
@@ -9,10 +9,23 @@ licence: MIT
 """
 
 import asyncio
+import heapq
+import json
+from itertools import islice
 from typing import Optional
 from pydantic import BaseModel, Field
 
+try:
+    import websockets
+except ImportError:  # optional: only needed for PLEX_NOTIFICATIONS
+    websockets = None
+
 # === BEGIN inlined from midnight/_shared.py — DO NOT EDIT, regenerate via build_tools.py ===
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from difflib import SequenceMatcher
 
 import httpx
@@ -51,6 +64,31 @@ async def http_post_json(
         return response.json()
 
 
+def parse_instances(spec: str) -> list:
+    """
+    Parse extra service instances from a Valve string.
+
+    Entries are `label|url|api_key`, separated by `;` or newlines, e.g.
+    `4K|http://192.168.4.46:7879|abc123; Anime|http://192.168.4.46:7880|def456`.
+    Raises ValueError on a malformed entry so a misconfigured Valve surfaces
+    as a visible error instead of silently dropping an instance.
+
+    :param spec: Raw Valve value (may be empty)
+    :return: List of (label, url, api_key) tuples, url without trailing slash
+    """
+    instances = []
+    for entry in spec.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(f"malformed instance entry {entry!r} (expected 'label|url|api_key')")
+        label, url, api_key = parts
+        instances.append((label, url.rstrip("/"), api_key))
+    return instances
+
+
 def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     """
     Find fuzzy matches for a query in a list of candidates. Typo-tolerant.
@@ -74,6 +112,13 @@ def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     return sorted(matches, key=lambda x: x[2], reverse=True)
 
 
+def title_key(title: str) -> str:
+    """Normalise a title for index lookups: ASCII-folded, lowercase, alphanumerics only, no leading article."""
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower().strip()
+    folded = re.sub(r"^(the|a|an)\s+", "", folded)
+    return re.sub(r"[^a-z0-9]", "", folded)
+
+
 async def emit_status(emitter, description: str, done: bool = False) -> None:
     """
     Send an OpenWebUI status event if an emitter is wired.
@@ -90,9 +135,399 @@ async def emit_status(emitter, description: str, done: bool = False) -> None:
             "type": "status",
             "data": {"description": description, "done": done},
         })
+
+
+class TTLSnapshot:
+    """
+    Cached result of an async loader, reused until it is older than max_age.
+
+    The first get() awaits the loader. After that, a stale read returns the
+    cached value immediately and refreshes it in the background, so only the
+    very first call pays backend latency. Concurrent callers share a single
+    in-flight load. A failed load propagates to the callers waiting on it and
+    leaves any previous value in place (a failed background refresh is kept
+    on `.error` instead of being raised).
+
+    `version` increments on every successful load. Derived structures
+    (indexes, NumPy tables) record the version they were built from and
+    rebuild when it moves.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._task = None
+        self.value = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.error = None
+
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)."""
+        if not self.version:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def invalidate(self) -> None:
+        """Mark the value stale so the next get() starts a refresh."""
+        self.loaded_at = 0.0
+
+    async def get(self, max_age: float, force: bool = False):
+        """Return the cached value, loading or refreshing it as needed.
+
+        :param max_age: Seconds a value stays fresh before a background refresh
+        :param force: Wait for a fresh load even if a cached value exists
+        """
+        if self.version and not force:
+            if self.age() > max_age:
+                self._start()
+            return self.value
+        return await asyncio.shield(self._start())
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+            self._task.add_done_callback(self._reap)
+        return self._task
+
+    def _reap(self, task) -> None:
+        # Retrieve the exception so background failures don't log as
+        # "Task exception was never retrieved".
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self.value = value
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self.error = None
+            return value
+        finally:
+            self._task = None
+
+
+class TTLCache:
+    """
+    Small LRU map whose entries expire after a per-entry TTL.
+
+    For memoising query results: `get` returns `default` for missing or
+    expired keys, and `set` takes the TTL so negative results can be kept
+    for less time than positive ones. Once `max_entries` is reached the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyBatcher:
+    """
+    Coalesce concurrent single-key lookups into multi-key requests.
+
+    Callers await `get(key)`. Keys requested within `window` seconds of each
+    other are sent together as one `fetch_many(keys)` call, which returns
+    {key: value}; each caller receives its own value (None if the backend
+    didn't return it). A batch is sent early once it reaches `max_batch`
+    keys, and at most `concurrency` batches are in flight. Callers asking
+    for the same pending key share one slot. A failed batch raises in every
+    caller waiting on it.
+    """
+
+    def __init__(self, fetch_many, window: float = 0.02, max_batch: int = 100, concurrency: int = 4):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._max_batch = max_batch
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}
+        self._timer = None
+
+    async def get(self, key):
+        """Return the value for `key`, fetched as part of the next batch."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                results = await self._fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may all have gone; don't log "never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class ArrInstances:
+    """
+    Multi-instance plumbing shared by the Radarr and Sonarr tools.
+
+    A tool mixes this in and supplies the per-service differences:
+    `SERVICE` ("Radarr"), `VALVE_PREFIX` ("RADARR", for the *_URL /
+    *_API_KEY / *_EXTRA_INSTANCES Valves), `_fetch_library(url, api_key)`
+    for its library endpoint and `_size_on_disk(item)`. Its __init__ sets
+    `_libraries`, `_profiles` (dicts of per-instance TTLSnapshots) and
+    `_storage_table` (None); the Valves carry LIBRARY_CACHE_SECONDS.
+    """
+
+    SERVICE = ""
+    VALVE_PREFIX = ""
+
+    def _get_headers(self, api_key: str = None) -> dict:
+        """Get API headers."""
+        if api_key is None:
+            api_key = getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY")
+        return {"X-Api-Key": api_key}
+
+    def _instances(self) -> list:
+        """(label, url, api_key) for the primary URL (labelled "main") plus every *_EXTRA_INSTANCES entry."""
+        primary = (
+            "main",
+            getattr(self.valves, f"{self.VALVE_PREFIX}_URL").rstrip("/"),
+            getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY"),
+        )
+        return [primary] + parse_instances(getattr(self.valves, f"{self.VALVE_PREFIX}_EXTRA_INSTANCES"))
+
+    async def _fetch_quality_profiles(self, url: str, api_key: str) -> dict:
+        """Fetch one instance's quality profiles as {id: name}. Raises on transport/HTTP error."""
+        profiles = await http_get_json(f"{url}/api/v3/qualityprofile", headers=self._get_headers(api_key))
+        return {p.get("id"): p.get("name", "Unknown") for p in profiles}
+
+    def _snapshot(self, cache: dict, fetch, url: str, api_key: str) -> TTLSnapshot:
+        """Per-instance TTLSnapshot, created on first use (Valves may change at runtime)."""
+        snap = cache.get((url, api_key))
+        if snap is None:
+            snap = cache[(url, api_key)] = TTLSnapshot(lambda: fetch(url, api_key))
+        return snap
+
+    async def _get_libraries(self) -> tuple:
+        """
+        Fetch every instance's library snapshot concurrently.
+
+        Returns ([(label, snapshot, items)], errors). One unreachable instance
+        degrades to partial results; raises only when every instance failed.
+        """
+        instances = self._instances()
+        snaps = [self._snapshot(self._libraries, self._fetch_library, url, key) for _, url, key in instances]
+        responses = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in snaps],
+            return_exceptions=True,
+        )
+        libraries = []
+        errors = []
+        for (label, url, _), snap, resp in zip(instances, snaps, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                libraries.append((label, snap, resp))
+        if not libraries:
+            raise RuntimeError("; ".join(errors))
+        return libraries, errors
+
+    @staticmethod
+    def _instance_tag(item: dict) -> str:
+        """' [main, 4K]' when several instances are configured, else ''."""
+        labels = item.get("_instances")
+        return f" [{', '.join(labels)}]" if labels else ""
+
+    def _with_partial(self, result: str, errors: list) -> str:
+        """Append the partial-results caveat when some instances were unreachable."""
+        if errors:
+            result += f"\n\n⚠️ Partial results — {len(errors)} {self.SERVICE} instance(s) unreachable: {'; '.join(errors)}"
+        return result
+
+    async def _get_storage_table(self) -> tuple:
+        """
+        Columnar (NumPy) view of the library snapshots for storage analytics.
+
+        Returns (table, errors). Rows are per instance, not deduplicated — a
+        title held by both the HD and 4K instances occupies disk twice. The
+        table is rebuilt only when a snapshot version moves, so repeated
+        questions pay for the Python-side column extraction once and every
+        aggregate after that is a vectorised pass. Genres are multi-valued, so
+        they get their own exploded (row, genre_code) arrays.
+        """
+        import numpy as np  # only the tools that mix this in require numpy
+
+        libraries, errors = await self._get_libraries()
+        instances = {label: (url, key) for label, url, key in self._instances()}
+        profile_snaps = [
+            self._snapshot(self._profiles, self._fetch_quality_profiles, *instances[label])
+            for label, _, _ in libraries
+        ]
+        profile_maps = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in profile_snaps],
+            return_exceptions=True,
+        )
+        # Unreachable profile endpoint falls back to "Profile <id>" labels
+        profile_maps = [{} if isinstance(m, Exception) else m for m in profile_maps]
+
+        key = tuple((label, snap.version, psnap.version) for (label, snap, _), psnap in zip(libraries, profile_snaps))
+        if self._storage_table and self._storage_table["key"] == key:
+            return self._storage_table, errors
+
+        items = [item for _, _, library in libraries for item in library]
+        profiles = [pmap for (_, _, library), pmap in zip(libraries, profile_maps) for _ in library]
+        multi = len(instances) > 1
+        labels = [f" [{label}]" if multi else "" for label, _, library in libraries for _ in library]
+        n = len(items)
+        sizes = np.fromiter((self._size_on_disk(item) for item in items), dtype=np.float64, count=n)
+        years = np.fromiter((item.get("year") or 0 for item in items), dtype=np.int32, count=n)
+        profile_vocab = {}
+        profile_codes = np.fromiter(
+            (
+                profile_vocab.setdefault(
+                    pmap.get(item.get("qualityProfileId")) or f"Profile {item.get('qualityProfileId')}",
+                    len(profile_vocab),
+                )
+                for item, pmap in zip(items, profiles)
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        genre_vocab = {}
+        genre_rows = []
+        genre_codes = []
+        for i, item in enumerate(items):
+            for genre in item.get("genres") or ["Unknown"]:
+                genre_rows.append(i)
+                genre_codes.append(genre_vocab.setdefault(genre, len(genre_vocab)))
+        titles = [
+            (item.get("title", "Unknown"), item.get("year", "N/A"), label)
+            for item, label in zip(items, labels)
+        ]
+
+        self._storage_table = {
+            "key": key,
+            "sizes": sizes,
+            "years": years,
+            "profile_codes": profile_codes,
+            "profile_names": list(profile_vocab),
+            "genre_rows": np.asarray(genre_rows, dtype=np.int64),
+            "genre_codes": np.asarray(genre_codes, dtype=np.int32),
+            "genre_names": list(genre_vocab),
+            "titles": titles,
+        }
+        return self._storage_table, errors
 # === END inlined from midnight/_shared.py ===
 
 
+# Fields kept per item in the library snapshot — everything the tools render.
+# Media/Part/Stream arrays and artwork URLs are dropped.
+SNAPSHOT_FIELDS = (
+    "ratingKey", "type", "title", "year", "rating", "summary", "guid",
+    "addedAt", "updatedAt", "duration", "originallyAvailableAt",
+    "grandparentTitle", "grandparentRatingKey", "parentIndex", "index",
+)
+SNAPSHOT_PAGE_SIZE = 500
+# Person tags captured per item, keyed by the Plex element name
+CREDIT_TAGS = {"Role": "actor", "Director": "director", "Writer": "writer", "Producer": "producer"}
+# What each call site asks Plex to leave out of its responses. By default
+# every item carries its Media/Part/Stream tree, artwork paths and tag arrays,
+# none of which the tools render. Plex ignores exclusions it doesn't know.
+HEAVY_ELEMENTS = "Media,Genre,Country,Collection,Label,Guid,Image,UltraBlurColors,Field,Mood,Similar,Location,Rating"
+CREDIT_ELEMENTS = "Role,Director,Writer,Producer"
+ARTWORK_FIELDS = (
+    "thumb,art,banner,theme,composite,grandparentThumb,grandparentArt,grandparentTheme,"
+    "parentThumb,parentArt,parentTheme,tagline,studio,contentRating,audienceRating,audienceRatingImage,"
+    "ratingImage,chapterSource,primaryExtraKey,skipCount,lastViewedAt,viewCount"
+)
+REQUEST_PROFILES = {
+    # Titles, years, ratings and people hubs' tag/key/count
+    "hubs": {"excludeElements": f"{HEAVY_ELEMENTS},{CREDIT_ELEMENTS}", "excludeFields": f"{ARTWORK_FIELDS},summary"},
+    # A person's titles: title, year, rating, type
+    "filmography": {"excludeElements": f"{HEAVY_ELEMENTS},{CREDIT_ELEMENTS}", "excludeFields": f"{ARTWORK_FIELDS},summary"},
+    # Titles, numbering and addedAt
+    "recently_added": {"excludeElements": f"{HEAVY_ELEMENTS},{CREDIT_ELEMENTS}", "excludeFields": f"{ARTWORK_FIELDS},summary"},
+    # Titles, numbering, viewOffset and duration; only ten items are shown
+    "on_deck": {
+        "excludeElements": f"{HEAVY_ELEMENTS},{CREDIT_ELEMENTS}",
+        "excludeFields": f"{ARTWORK_FIELDS},summary",
+        "X-Plex-Container-Start": 0,
+        "X-Plex-Container-Size": 10,
+    },
+    # Episode details render the summary
+    "episode_search": {"excludeElements": f"{HEAVY_ELEMENTS},{CREDIT_ELEMENTS}", "excludeFields": ARTWORK_FIELDS},
+    # Snapshot listings and full metadata keep summaries and credits
+    "section_all": {"excludeElements": HEAVY_ELEMENTS, "excludeFields": ARTWORK_FIELDS},
+    "metadata": {"excludeElements": HEAVY_ELEMENTS, "excludeFields": ARTWORK_FIELDS},
+}
+
+# Timeline notification item types -> snapshot type codes they invalidate
+# (a new episode or season also moves its show's updatedAt)
+NOTIFICATION_TYPES = {1: (1,), 2: (2,), 3: (2, 4), 4: (2, 4)}
+NOTIFICATION_MAX_BACKOFF = 60.0
+
+# /hubs/search results are reused for a few minutes; searches that found
+# nothing (typos the model retries) for one
+HUB_CACHE_SECONDS = 300
+HUB_NEGATIVE_CACHE_SECONDS = 60
+
+# Person tag kinds the filmography engine understands, with the phrase used
+# in answers ("Content featuring …")
+PERSON_PHRASES = {"actor": "featuring", "director": "directed by", "writer": "written by", "producer": "produced by"}
+# Live (non-index) person lookups: resolved person keys and each person's
+# per-section titles are memoised this long
+PERSON_CACHE_SECONDS = 600
+# A show's full episode list (/allLeaves), fetched for episode lookups that
+# name the show
+SHOW_EPISODES_CACHE_SECONDS = 600
+SHOW_EPISODES_CACHE_SIZE = 64
+
+# Most keys per /library/metadata/{k1,k2,...} request, and how long a lookup
+# waits for others to share its request
+METADATA_BATCH_SIZE = 100
+METADATA_BATCH_WINDOW = 0.02
+# Plex metadata type codes: what each section type is snapshotted as
+SNAPSHOT_TYPES = {"movie": (1,), "show": (2, 4)}
+
 
 class Tools:
     """Plex Media Server tools for Midnight."""
@@ -107,6 +542,22 @@ class Tools:
             default="",
             description="Plex authentication token"
         )
+        LIBRARY_REFRESH_SECONDS: int = Field(
+            default=300,
+            description="How often the in-memory library snapshot asks Plex for items updated since the last refresh"
+        )
+        PLEX_NOTIFICATIONS: bool = Field(
+            default=False,
+            description="Listen to Plex's notification WebSocket and refresh cached library data as soon as items change (requires the 'websockets' package)"
+        )
+        PLEX_EXTRA_SERVERS: str = Field(
+            default="",
+            description="Additional Plex servers (e.g. a shared one) as 'label|url|token', separated by ';'. Searches, person lookups and recently added query them alongside PLEX_URL, which is labelled 'main'."
+        )
+        PLEX_SERVER_TIMEOUT: float = Field(
+            default=8.0,
+            description="Seconds to wait for each extra Plex server before answering without it"
+        )
 
     class UserValves(BaseModel):
         """Per-user preferences (set in OpenWebUI Account → Tools)."""
@@ -117,7 +568,19 @@ class Tools:
 
     def __init__(self):
         self.valves = self.Valves()
-        self._section_cache = {}
+        self._sections = TTLSnapshot(self._fetch_sections)
+        self._library: dict = {}  # (section_key, type_code) -> TTLSnapshot of {"items", "watermark"}
+        self._person_index = None  # (snapshot versions, {kind: {name: [items]}})
+        self._hub_cache = TTLCache(max_entries=512)  # (query, limit) -> (watermark, hubs)
+        self._person_keys = TTLCache(max_entries=256)  # (kind, query) -> (watermark, [person section entries])
+        self._person_items = TTLCache(max_entries=512)  # person section key -> (watermark, [items])
+        self._show_episodes = TTLCache(max_entries=SHOW_EPISODES_CACHE_SIZE)  # show ratingKey -> (watermark, [episodes])
+        self._remotes = None  # (PLEX_EXTRA_SERVERS spec, [(label, Tools)])
+        self._listener = None  # background notification WebSocket task
+        self._listener_backoff = 1.0  # first reconnect delay, doubled up to NOTIFICATION_MAX_BACKOFF
+        self._metadata = KeyBatcher(
+            self._fetch_metadata_batch, window=METADATA_BATCH_WINDOW, max_batch=METADATA_BATCH_SIZE
+        )
 
     def _get_headers(self) -> dict:
         """Get API headers."""
@@ -126,28 +589,728 @@ class Tools:
             "Accept": "application/json"
         }
 
-    async def _get_section_id(self, section_type: str) -> Optional[str]:
-        """Get the Plex library section ID for a given type (movie/show)."""
-        if section_type in self._section_cache:
-            return self._section_cache[section_type]
+    def _remote_servers(self) -> list:
+        """
+        [(label, Tools)] for every PLEX_EXTRA_SERVERS entry.
+
+        Each extra server is served by its own Tools instance, so it keeps its
+        own snapshot, person index and caches. Rebuilt when the Valve changes.
+        Raises ValueError on a malformed entry.
+        """
+        spec = self.valves.PLEX_EXTRA_SERVERS
+        if self._remotes is None or self._remotes[0] != spec:
+            servers = []
+            for label, url, token in parse_instances(spec):
+                tools = type(self)()
+                tools.valves = self.Valves(
+                    PLEX_URL=url, PLEX_TOKEN=token, LIBRARY_REFRESH_SECONDS=self.valves.LIBRARY_REFRESH_SECONDS
+                )
+                servers.append((label, tools))
+            self._remotes = (spec, servers)
+        return self._remotes[1]
 
+    async def _across_servers(self, fetch) -> tuple:
+        """
+        Run `fetch(tools)` on this server and every extra server concurrently.
+
+        Returns ([(label, result)], errors), this server ("main") first. Each
+        extra server gets PLEX_SERVER_TIMEOUT seconds; one that is slow or
+        down is left out with an error instead of holding up the others.
+        Without extra servers this is just `fetch(self)` and its exceptions
+        propagate unchanged. Raises RuntimeError when no server answered.
+        """
+        remotes = self._remote_servers()
+        if not remotes:
+            return [("main", await fetch(self))], []
+        timeout = self.valves.PLEX_SERVER_TIMEOUT
+        responses = await asyncio.gather(
+            fetch(self),
+            *[asyncio.wait_for(fetch(tools), timeout) for _, tools in remotes],
+            return_exceptions=True,
+        )
+        results = []
+        errors = []
+        for label, resp in zip(["main"] + [label for label, _ in remotes], responses):
+            if isinstance(resp, asyncio.TimeoutError):
+                errors.append(f"{label} server: no answer within {timeout:g}s")
+            elif isinstance(resp, Exception):
+                errors.append(f"{label} server: {resp}")
+            else:
+                results.append((label, resp))
+        if not results:
+            raise RuntimeError(f"no Plex server answered: {'; '.join(errors)}")
+        return results, errors
+
+    @staticmethod
+    def _merge_servers(lists: list) -> list:
+        """
+        Merge per-server item lists [(label, items)], deduplicated by GUID.
+
+        The first copy of an item is kept, in order, and tagged with
+        `_servers` (labels of every server holding it).
+        """
+        merged = {}
+        for label, items in lists:
+            for item in items:
+                key = item.get("guid") or (item.get("type"), item.get("title"), item.get("year"))
+                if key not in merged:
+                    merged[key] = dict(item, _servers=[label])
+                elif label not in merged[key]["_servers"]:
+                    merged[key]["_servers"].append(label)
+        return list(merged.values())
+
+    @staticmethod
+    def _server_note(item: dict) -> str:
+        """' [main, Mom]' for a merged item, '' on a single server."""
+        servers = item.get("_servers")
+        return f" [{', '.join(servers)}]" if servers else ""
+
+    async def _query_sections(self, section_type: str, path: str, params: dict) -> tuple:
+        """
+        GET `path` from every library section of `section_type` concurrently.
+
+        `path` contains `{key}`, filled with each section's key. Returns
+        ([(section, items)], errors); one failing section degrades to partial
+        results. Raises RuntimeError when there is no such section or every
+        section failed.
+        """
         try:
+            sections = await self._sections.get(self.valves.LIBRARY_REFRESH_SECONDS)
+        except Exception as e:
+            raise RuntimeError(f"could not list Plex library sections: {e}")
+        targets = [s for s in sections if s["type"] == section_type]
+        if not targets:
+            raise RuntimeError(f"no Plex {section_type} library section found")
+        responses = await asyncio.gather(
+            *[
+                http_get_json(f"{self.valves.PLEX_URL}{path.format(key=s['key'])}", headers=self._get_headers(), params=params)
+                for s in targets
+            ],
+            return_exceptions=True,
+        )
+        results = []
+        errors = []
+        for section, resp in zip(targets, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{section['title']}: {resp}")
+            else:
+                results.append((section, resp.get("MediaContainer", {}).get("Metadata", [])))
+        if not results:
+            raise RuntimeError("; ".join(errors))
+        return results, errors
+
+    async def _fetch_sections(self) -> list:
+        """Movie and show library sections as [{"key", "type", "title"}]. Raises on error."""
+        data = await http_get_json(f"{self.valves.PLEX_URL}/library/sections", headers=self._get_headers())
+        return [
+            {"key": d.get("key"), "type": d.get("type"), "title": d.get("title", "Unknown")}
+            for d in data.get("MediaContainer", {}).get("Directory", [])
+            if d.get("type") in SNAPSHOT_TYPES and d.get("key")
+        ]
+
+    async def _page_section(self, section: dict, type_code: int, params: dict) -> dict:
+        """
+        Page through /library/sections/{id}/all for one metadata type.
+
+        Returns {ratingKey: compact item}, keeping only SNAPSHOT_FIELDS plus
+        the section title. Raises on transport/HTTP error.
+        """
+        items = {}
+        start = 0
+        while True:
             data = await http_get_json(
-                f"{self.valves.PLEX_URL}/library/sections",
+                f"{self.valves.PLEX_URL}/library/sections/{section['key']}/all",
                 headers=self._get_headers(),
+                params={
+                    **REQUEST_PROFILES["section_all"],
+                    **params,
+                    "type": type_code,
+                    "X-Plex-Container-Start": start,
+                    "X-Plex-Container-Size": SNAPSHOT_PAGE_SIZE,
+                },
+            )
+            container = data.get("MediaContainer", {})
+            page = container.get("Metadata", [])
+            for item in page:
+                compact = {field: item[field] for field in SNAPSHOT_FIELDS if field in item}
+                compact["librarySectionTitle"] = section["title"]
+                compact["credits"] = self._credits(item)
+                items[str(item.get("ratingKey"))] = compact
+            start += len(page)
+            if not page or start >= container.get("totalSize", 0):
+                return items
+
+    @staticmethod
+    def _credits(item: dict) -> dict:
+        """{"actor": (names…), "director": (…), …} from an item's person tags."""
+        return {
+            kind: tuple(tag.get("tag", "") for tag in item[element])
+            for element, kind in CREDIT_TAGS.items()
+            if item.get(element)
+        }
+
+    async def _fetch_metadata_batch(self, rating_keys: list) -> dict:
+        """Full metadata for several items in one request, as {ratingKey: metadata}."""
+        data = await http_get_json(
+            f"{self.valves.PLEX_URL}/library/metadata/{','.join(rating_keys)}",
+            headers=self._get_headers(),
+            params=REQUEST_PROFILES["metadata"],
+        )
+        return {str(meta.get("ratingKey")): meta for meta in data.get("MediaContainer", {}).get("Metadata", [])}
+
+    async def _fetch_credits(self, items: dict) -> None:
+        """
+        Replace listing credits with full credits from the metadata batcher.
+
+        Listings carry only the top-billed few credits. Mutates `items`
+        ({ratingKey: compact item}); an item whose batch fails keeps the
+        listing's credits rather than failing the load.
+        """
+        keys = list(items)
+        responses = await asyncio.gather(*[self._metadata.get(key) for key in keys], return_exceptions=True)
+        for key, meta in zip(keys, responses):
+            if isinstance(meta, dict):
+                items[key]["credits"] = self._credits(meta)
+
+    @staticmethod
+    def _carry_credits(items: dict, previous: dict) -> dict:
+        """
+        Copy full credits from `previous` onto items whose updatedAt hasn't moved.
+
+        Mutates `items` ({ratingKey: compact item}) and returns the subset
+        that still needs _fetch_credits: new keys and items Plex has updated.
+        """
+        stale = {}
+        for key, item in items.items():
+            old = previous.get(key)
+            if old is not None and old.get("updatedAt") == item.get("updatedAt") and "credits" in old:
+                item["credits"] = old["credits"]
+            else:
+                stale[key] = item
+        return stale
+
+    async def _load_section(self, section: dict, type_code: int, snap: TTLSnapshot) -> dict:
+        """
+        Load or refresh one section's snapshot.
+
+        The first load pages through the whole section. Later refreshes ask
+        only for items updated at or after the watermark (the newest
+        updatedAt seen) and merge them in by ratingKey. The filter is
+        inclusive (`updatedAt>=`) because updatedAt has one-second
+        resolution: an item stamped in the same second as the watermark but
+        after the last refresh would otherwise never be picked up. Items
+        re-sent from that second replace themselves in the merge, and keep
+        their credits. Deletions don't show up in that query,
+        so a size-0 request checks the section's item count; a mismatch falls
+        back to a full reload. Either way, full credits are fetched only for
+        new or updated items; the rest keep the credits already loaded.
+        """
+        previous = snap.value
+        if previous is not None:
+            changed = await self._page_section(section, type_code, {"updatedAt>=": previous["watermark"]})
+            count = await http_get_json(
+                f"{self.valves.PLEX_URL}/library/sections/{section['key']}/all",
+                headers=self._get_headers(),
+                params={"type": type_code, "X-Plex-Container-Start": 0, "X-Plex-Container-Size": 0},
+            )
+            items = {**previous["items"], **changed}
+            if len(items) == count.get("MediaContainer", {}).get("totalSize", -1):
+                if type_code != 4:
+                    await self._fetch_credits(self._carry_credits(changed, previous["items"]))
+                watermark = max([previous["watermark"]] + [i.get("updatedAt", 0) for i in changed.values()])
+                return {"items": items, "watermark": watermark}
+        items = await self._page_section(section, type_code, {})
+        if type_code != 4:
+            await self._fetch_credits(self._carry_credits(items, previous["items"] if previous else {}))
+        watermark = max((i.get("updatedAt", 0) for i in items.values()), default=0)
+        return {"items": items, "watermark": watermark}
+
+    def _apply_notification(self, message: dict) -> int:
+        """
+        Invalidate the snapshots a Plex notification says are out of date.
+
+        Timeline entries (item created, processed, deleted) mark their
+        section's snapshot for that item type; an ended library-update
+        activity marks every snapshot of its section. Invalidated snapshots
+        refresh incrementally on their next read, and the person index
+        follows their version. Returns the number of snapshots invalidated.
+        """
+        container = message.get("NotificationContainer", {})
+        stale = set()
+        for entry in container.get("TimelineEntry", []):
+            for type_code in NOTIFICATION_TYPES.get(entry.get("type"), ()):
+                stale.add((str(entry.get("sectionID")), type_code))
+        for note in container.get("ActivityNotification", []):
+            activity = note.get("Activity", {})
+            if note.get("event") == "ended" and activity.get("type", "").startswith("library.update"):
+                section_key = str(activity.get("Context", {}).get("librarySectionID"))
+                stale.update(key for key in self._library if key[0] == section_key)
+        if stale:
+            self._hub_cache.clear()
+            self._person_keys.clear()
+            self._person_items.clear()
+            self._show_episodes.clear()
+        invalidated = 0
+        for key in stale:
+            snap = self._library.get(key)
+            if snap is not None:
+                snap.invalidate()
+                invalidated += 1
+        return invalidated
+
+    async def _listen_notifications(self) -> None:
+        """
+        Follow /:/websockets/notifications until PLEX_NOTIFICATIONS is turned off.
+
+        Reconnects after any failure with exponential backoff (reset once a
+        connection succeeds). Changes made while disconnected were never
+        announced, so a reconnect invalidates every snapshot. Malformed
+        messages are skipped.
+        """
+        backoff = self._listener_backoff
+        connected_before = False
+        while self.valves.PLEX_NOTIFICATIONS:
+            url = self.valves.PLEX_URL.replace("http", "ws", 1).rstrip("/")
+            try:
+                async with websockets.connect(
+                    f"{url}/:/websockets/notifications?X-Plex-Token={self.valves.PLEX_TOKEN}"
+                ) as ws:
+                    backoff = self._listener_backoff
+                    if connected_before:
+                        for snap in self._library.values():
+                            snap.invalidate()
+                    connected_before = True
+                    async for raw in ws:
+                        try:
+                            self._apply_notification(json.loads(raw))
+                        except (ValueError, AttributeError, TypeError):
+                            continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, NOTIFICATION_MAX_BACKOFF)
+
+    def _ensure_listener(self) -> None:
+        """Start the notification listener if enabled, installed, and not running."""
+        if not self.valves.PLEX_NOTIFICATIONS or websockets is None:
+            return
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen_notifications())
+
+    def _section_snapshot(self, section: dict, type_code: int) -> TTLSnapshot:
+        """Per-section, per-type snapshot, created on first use."""
+        key = (section["key"], type_code)
+        snap = self._library.get(key)
+        if snap is None:
+            snap = self._library[key] = TTLSnapshot(lambda: self._load_section(section, type_code, snap))
+        return snap
+
+    async def _get_library(self, section_type: str, type_code: int, wait: float = 5.0) -> tuple:
+        """
+        Snapshot items of one metadata type across every section of `section_type`.
+
+        Returns (items, errors). `items` is None when the snapshot can't answer
+        yet — the first load is still running after `wait` seconds (it carries
+        on in the background) or every section failed — and callers then fall
+        back to a live Plex query. A failed section among several degrades to
+        partial results.
+        """
+        self._ensure_listener()
+        ttl = self.valves.LIBRARY_REFRESH_SECONDS
+        try:
+            sections = await self._sections.get(ttl)
+        except Exception as e:
+            return None, [str(e)]
+        targets = [s for s in sections if s["type"] == section_type]
+        if not targets:
+            return None, []
+        tasks = [asyncio.ensure_future(self._section_snapshot(s, type_code).get(ttl)) for s in targets]
+        await asyncio.wait(tasks, timeout=wait)
+        if not all(task.done() for task in tasks):
+            for task in tasks:
+                task.cancel()  # the shielded loads keep running
+            return None, []
+
+        items = []
+        errors = []
+        for section, task in zip(targets, tasks):
+            if task.exception() is not None:
+                errors.append(f"{section['title']}: {task.exception()}")
+            else:
+                items.extend(task.result()["items"].values())
+        if len(errors) == len(targets):
+            return None, errors
+        return items, errors
+
+    @staticmethod
+    def _match_titles(query: str, items: list, threshold: float) -> list:
+        """
+        Fuzzy-match `query` against item titles, best first.
+
+        Unlike a bare fuzzy_match over the whole library, a short title that
+        merely occurs inside the query ("Up" in "pursuit of happyness") is not
+        a hit.
+        """
+        query_lower = query.lower()
+        matches = fuzzy_match(query, [(item.get("title", ""), item) for item in items], threshold=threshold)
+        return [item for name, item, score in matches if score < 1.0 or query_lower in name.lower()]
+
+    def _library_watermark(self) -> int:
+        """Newest updatedAt across the loaded snapshots (0 before the first load)."""
+        return max((snap.value["watermark"] for snap in self._library.values() if snap.value), default=0)
+
+    async def _hub_search(self, query: str, limit: int) -> list:
+        """
+        /hubs/search hubs for `query`, cached per normalized query and limit.
+
+        Hits are reused for HUB_CACHE_SECONDS and empty results (every hub
+        without items) for HUB_NEGATIVE_CACHE_SECONDS. An entry is dropped as
+        soon as the library watermark moves past the one it was stored under.
+        Errors are not cached. Raises on transport/HTTP error.
+        """
+        key = (" ".join(query.lower().replace("’", "'").split()), limit)
+        watermark = self._library_watermark()
+        cached = self._hub_cache.get(key)
+        if cached is not None and cached[0] == watermark:
+            return cached[1]
+
+        data = await http_get_json(
+            f"{self.valves.PLEX_URL}/hubs/search",
+            headers=self._get_headers(),
+            params={**REQUEST_PROFILES["hubs"], "query": query, "limit": limit},
+        )
+        hubs = data.get("MediaContainer", {}).get("Hub", [])
+        found = any(hub.get("Metadata") or hub.get("Directory") for hub in hubs)
+        self._hub_cache.set(key, (watermark, hubs), HUB_CACHE_SECONDS if found else HUB_NEGATIVE_CACHE_SECONDS)
+        return hubs
+
+    async def _search_snapshot(self, query: str) -> tuple:
+        """
+        Title search over the movie and show snapshots, shaped like /hubs/search hubs.
+
+        Returns (hubs, errors); hubs is empty when nothing matched or the
+        snapshot can't answer yet.
+        """
+        (movies, movie_errors), (shows, show_errors) = await asyncio.gather(
+            self._get_library("movie", 1), self._get_library("show", 2)
+        )
+        hubs = []
+        for hub_type, items in (("movie", movies), ("show", shows)):
+            matches = self._match_titles(query, items or [], threshold=0.8)
+            if matches:
+                hubs.append({"type": hub_type, "Metadata": matches})
+        return hubs, movie_errors + show_errors
+
+    async def _search_hubs(self, query: str) -> tuple:
+        """
+        search_plex hubs for `query` on this server, as (hubs, errors).
+
+        Titles answer from the library snapshot; people and misses go to
+        /hubs/search. Raises on transport/HTTP error.
+        """
+        hubs, errors = await self._search_snapshot(query)
+        if hubs:
+            return hubs, errors
+        return await self._hub_search(query, 50), []
+
+    def _merge_hubs(self, results: list) -> list:
+        """Merge per-server hubs [(label, hubs)] into one hub per type, deduplicated by GUID."""
+        by_type = {}
+        for label, hubs in results:
+            for hub in hubs:
+                by_type.setdefault(hub.get("type"), []).append((label, hub.get("Metadata", [])))
+        return [{"type": hub_type, "Metadata": self._merge_servers(lists)} for hub_type, lists in by_type.items()]
+
+    async def _recent_items(self, media_type: str, limit: int) -> tuple:
+        """
+        Newest `limit` items of `media_type` on this server, as (items, errors).
+
+        Episodes (type=4) and movies come from every section of that type at
+        once; the generic /library/recentlyAdded only returns seasons, not
+        individual episodes. Each section's list is newest-first, so a k-way
+        heap merge on addedAt yields the overall newest. Raises RuntimeError
+        when no section answered, and on transport/HTTP error.
+        """
+        if media_type in ("episodes", "movies"):
+            section_type, params = {
+                "episodes": ("show", {**REQUEST_PROFILES["recently_added"], "type": 4, "X-Plex-Container-Size": limit}),
+                "movies": ("movie", {**REQUEST_PROFILES["recently_added"], "X-Plex-Container-Size": limit}),
+            }[media_type]
+            results, errors = await self._query_sections(section_type, "/library/sections/{key}/recentlyAdded", params)
+            merged = heapq.merge(
+                *[section_items for _, section_items in results],
+                key=lambda item: item.get("addedAt", 0),
+                reverse=True,
+            )
+            return list(islice(merged, limit)), errors
+
+        # For shows/tv/series or "all", use the generic endpoint
+        fetch_limit = limit * 2 if media_type in ("shows", "tv", "series") else limit
+        data = await http_get_json(
+            f"{self.valves.PLEX_URL}/library/recentlyAdded",
+            headers=self._get_headers(),
+            params={**REQUEST_PROFILES["recently_added"], "X-Plex-Container-Start": 0, "X-Plex-Container-Size": fetch_limit},
+        )
+        items = data.get("MediaContainer", {}).get("Metadata", [])
+        # Filter for TV content if requested
+        if media_type in ("shows", "tv", "series"):
+            items = [i for i in items if i.get("type") in ("episode", "season", "show")]
+        return items[:limit], []
+
+    async def _get_person_index(self) -> tuple:
+        """
+        Inverted person index over the movie and show snapshots.
+
+        Returns (index, errors) with index {kind: {name: [items]}} for kind in
+        actor/director/writer/producer, or (None, errors) when the snapshot
+        can't answer yet. Rebuilt only when a snapshot version moves.
+        """
+        (movies, movie_errors), (shows, show_errors) = await asyncio.gather(
+            self._get_library("movie", 1), self._get_library("show", 2)
+        )
+        errors = movie_errors + show_errors
+        if movies is None and shows is None:
+            return None, errors
+        key = tuple(sorted((k, snap.version) for k, snap in self._library.items() if k[1] != 4))
+        if self._person_index and self._person_index[0] == key:
+            return self._person_index[1], errors
+
+        index = {kind: {} for kind in CREDIT_TAGS.values()}
+        for item in (movies or []) + (shows or []):
+            for kind, names in item.get("credits", {}).items():
+                for name in set(names):
+                    index[kind].setdefault(name, []).append(item)
+        self._person_index = (key, index)
+        return index, errors
+
+    @staticmethod
+    def _match_person(query: str, people: dict) -> Optional[str]:
+        """Best-matching name in a person index: exact (case-insensitive), else fuzzy."""
+        query_lower = query.lower().strip()
+        for name in people:
+            if name.lower() == query_lower:
+                return name
+        # Typos rarely hit the first letter of a word, and only names of
+        # similar length can clear the threshold — skip the rest cheaply
+        slack = max(3, len(query_lower) // 3)
+        initials = {word[0] for word in query_lower.split()}
+        candidates = [
+            (name, name) for name in people
+            if abs(len(name) - len(query_lower)) <= slack
+            and not initials.isdisjoint(word[0] for word in name.lower().split())
+        ]
+        matches = fuzzy_match(query, candidates, threshold=0.65)
+        return matches[0][0] if matches else None
+
+    async def _credits_from_index(self, kind: str, query: str) -> Optional[tuple]:
+        """
+        A person's titles from the person index, with exact counts.
+
+        Returns (name, movies, shows, errors), or None when the index can't
+        answer (not loaded yet, or no such person — they may have been added
+        since the last refresh) so the caller falls back to a live Plex search.
+        """
+        index, errors = await self._get_person_index()
+        if index is None:
+            return None
+        name = self._match_person(query, index[kind])
+        if name is None:
+            return None
+        # A title in several sections (HD and 4K copies) counts once
+        unique = {}
+        for item in index[kind][name]:
+            unique.setdefault(item.get("guid") or item.get("ratingKey"), item)
+        movies = [i for i in unique.values() if i.get("type") == "movie"]
+        shows = [i for i in unique.values() if i.get("type") == "show"]
+        return name, movies, shows, errors
+
+    async def _resolve_person(self, kind: str, query: str) -> list:
+        """
+        Live lookup of a person's per-section filter keys, memoised.
+
+        Actors and directors come from /hubs/search; Plex has no writer or
+        producer hubs, so those are looked up in each section's tag listing
+        (/library/sections/{id}/writer). Only sections of the best-matching
+        name are kept. Returns [{"key", "name", "section"}]. Raises on
+        transport/HTTP error.
+        """
+        cache_key = (kind, " ".join(query.lower().split()))
+        watermark = self._library_watermark()
+        cached = self._person_keys.get(cache_key)
+        if cached is not None and cached[0] == watermark:
+            return cached[1]
+
+        candidates = []
+        if kind in ("actor", "director"):
+            for hub in await self._hub_search(query, 10):
+                # People are returned in "Directory", not "Metadata"
+                if hub.get("type") == kind:
+                    candidates = [
+                        (item.get("tag", ""), {"key": item.get("key"), "section": item.get("librarySectionTitle", "Unknown")})
+                        for item in hub.get("Directory", [])
+                    ]
+                    break
+        else:
+            sections = await self._sections.get(self.valves.LIBRARY_REFRESH_SECONDS)
+            responses = await asyncio.gather(
+                *[
+                    http_get_json(f"{self.valves.PLEX_URL}/library/sections/{s['key']}/{kind}", headers=self._get_headers())
+                    for s in sections
+                ],
+                return_exceptions=True,
             )
-            sections = data.get("MediaContainer", {}).get("Directory", [])
-
-            for section in sections:
-                if section.get("type") == section_type:
-                    key = section.get("key")
-                    if key:
-                        self._section_cache[section_type] = key
-                        return key
-        except Exception:
+            for section, resp in zip(sections, responses):
+                if isinstance(resp, Exception):
+                    continue
+                for tag in resp.get("MediaContainer", {}).get("Directory", []):
+                    key = tag.get("fastKey") or f"/library/sections/{section['key']}/all?{kind}={tag.get('key')}"
+                    candidates.append((tag.get("title", ""), {"key": key, "section": section["title"]}))
+
+        matches = fuzzy_match(query, candidates, threshold=0.65)
+        best = matches[0][0] if matches else None
+        entries = [dict(info, name=name) for name, info, _ in matches if name == best]
+        self._person_keys.set(cache_key, (watermark, entries), PERSON_CACHE_SECONDS)
+        return entries
+
+    async def _person_section_items(self, key: str) -> list:
+        """Titles behind one person-section filter key, memoised. Raises on error."""
+        watermark = self._library_watermark()
+        cached = self._person_items.get(key)
+        if cached is not None and cached[0] == watermark:
+            return cached[1]
+        data = await http_get_json(
+            f"{self.valves.PLEX_URL}{key}", headers=self._get_headers(), params=REQUEST_PROFILES["filmography"]
+        )
+        items = data.get("MediaContainer", {}).get("Metadata", [])
+        self._person_items.set(key, (watermark, items), PERSON_CACHE_SECONDS)
+        return items
+
+    async def _episodes_for_show(self, show_name: str) -> tuple:
+        """
+        Every episode of the show best matching `show_name`, via its ratingKey.
+
+        The show is resolved against the show snapshot; its episodes come
+        from one /library/metadata/{key}/allLeaves request, memoised per show
+        and tied to the library watermark. Returns (show title, episodes,
+        errors), or (None, [], errors) when the snapshot isn't ready or has
+        no such show. Raises on transport/HTTP error.
+        """
+        shows, errors = await self._get_library("show", 2)
+        matches = self._match_titles(show_name, shows or [], threshold=0.6)
+        if not matches:
+            return None, [], errors
+        show = matches[0]
+        key = str(show.get("ratingKey"))
+        watermark = self._library_watermark()
+        cached = self._show_episodes.get(key)
+        if cached is not None and cached[0] == watermark:
+            return show.get("title", ""), cached[1], errors
+        data = await http_get_json(
+            f"{self.valves.PLEX_URL}/library/metadata/{key}/allLeaves",
+            headers=self._get_headers(),
+            params=REQUEST_PROFILES["episode_search"],
+        )
+        episodes = data.get("MediaContainer", {}).get("Metadata", [])
+        self._show_episodes.set(key, (watermark, episodes), SHOW_EPISODES_CACHE_SECONDS)
+        return show.get("title", ""), episodes, errors
+
+    @staticmethod
+    def _match_episode(episode_title: str, episodes: list) -> list:
+        """Episodes titled `episode_title`: exact, then containing it, then fuzzy."""
+        query_lower = episode_title.lower()
+        exact = [ep for ep in episodes if ep.get("title", "").lower() == query_lower]
+        if exact:
+            return exact
+        partial = [ep for ep in episodes if query_lower in ep.get("title", "").lower()]
+        if partial:
+            return partial
+        matches = fuzzy_match(episode_title, [(ep.get("title", ""), ep) for ep in episodes], threshold=0.7)
+        return [ep for _, ep, _ in matches]
+
+    async def _person_credits(self, kind: str, query: str) -> Optional[tuple]:
+        """
+        Everything in the library credited to a person in one role.
+
+        Answers from the person index when the snapshot is loaded; otherwise
+        resolves the person live and fetches each of their sections
+        concurrently, both memoised so follow-up questions cost nothing.
+        Returns (matched name, movies, shows, errors), or None when there is
+        no such person. Raises RuntimeError when every section failed.
+        """
+        cached = await self._credits_from_index(kind, query)
+        if cached is not None:
+            return cached
+
+        entries = await self._resolve_person(kind, query)
+        if not entries:
             return None
+        matched_name = entries[0]["name"]
 
-        return None
+        responses = await asyncio.gather(
+            *[self._person_section_items(entry["key"]) for entry in entries],
+            return_exceptions=True,
+        )
+        movies = []
+        shows = []
+        section_errors = []
+        for entry, resp in zip(entries, responses):
+            if isinstance(resp, Exception):
+                section_errors.append(f"{entry['section']}: {resp}")
+                continue
+            for item in resp:
+                if item.get("type") == "movie":
+                    movies.append(item)
+                elif item.get("type") == "show":
+                    shows.append(item)
+
+        if not movies and not shows and section_errors:
+            raise RuntimeError(f"Plex error fetching {kind} results: {'; '.join(section_errors)}")
+        return matched_name, movies, shows, section_errors
+
+    @classmethod
+    def _render_filmography(cls, phrase: str, matched_name: str, query: str, movies: list, shows: list, errors: list) -> str:
+        """Format a person's movies and shows (phrase: "featuring" / "directed by")."""
+        total = len(movies) + len(shows)
+        if total == 0:
+            return f"No content found {phrase} {matched_name}."
+
+        # Note if we corrected the name
+        correction_note = ""
+        if matched_name.lower() != query.lower():
+            correction_note = f" *(searched for '{query}')*"
+
+        result = f"Content {phrase} **{matched_name}**{correction_note} ({total} total):\n\n"
+
+        if movies:
+            result += f"**Movies ({len(movies)}):**\n"
+            for movie in sorted(movies, key=lambda x: x.get("year", 0), reverse=True)[:25]:
+                title = movie.get("title", "Unknown")
+                year = movie.get("year", "N/A")
+                rating = movie.get("rating", None)
+                rating_str = f"⭐ {rating:.1f}" if isinstance(rating, (int, float)) else ""
+                result += f"  • {title} ({year}) {rating_str}".rstrip() + f"{cls._server_note(movie)}\n"
+            if len(movies) > 25:
+                result += f"  ... and {len(movies) - 25} more movies\n"
+
+        if shows:
+            result += f"\n**TV Shows ({len(shows)}):**\n"
+            for show in shows[:10]:
+                title = show.get("title", "Unknown")
+                year = show.get("year", "N/A")
+                result += f"  • {title} ({year}){cls._server_note(show)}\n"
+            if len(shows) > 10:
+                result += f"  ... and {len(shows) - 10} more shows\n"
+
+        return result + cls._partial_note(errors)
+
+    @staticmethod
+    def _partial_note(errors: list) -> str:
+        """Partial-results caveat for unreachable sections ('' if none)."""
+        if not errors:
+            return ""
+        return f"\n⚠️ Partial results — {len(errors)} section(s) unreachable: {'; '.join(errors)}"
 
     async def search_plex(self, query: str, __event_emitter__=None) -> str:
         """
@@ -160,14 +1323,14 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Searching Plex for '{query}'…")
         try:
-            data = await http_get_json(
-                f"{self.valves.PLEX_URL}/hubs/search",
-                headers=self._get_headers(),
-                params={"query": query, "limit": 50},
-            )
+            results, errors = await self._across_servers(lambda tools: tools._search_hubs(query))
+            if not self._remote_servers():
+                hubs, section_errors = results[0][1]
+            else:
+                hubs = self._merge_hubs([(label, server_hubs) for label, (server_hubs, _) in results])
+                section_errors = [f"{label}: {e}" for label, (_, server_errors) in results for e in server_errors]
+            errors = section_errors + errors
 
-            hubs = data.get("MediaContainer", {}).get("Hub", [])
-            
             if not hubs:
                 return f"No results found for '{query}' in Plex."
 
@@ -186,7 +1349,7 @@ class Tools:
                         title = item.get("title", "Unknown")
                         year = item.get("year", "N/A")
                         rating = item.get("rating", "N/A")
-                        result += f"  • {title} ({year}) ⭐ {rating}\n"
+                        result += f"  • {title} ({year}) ⭐ {rating}{self._server_note(item)}\n"
                     if len(items) > 20:
                         result += f"  ... and {len(items) - 20} more\n"
                         
@@ -195,7 +1358,7 @@ class Tools:
                     for item in items[:15]:
                         title = item.get("title", "Unknown")
                         year = item.get("year", "N/A")
-                        result += f"  • {title} ({year})\n"
+                        result += f"  • {title} ({year}){self._server_note(item)}\n"
                         
                 elif hub_type == "actor" or hub_type == "director":
                     result += f"**{hub_type.title()}s:**\n"
@@ -203,7 +1366,7 @@ class Tools:
                         name = item.get("title", "Unknown")
                         result += f"  • {name}\n"
 
-            return result
+            return result + self._partial_note(errors)
 
         except Exception as e:
             return f"Error searching Plex: {str(e)}"
@@ -217,110 +1380,7 @@ class Tools:
         :param actor_name: Name of the actor to search for
         :return: All movies and shows featuring that actor
         """
-        await emit_status(__event_emitter__, f"Searching Plex for actor '{actor_name}'…")
-        try:
-            # Find the actor in Plex
-            data = await http_get_json(
-                f"{self.valves.PLEX_URL}/hubs/search",
-                headers=self._get_headers(),
-                params={"query": actor_name, "limit": 10},
-            )
-
-            # Find actor hub - actors are returned in "Directory" not "Metadata"
-            actor_keys = []
-            hubs = data.get("MediaContainer", {}).get("Hub", [])
-
-            for hub in hubs:
-                if hub.get("type") == "actor":
-                    items = hub.get("Directory", [])
-
-                    # Build candidates for fuzzy matching
-                    candidates = [(item.get("tag", ""), item) for item in items]
-                    matches = fuzzy_match(actor_name, candidates, threshold=0.65)
-
-                    for name, item, score in matches:
-                        actor_keys.append({
-                            "key": item.get("key"),
-                            "name": name,
-                            "section": item.get("librarySectionTitle", "Unknown"),
-                            "count": item.get("count", 0)
-                        })
-                    break
-
-            if not actor_keys:
-                return f"Actor '{actor_name}' not found in Plex library. Try checking the spelling."
-
-            # Use the best matching actor
-            best_match = actor_keys[0]
-            matched_name = best_match.get("name", actor_name)
-
-            all_movies = []
-            all_shows = []
-            section_errors = []
-
-            # Fan out per-section fetches concurrently
-            headers = self._get_headers()
-            section_responses = await asyncio.gather(
-                *[
-                    http_get_json(f"{self.valves.PLEX_URL}{info['key']}", headers=headers)
-                    for info in actor_keys
-                ],
-                return_exceptions=True,
-            )
-
-            for actor_info, resp in zip(actor_keys, section_responses):
-                if isinstance(resp, Exception):
-                    section_errors.append(f"{actor_info.get('section', 'Unknown')}: {resp}")
-                    continue
-                items = resp.get("MediaContainer", {}).get("Metadata", [])
-                for item in items:
-                    if item.get("type") == "movie":
-                        all_movies.append(item)
-                    elif item.get("type") == "show":
-                        all_shows.append(item)
-
-            total = len(all_movies) + len(all_shows)
-
-            if total == 0 and section_errors:
-                return f"Plex error fetching actor results: {'; '.join(section_errors)}"
-
-            if total == 0:
-                return f"No content found featuring {matched_name}."
-
-            # Note if we corrected the name
-            correction_note = ""
-            if matched_name.lower() != actor_name.lower():
-                correction_note = f" *(searched for '{actor_name}')*"
-
-            result = f"Content featuring **{matched_name}**{correction_note} ({total} total):\n\n"
-            
-            if all_movies:
-                result += f"**Movies ({len(all_movies)}):**\n"
-                for movie in sorted(all_movies, key=lambda x: x.get("year", 0), reverse=True)[:25]:
-                    title = movie.get("title", "Unknown")
-                    year = movie.get("year", "N/A")
-                    rating = movie.get("rating", None)
-                    rating_str = f"⭐ {rating:.1f}" if isinstance(rating, (int, float)) else ""
-                    result += f"  • {title} ({year}) {rating_str}\n"
-                if len(all_movies) > 25:
-                    result += f"  ... and {len(all_movies) - 25} more movies\n"
-                    
-            if all_shows:
-                result += f"\n**TV Shows ({len(all_shows)}):**\n"
-                for show in all_shows[:10]:
-                    title = show.get("title", "Unknown")
-                    year = show.get("year", "N/A")
-                    result += f"  • {title} ({year})\n"
-
-            if section_errors:
-                result += f"\n⚠️ Partial results — {len(section_errors)} section(s) unreachable: {'; '.join(section_errors)}"
-
-            return result
-
-        except Exception as e:
-            return f"Error searching for actor: {str(e)}"
-        finally:
-            await emit_status(__event_emitter__, "Done", done=True)
+        return await self.search_by_person(actor_name, "actor", __event_emitter__=__event_emitter__)
 
     async def search_by_director(self, director_name: str, __event_emitter__=None) -> str:
         """
@@ -330,108 +1390,39 @@ class Tools:
         :param director_name: Name of the director to search for
         :return: All movies and shows directed by that person
         """
-        await emit_status(__event_emitter__, f"Searching Plex for director '{director_name}'…")
-        try:
-            # Find the director in Plex
-            data = await http_get_json(
-                f"{self.valves.PLEX_URL}/hubs/search",
-                headers=self._get_headers(),
-                params={"query": director_name, "limit": 10},
-            )
-
-            # Find director hub
-            director_keys = []
-            hubs = data.get("MediaContainer", {}).get("Hub", [])
-
-            for hub in hubs:
-                if hub.get("type") == "director":
-                    items = hub.get("Directory", [])
-
-                    # Build candidates for fuzzy matching
-                    candidates = [(item.get("tag", ""), item) for item in items]
-                    matches = fuzzy_match(director_name, candidates, threshold=0.65)
-
-                    for name, item, score in matches:
-                        director_keys.append({
-                            "key": item.get("key"),
-                            "name": name,
-                            "section": item.get("librarySectionTitle", "Unknown"),
-                            "count": item.get("count", 0)
-                        })
-                    break
-
-            if not director_keys:
-                return f"Director '{director_name}' not found in Plex library. Try checking the spelling."
+        return await self.search_by_person(director_name, "director", __event_emitter__=__event_emitter__)
 
-            # Use the best matching director
-            best_match = director_keys[0]
-            matched_name = best_match.get("name", director_name)
-
-            all_movies = []
-            all_shows = []
-            section_errors = []
-
-            # Fan out per-section fetches concurrently
-            headers = self._get_headers()
-            section_responses = await asyncio.gather(
-                *[
-                    http_get_json(f"{self.valves.PLEX_URL}{info['key']}", headers=headers)
-                    for info in director_keys
-                ],
-                return_exceptions=True,
-            )
-
-            for director_info, resp in zip(director_keys, section_responses):
-                if isinstance(resp, Exception):
-                    section_errors.append(f"{director_info.get('section', 'Unknown')}: {resp}")
-                    continue
-                items = resp.get("MediaContainer", {}).get("Metadata", [])
-                for item in items:
-                    if item.get("type") == "movie":
-                        all_movies.append(item)
-                    elif item.get("type") == "show":
-                        all_shows.append(item)
-
-            total = len(all_movies) + len(all_shows)
-
-            if total == 0 and section_errors:
-                return f"Plex error fetching director results: {'; '.join(section_errors)}"
-
-            if total == 0:
-                return f"No content found directed by {matched_name}."
-
-            # Note if we corrected the name
-            correction_note = ""
-            if matched_name.lower() != director_name.lower():
-                correction_note = f" *(searched for '{director_name}')*"
-
-            result = f"Content directed by **{matched_name}**{correction_note} ({total} total):\n\n"
-            
-            if all_movies:
-                result += f"**Movies ({len(all_movies)}):**\n"
-                for movie in sorted(all_movies, key=lambda x: x.get("year", 0), reverse=True)[:25]:
-                    title = movie.get("title", "Unknown")
-                    year = movie.get("year", "N/A")
-                    rating = movie.get("rating", None)
-                    rating_str = f"⭐ {rating:.1f}" if isinstance(rating, (int, float)) else ""
-                    result += f"  • {title} ({year}) {rating_str}\n"
-                if len(all_movies) > 25:
-                    result += f"  ... and {len(all_movies) - 25} more movies\n"
-                    
-            if all_shows:
-                result += f"\n**TV Shows ({len(all_shows)}):**\n"
-                for show in all_shows[:10]:
-                    title = show.get("title", "Unknown")
-                    year = show.get("year", "N/A")
-                    result += f"  • {title} ({year})\n"
-
-            if section_errors:
-                result += f"\n⚠️ Partial results — {len(section_errors)} section(s) unreachable: {'; '.join(section_errors)}"
-
-            return result
+    async def search_by_person(self, name: str, role: str = "actor", __event_emitter__=None) -> str:
+        """
+        Search for movies and TV shows a person worked on in a given role.
+        Use this for writers and producers ("what did Aaron Sorkin write?");
+        search_by_actor / search_by_director cover the common cases.
 
+        :param name: Name of the person to search for
+        :param role: "actor", "director", "writer", or "producer" (default "actor")
+        :return: All movies and shows crediting that person in that role
+        """
+        kind = role.lower().strip()
+        if kind not in PERSON_PHRASES:
+            return f"Unsupported role '{role}'. Use 'actor', 'director', 'writer', or 'producer'."
+        await emit_status(__event_emitter__, f"Searching Plex for {kind} '{name}'…")
+        try:
+            results, errors = await self._across_servers(lambda tools: tools._person_credits(kind, name))
+            found = [(label, credits) for label, credits in results if credits is not None]
+            if not found:
+                return f"{kind.title()} '{name}' not found in Plex library. Try checking the spelling." + self._partial_note(errors)
+            matched_name, movies, shows, section_errors = found[0][1]
+            if self._remote_servers():
+                # Servers that matched someone else ("Tom Hardy" for "Tom Hanks") don't count
+                found = [(label, credits) for label, credits in found if credits[0].lower() == matched_name.lower()]
+                movies = self._merge_servers([(label, credits[1]) for label, credits in found])
+                shows = self._merge_servers([(label, credits[2]) for label, credits in found])
+                section_errors = [f"{label}: {e}" for label, credits in found for e in credits[3]]
+            return self._render_filmography(PERSON_PHRASES[kind], matched_name, name, movies, shows, section_errors + errors)
         except Exception as e:
-            return f"Error searching for director: {str(e)}"
+            return f"Error searching for {kind}: {str(e)}"
+        finally:
+            await emit_status(__event_emitter__, "Done", done=True)
 
     async def get_cast(self, title: str, limit: int = 10, __event_emitter__=None) -> str:
         """
@@ -444,19 +1435,20 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Looking up cast for '{title}'…")
         try:
-            # Search for the title in Plex
-            data = await http_get_json(
-                f"{self.valves.PLEX_URL}/hubs/search",
-                headers=self._get_headers(),
-                params={"query": title, "limit": 10},
-            )
-
-            hubs = data.get("MediaContainer", {}).get("Hub", [])
-            
-            # Find the best matching movie or show
+            # Resolve the title from the library snapshot; /hubs/search is the fallback
             best_match = None
             match_type = None
-            
+            (movies, _), (shows, _) = await asyncio.gather(
+                self._get_library("movie", 1), self._get_library("show", 2)
+            )
+            local = self._match_titles(title, (movies or []) + (shows or []), threshold=0.6)
+            if local:
+                best_match = local[0]
+                match_type = best_match.get("type")
+                hubs = []
+            else:
+                hubs = await self._hub_search(title, 10)
+
             for hub in hubs:
                 hub_type = hub.get("type", "")
                 items = hub.get("Metadata", [])
@@ -479,17 +1471,11 @@ class Tools:
             if not rating_key:
                 return f"Found '{best_match.get('title')}' but couldn't retrieve cast information."
             
-            # Fetch full metadata (gives us Role data)
-            metadata = await http_get_json(
-                f"{self.valves.PLEX_URL}/library/metadata/{rating_key}",
-                headers={"X-Plex-Token": self.valves.PLEX_TOKEN, "Accept": "application/json"},
-            )
-            
-            item_data = metadata.get("MediaContainer", {}).get("Metadata", [])
-            if not item_data:
+            # Fetch full metadata (gives us Role data); concurrent lookups share one request
+            item = await self._metadata.get(str(rating_key))
+            if not item:
                 return f"Could not retrieve details for '{title}'."
-            
-            item = item_data[0]
+
             item_title = item.get("title", title)
             item_year = item.get("year", "N/A")
             roles = item.get("Role", [])
@@ -542,47 +1528,20 @@ class Tools:
         await emit_status(__event_emitter__, f"Fetching recently added {media_type}…")
         try:
             media_type_lower = media_type.lower()
-            items = []
-            
-            # For episodes specifically, query the TV section with type=4 (episode)
-            # The generic /library/recentlyAdded only returns seasons, not individual episodes
-            if media_type_lower == "episodes":
-                section_id = await self._get_section_id("show")
-                if not section_id:
-                    return "Error: Could not find a Plex TV library section for episodes."
-                data = await http_get_json(
-                    f"{self.valves.PLEX_URL}/library/sections/{section_id}/recentlyAdded",
-                    headers=self._get_headers(),
-                    params={"type": 4, "X-Plex-Container-Size": limit},
-                )
-                items = data.get("MediaContainer", {}).get("Metadata", [])
-
-            # For movies specifically, query the Movies section
-            elif media_type_lower == "movies":
-                section_id = await self._get_section_id("movie")
-                if not section_id:
-                    return "Error: Could not find a Plex movie library section."
-                data = await http_get_json(
-                    f"{self.valves.PLEX_URL}/library/sections/{section_id}/recentlyAdded",
-                    headers=self._get_headers(),
-                    params={"X-Plex-Container-Size": limit},
-                )
-                items = data.get("MediaContainer", {}).get("Metadata", [])
-
-            # For shows/tv/series or "all", use the generic endpoint
+            results, errors = await self._across_servers(lambda tools: tools._recent_items(media_type_lower, limit))
+            if not self._remote_servers():
+                items, section_errors = results[0][1]
             else:
-                fetch_limit = limit * 2 if media_type_lower in ("shows", "tv", "series") else limit
-                data = await http_get_json(
-                    f"{self.valves.PLEX_URL}/library/recentlyAdded",
-                    headers=self._get_headers(),
-                    params={"X-Plex-Container-Start": 0, "X-Plex-Container-Size": fetch_limit},
+                # Each server's list is newest-first; merge on addedAt, then dedupe
+                merged = heapq.merge(
+                    *[[(label, item) for item in server_items] for label, (server_items, _) in results],
+                    key=lambda pair: pair[1].get("addedAt", 0),
+                    reverse=True,
                 )
-                items = data.get("MediaContainer", {}).get("Metadata", [])
-                
-                # Filter for TV content if requested
-                if media_type_lower in ("shows", "tv", "series"):
-                    items = [i for i in items if i.get("type") in ("episode", "season", "show")]
-            
+                items = self._merge_servers([(label, [item]) for label, item in merged])
+                section_errors = [f"{label}: {e}" for label, (_, server_errors) in results for e in server_errors]
+            errors = section_errors + errors
+
             # Limit results
             items = items[:limit]
             
@@ -606,20 +1565,20 @@ class Tools:
                 
                 if item_type == "movie":
                     year = item.get("year", "N/A")
-                    result += f"🎬 **{title}** ({year}) — added {added_date}\n"
+                    result += f"🎬 **{title}** ({year}) — added {added_date}{self._server_note(item)}\n"
                     
                 elif item_type == "episode":
                     show = item.get("grandparentTitle", "Unknown Show")
                     season = item.get("parentIndex", 0)
                     episode = item.get("index", 0)
-                    result += f"📺 **{show}** S{season:02d}E{episode:02d} - {title} — added {added_date}\n"
+                    result += f"📺 **{show}** S{season:02d}E{episode:02d} - {title} — added {added_date}{self._server_note(item)}\n"
                     
                 elif item_type == "season":
                     show = item.get("parentTitle", "Unknown Show")
                     season = item.get("index", 0)
-                    result += f"📺 **{show}** Season {season} — added {added_date}\n"
+                    result += f"📺 **{show}** Season {season} — added {added_date}{self._server_note(item)}\n"
 
-            return result
+            return result + self._partial_note(errors)
 
         except Exception as e:
             return f"Error fetching recently added: {str(e)}"
@@ -638,6 +1597,7 @@ class Tools:
             data = await http_get_json(
                 f"{self.valves.PLEX_URL}/library/onDeck",
                 headers=self._get_headers(),
+                params=REQUEST_PROFILES["on_deck"],
             )
 
             items = data.get("MediaContainer", {}).get("Metadata", [])
@@ -686,18 +1646,35 @@ class Tools:
             if show_name:
                 show_name = show_name.replace("'", "'").replace("'", "'")
 
-            # Search for the episode in the TV section.
-            # Plex's section search is already fuzzy server-side for the query string.
-            section_id = await self._get_section_id("show")
-            if not section_id:
-                return "Error: Could not find a Plex TV library section."
-            data = await http_get_json(
-                f"{self.valves.PLEX_URL}/library/sections/{section_id}/search",
-                headers=self._get_headers(),
-                params={"type": 4, "query": episode_title},
-            )
+            # With a show name, look only at that show's episodes
+            items, errors = [], []
+            if show_name:
+                try:
+                    _, show_episodes, errors = await self._episodes_for_show(show_name)
+                except Exception:
+                    show_episodes = []  # the section-wide search below still answers
+                items = self._match_episode(episode_title, show_episodes)
 
-            items = data.get("MediaContainer", {}).get("Metadata", [])
+            if not items:
+                # Episodes whose title contains the query, from the snapshot (exact titles first)
+                episodes, errors = await self._get_library("show", 4)
+                query_lower = episode_title.lower()
+                items = sorted(
+                    (ep for ep in episodes or [] if query_lower in ep.get("title", "").lower()),
+                    key=lambda ep: ep.get("title", "").lower() != query_lower,
+                )
+
+            if not items:
+                # Search for the episode in every TV section.
+                # Plex's section search is already fuzzy server-side for the query string.
+                try:
+                    results, errors = await self._query_sections(
+                        "show", "/library/sections/{key}/search",
+                        {**REQUEST_PROFILES["episode_search"], "type": 4, "query": episode_title},
+                    )
+                except RuntimeError as e:
+                    return f"Error fetching episode details: {e}"
+                items = [item for _, section_items in results for item in section_items]
 
             if not items:
                 return f"No episode found matching '{episode_title}'."
@@ -737,7 +1714,7 @@ class Tools:
                 result += f"⭐ **Rating:** {rating:.1f}\n"
             result += f"\n**Synopsis:**\n{summary}"
 
-            return result
+            return result + self._partial_note(errors)
 
         except Exception as e:
             return f"Error fetching episode details: {str(e)}"
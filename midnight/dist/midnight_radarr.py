@@ -3,15 +3,22 @@ title: Midnight Radarr Tool
 author: Peter Marino
 description: Search and query movies from Radarr for the Midnight media assistant
 required_open_webui_version: 0.4.0
-requirements: httpx, pydantic
+requirements: httpx, pydantic, numpy
 version: 2.1.0
 licence: MIT
 """
 
+import asyncio
 from typing import Optional
+import numpy as np
 from pydantic import BaseModel, Field
 
 # === BEGIN inlined from midnight/_shared.py — DO NOT EDIT, regenerate via build_tools.py ===
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from difflib import SequenceMatcher
 
 import httpx
@@ -50,6 +57,31 @@ async def http_post_json(
         return response.json()
 
 
+def parse_instances(spec: str) -> list:
+    """
+    Parse extra service instances from a Valve string.
+
+    Entries are `label|url|api_key`, separated by `;` or newlines, e.g.
+    `4K|http://192.168.4.46:7879|abc123; Anime|http://192.168.4.46:7880|def456`.
+    Raises ValueError on a malformed entry so a misconfigured Valve surfaces
+    as a visible error instead of silently dropping an instance.
+
+    :param spec: Raw Valve value (may be empty)
+    :return: List of (label, url, api_key) tuples, url without trailing slash
+    """
+    instances = []
+    for entry in spec.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(f"malformed instance entry {entry!r} (expected 'label|url|api_key')")
+        label, url, api_key = parts
+        instances.append((label, url.rstrip("/"), api_key))
+    return instances
+
+
 def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     """
     Find fuzzy matches for a query in a list of candidates. Typo-tolerant.
@@ -73,6 +105,13 @@ def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     return sorted(matches, key=lambda x: x[2], reverse=True)
 
 
+def title_key(title: str) -> str:
+    """Normalise a title for index lookups: ASCII-folded, lowercase, alphanumerics only, no leading article."""
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower().strip()
+    folded = re.sub(r"^(the|a|an)\s+", "", folded)
+    return re.sub(r"[^a-z0-9]", "", folded)
+
+
 async def emit_status(emitter, description: str, done: bool = False) -> None:
     """
     Send an OpenWebUI status event if an emitter is wired.
@@ -89,13 +128,337 @@ async def emit_status(emitter, description: str, done: bool = False) -> None:
             "type": "status",
             "data": {"description": description, "done": done},
         })
+
+
+class TTLSnapshot:
+    """
+    Cached result of an async loader, reused until it is older than max_age.
+
+    The first get() awaits the loader. After that, a stale read returns the
+    cached value immediately and refreshes it in the background, so only the
+    very first call pays backend latency. Concurrent callers share a single
+    in-flight load. A failed load propagates to the callers waiting on it and
+    leaves any previous value in place (a failed background refresh is kept
+    on `.error` instead of being raised).
+
+    `version` increments on every successful load. Derived structures
+    (indexes, NumPy tables) record the version they were built from and
+    rebuild when it moves.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._task = None
+        self.value = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.error = None
+
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)."""
+        if not self.version:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def invalidate(self) -> None:
+        """Mark the value stale so the next get() starts a refresh."""
+        self.loaded_at = 0.0
+
+    async def get(self, max_age: float, force: bool = False):
+        """Return the cached value, loading or refreshing it as needed.
+
+        :param max_age: Seconds a value stays fresh before a background refresh
+        :param force: Wait for a fresh load even if a cached value exists
+        """
+        if self.version and not force:
+            if self.age() > max_age:
+                self._start()
+            return self.value
+        return await asyncio.shield(self._start())
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+            self._task.add_done_callback(self._reap)
+        return self._task
+
+    def _reap(self, task) -> None:
+        # Retrieve the exception so background failures don't log as
+        # "Task exception was never retrieved".
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self.value = value
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self.error = None
+            return value
+        finally:
+            self._task = None
+
+
+class TTLCache:
+    """
+    Small LRU map whose entries expire after a per-entry TTL.
+
+    For memoising query results: `get` returns `default` for missing or
+    expired keys, and `set` takes the TTL so negative results can be kept
+    for less time than positive ones. Once `max_entries` is reached the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyBatcher:
+    """
+    Coalesce concurrent single-key lookups into multi-key requests.
+
+    Callers await `get(key)`. Keys requested within `window` seconds of each
+    other are sent together as one `fetch_many(keys)` call, which returns
+    {key: value}; each caller receives its own value (None if the backend
+    didn't return it). A batch is sent early once it reaches `max_batch`
+    keys, and at most `concurrency` batches are in flight. Callers asking
+    for the same pending key share one slot. A failed batch raises in every
+    caller waiting on it.
+    """
+
+    def __init__(self, fetch_many, window: float = 0.02, max_batch: int = 100, concurrency: int = 4):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._max_batch = max_batch
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}
+        self._timer = None
+
+    async def get(self, key):
+        """Return the value for `key`, fetched as part of the next batch."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                results = await self._fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may all have gone; don't log "never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class ArrInstances:
+    """
+    Multi-instance plumbing shared by the Radarr and Sonarr tools.
+
+    A tool mixes this in and supplies the per-service differences:
+    `SERVICE` ("Radarr"), `VALVE_PREFIX` ("RADARR", for the *_URL /
+    *_API_KEY / *_EXTRA_INSTANCES Valves), `_fetch_library(url, api_key)`
+    for its library endpoint and `_size_on_disk(item)`. Its __init__ sets
+    `_libraries`, `_profiles` (dicts of per-instance TTLSnapshots) and
+    `_storage_table` (None); the Valves carry LIBRARY_CACHE_SECONDS.
+    """
+
+    SERVICE = ""
+    VALVE_PREFIX = ""
+
+    def _get_headers(self, api_key: str = None) -> dict:
+        """Get API headers."""
+        if api_key is None:
+            api_key = getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY")
+        return {"X-Api-Key": api_key}
+
+    def _instances(self) -> list:
+        """(label, url, api_key) for the primary URL (labelled "main") plus every *_EXTRA_INSTANCES entry."""
+        primary = (
+            "main",
+            getattr(self.valves, f"{self.VALVE_PREFIX}_URL").rstrip("/"),
+            getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY"),
+        )
+        return [primary] + parse_instances(getattr(self.valves, f"{self.VALVE_PREFIX}_EXTRA_INSTANCES"))
+
+    async def _fetch_quality_profiles(self, url: str, api_key: str) -> dict:
+        """Fetch one instance's quality profiles as {id: name}. Raises on transport/HTTP error."""
+        profiles = await http_get_json(f"{url}/api/v3/qualityprofile", headers=self._get_headers(api_key))
+        return {p.get("id"): p.get("name", "Unknown") for p in profiles}
+
+    def _snapshot(self, cache: dict, fetch, url: str, api_key: str) -> TTLSnapshot:
+        """Per-instance TTLSnapshot, created on first use (Valves may change at runtime)."""
+        snap = cache.get((url, api_key))
+        if snap is None:
+            snap = cache[(url, api_key)] = TTLSnapshot(lambda: fetch(url, api_key))
+        return snap
+
+    async def _get_libraries(self) -> tuple:
+        """
+        Fetch every instance's library snapshot concurrently.
+
+        Returns ([(label, snapshot, items)], errors). One unreachable instance
+        degrades to partial results; raises only when every instance failed.
+        """
+        instances = self._instances()
+        snaps = [self._snapshot(self._libraries, self._fetch_library, url, key) for _, url, key in instances]
+        responses = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in snaps],
+            return_exceptions=True,
+        )
+        libraries = []
+        errors = []
+        for (label, url, _), snap, resp in zip(instances, snaps, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                libraries.append((label, snap, resp))
+        if not libraries:
+            raise RuntimeError("; ".join(errors))
+        return libraries, errors
+
+    @staticmethod
+    def _instance_tag(item: dict) -> str:
+        """' [main, 4K]' when several instances are configured, else ''."""
+        labels = item.get("_instances")
+        return f" [{', '.join(labels)}]" if labels else ""
+
+    def _with_partial(self, result: str, errors: list) -> str:
+        """Append the partial-results caveat when some instances were unreachable."""
+        if errors:
+            result += f"\n\n⚠️ Partial results — {len(errors)} {self.SERVICE} instance(s) unreachable: {'; '.join(errors)}"
+        return result
+
+    async def _get_storage_table(self) -> tuple:
+        """
+        Columnar (NumPy) view of the library snapshots for storage analytics.
+
+        Returns (table, errors). Rows are per instance, not deduplicated — a
+        title held by both the HD and 4K instances occupies disk twice. The
+        table is rebuilt only when a snapshot version moves, so repeated
+        questions pay for the Python-side column extraction once and every
+        aggregate after that is a vectorised pass. Genres are multi-valued, so
+        they get their own exploded (row, genre_code) arrays.
+        """
+        import numpy as np  # only the tools that mix this in require numpy
+
+        libraries, errors = await self._get_libraries()
+        instances = {label: (url, key) for label, url, key in self._instances()}
+        profile_snaps = [
+            self._snapshot(self._profiles, self._fetch_quality_profiles, *instances[label])
+            for label, _, _ in libraries
+        ]
+        profile_maps = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in profile_snaps],
+            return_exceptions=True,
+        )
+        # Unreachable profile endpoint falls back to "Profile <id>" labels
+        profile_maps = [{} if isinstance(m, Exception) else m for m in profile_maps]
+
+        key = tuple((label, snap.version, psnap.version) for (label, snap, _), psnap in zip(libraries, profile_snaps))
+        if self._storage_table and self._storage_table["key"] == key:
+            return self._storage_table, errors
+
+        items = [item for _, _, library in libraries for item in library]
+        profiles = [pmap for (_, _, library), pmap in zip(libraries, profile_maps) for _ in library]
+        multi = len(instances) > 1
+        labels = [f" [{label}]" if multi else "" for label, _, library in libraries for _ in library]
+        n = len(items)
+        sizes = np.fromiter((self._size_on_disk(item) for item in items), dtype=np.float64, count=n)
+        years = np.fromiter((item.get("year") or 0 for item in items), dtype=np.int32, count=n)
+        profile_vocab = {}
+        profile_codes = np.fromiter(
+            (
+                profile_vocab.setdefault(
+                    pmap.get(item.get("qualityProfileId")) or f"Profile {item.get('qualityProfileId')}",
+                    len(profile_vocab),
+                )
+                for item, pmap in zip(items, profiles)
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        genre_vocab = {}
+        genre_rows = []
+        genre_codes = []
+        for i, item in enumerate(items):
+            for genre in item.get("genres") or ["Unknown"]:
+                genre_rows.append(i)
+                genre_codes.append(genre_vocab.setdefault(genre, len(genre_vocab)))
+        titles = [
+            (item.get("title", "Unknown"), item.get("year", "N/A"), label)
+            for item, label in zip(items, labels)
+        ]
+
+        self._storage_table = {
+            "key": key,
+            "sizes": sizes,
+            "years": years,
+            "profile_codes": profile_codes,
+            "profile_names": list(profile_vocab),
+            "genre_rows": np.asarray(genre_rows, dtype=np.int64),
+            "genre_codes": np.asarray(genre_codes, dtype=np.int32),
+            "genre_names": list(genre_vocab),
+            "titles": titles,
+        }
+        return self._storage_table, errors
 # === END inlined from midnight/_shared.py ===
 
 
 
-class Tools:
+class Tools(ArrInstances):
     """Radarr movie library tools for Midnight."""
 
+    SERVICE = "Radarr"
+    VALVE_PREFIX = "RADARR"
+
     class Valves(BaseModel):
         """Configuration for Radarr API connection."""
         RADARR_URL: str = Field(
@@ -106,20 +469,65 @@ class Tools:
             default="",
             description="Radarr API key"
         )
+        LIBRARY_CACHE_SECONDS: int = Field(
+            default=300,
+            description="Reuse the fetched movie library for this many seconds before refreshing it in the background"
+        )
+        RADARR_EXTRA_INSTANCES: str = Field(
+            default="",
+            description="Additional Radarr instances (e.g. 4K, anime) as 'label|url|api_key', separated by ';'. Queried alongside RADARR_URL, which is labelled 'main'."
+        )
 
     def __init__(self):
         self.valves = self.Valves()
+        self._libraries: dict = {}  # (url, api_key) -> TTLSnapshot of /api/v3/movie
+        self._profiles: dict = {}  # (url, api_key) -> TTLSnapshot of {profile_id: name}
+        self._merged = None  # (snapshot versions, deduplicated movie list)
+        self._storage_table = None  # columnar view of the snapshots, see _get_storage_table
 
-    def _get_headers(self) -> dict:
-        """Get API headers."""
-        return {"X-Api-Key": self.valves.RADARR_API_KEY}
+    async def _fetch_library(self, url: str, api_key: str) -> list:
+        """Fetch all movies from one Radarr instance. Raises on transport/HTTP error."""
+        return await http_get_json(f"{url}/api/v3/movie", headers=self._get_headers(api_key))
 
-    async def _get_all_movies(self) -> list:
-        """Fetch all movies from Radarr. Raises on transport/HTTP error."""
-        return await http_get_json(
-            f"{self.valves.RADARR_URL}/api/v3/movie",
-            headers=self._get_headers(),
-        )
+    @staticmethod
+    def _size_on_disk(movie: dict) -> float:
+        """Bytes on disk for one movie, as the storage table counts it."""
+        return movie.get("sizeOnDisk") or 0
+
+    async def _get_all_movies(self) -> tuple:
+        """
+        Return (movies, errors): the library merged across instances.
+
+        With one instance this is the snapshot itself. With several, movies are
+        deduplicated by tmdbId into copies carrying `_instances` (labels that
+        hold the title), `hasFile` if any copy has a file, and the summed
+        `sizeOnDisk`. Raises if no instance is reachable.
+        """
+        libraries, errors = await self._get_libraries()
+        if len(self._instances()) == 1:
+            return libraries[0][2], errors
+
+        key = tuple((label, snap.version) for label, snap, _ in libraries)
+        if self._merged and self._merged[0] == key:
+            return self._merged[1], errors
+
+        by_id = {}
+        merged = []
+        for label, _, movies in libraries:
+            for movie in movies:
+                tmdb_id = movie.get("tmdbId")
+                existing = by_id.get(tmdb_id) if tmdb_id else None
+                if existing is None:
+                    copy = dict(movie, _instances=[label])
+                    merged.append(copy)
+                    if tmdb_id:
+                        by_id[tmdb_id] = copy
+                else:
+                    existing["_instances"].append(label)
+                    existing["hasFile"] = existing.get("hasFile") or movie.get("hasFile", False)
+                    existing["sizeOnDisk"] = (existing.get("sizeOnDisk") or 0) + (movie.get("sizeOnDisk") or 0)
+        self._merged = (key, merged)
+        return merged, errors
 
     async def search_movies_by_title(self, query: str, __event_emitter__=None) -> str:
         """
@@ -147,12 +555,12 @@ class Tools:
             return f"For actor searches, please use the Plex tool's search_by_actor function to find movies with '{actor_name}'"
         
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         # Build candidates for fuzzy matching (title -> movie data)
         candidates = [(movie.get("title", ""), movie) for movie in movies]
@@ -170,22 +578,23 @@ class Tools:
                 "year": year,
                 "rating": rating,
                 "status": status,
+                "tag": self._instance_tag(movie),
                 "score": score
             })
 
         if not matches:
-            return f"No movies found matching '{query}' in the library. Try checking the spelling."
+            return self._with_partial(f"No movies found matching '{query}' in the library. Try checking the spelling.", errors)
 
         # Format results
         result = f"Found {len(matches)} movie(s) matching '{query}':\n\n"
         for m in matches[:15]:  # Limit to 15 results
             rating_str = f"⭐ {m['rating']}" if m['rating'] != "N/A" else ""
-            result += f"• **{m['title']}** ({m['year']}) {rating_str} - {m['status']}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} {rating_str} - {m['status']}\n"
 
         if len(matches) > 15:
             result += f"\n... and {len(matches) - 15} more."
 
-        return result
+        return self._with_partial(result, errors)
 
     async def list_movies_by_genre(self, genre: str, __event_emitter__=None) -> str:
         """
@@ -232,12 +641,12 @@ class Tools:
         }
         
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         genre_lower = genre.lower().strip()
         
@@ -266,11 +675,12 @@ class Tools:
                 matches.append({
                     "title": movie.get("title"),
                     "year": movie.get("year", "N/A"),
-                    "rating": movie.get("ratings", {}).get("imdb", {}).get("value", "N/A")
+                    "rating": movie.get("ratings", {}).get("imdb", {}).get("value", "N/A"),
+                    "tag": self._instance_tag(movie),
                 })
 
         if not matches:
-            return f"No '{genre}' movies found in the downloaded library."
+            return self._with_partial(f"No '{genre}' movies found in the downloaded library.", errors)
 
         def rating_value(value: object) -> float:
             try:
@@ -281,13 +691,13 @@ class Tools:
         result = f"Found {len(matches)} '{genre}' movie(s):\n\n"
         for m in sorted(matches, key=lambda x: rating_value(x.get("rating")), reverse=True)[:20]:
             rating_str = f"⭐ {m['rating']}" if m['rating'] != "N/A" else ""
-            result += f"• **{m['title']}** ({m['year']}) {rating_str}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} {rating_str}\n"
 
         if len(matches) > 20:
             result += f"\n... and {len(matches) - 20} more."
 
         await emit_status(__event_emitter__, f"Found {len(matches)} match(es)", done=True)
-        return result
+        return self._with_partial(result, errors)
 
     async def get_movie_details(self, title: str, __event_emitter__=None) -> str:
         """
@@ -299,12 +709,12 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Fetching details for '{title}'…")
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         # Strip year from query if present (e.g., "Movie Title (2024)" -> "Movie Title")
         import re
@@ -324,18 +734,94 @@ class Tools:
                 has_file = movie.get("hasFile", False)
                 status = "✓ Downloaded" if has_file else "✗ Not downloaded"
                 size_gb = movie.get("sizeOnDisk", 0) / (1024**3)
+                instances = ""
+                if movie.get("_instances"):
+                    instances = f"\n• **Instances**: {', '.join(movie['_instances'])}"
 
-                return f"""**{movie.get('title')}** ({year})
+                return self._with_partial(f"""**{movie.get('title')}** ({year})
 
-• **Status**: {status}
+• **Status**: {status}{instances}
 • **Runtime**: {runtime} minutes
 • **Genres**: {genres}
 • **Rating**: ⭐ {rating}/10
 • **Size**: {size_gb:.1f} GB
 
-**Overview**: {overview}"""
+**Overview**: {overview}""", errors)
 
-        return f"Movie '{title}' not found in library."
+        return self._with_partial(f"Movie '{title}' not found in library.", errors)
+
+    async def get_storage_breakdown(self, group_by: str = "genre", top: int = 10, __event_emitter__=None) -> str:
+        """
+        Show what is using disk space in the movie library.
+        Use this when users ask how much space movies take, what's eating the disk,
+        or which movies are the largest.
+
+        :param group_by: How to group disk usage - "genre", "decade", or "quality" (quality profile)
+        :param top: How many groups and largest movies to list (default 10, 1-50)
+        :return: Disk usage per group plus the largest movies on disk
+        """
+        await emit_status(__event_emitter__, f"Computing Radarr storage by {group_by}…")
+        group_by = group_by.lower().strip()
+        if group_by not in ("genre", "decade", "quality"):
+            return f"Unsupported grouping '{group_by}'. Use 'genre', 'decade', or 'quality'."
+        top = max(1, min(top, 50))
+
+        try:
+            table, errors = await self._get_storage_table()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Radarr unreachable", done=True)
+            return f"Radarr error: {e}"
+
+        sizes = table["sizes"]
+        on_disk = sizes > 0
+        if not on_disk.any():
+            return self._with_partial("No movies with files on disk in Radarr.", errors)
+
+        gb = 1024 ** 3
+        if group_by == "genre":
+            rows = table["genre_rows"]
+            codes = table["genre_codes"]
+            keep = on_disk[rows]
+            n_groups = len(table["genre_names"])
+            totals = np.bincount(codes[keep], weights=sizes[rows][keep], minlength=n_groups)
+            counts = np.bincount(codes[keep], minlength=n_groups)
+            labels = table["genre_names"]
+        elif group_by == "decade":
+            decades = (table["years"] // 10) * 10
+            labels_arr, codes = np.unique(decades[on_disk], return_inverse=True)
+            totals = np.bincount(codes, weights=sizes[on_disk])
+            counts = np.bincount(codes)
+            labels = [f"{d}s" if d else "Unknown year" for d in labels_arr]
+        else:
+            codes = table["profile_codes"][on_disk]
+            n_groups = len(table["profile_names"])
+            totals = np.bincount(codes, weights=sizes[on_disk], minlength=n_groups)
+            counts = np.bincount(codes, minlength=n_groups)
+            labels = table["profile_names"]
+
+        order = np.argsort(totals)[::-1][:top]
+
+        k = min(top, int(on_disk.sum()))
+        largest = np.argpartition(sizes, -k)[-k:]
+        largest = largest[np.argsort(sizes[largest])[::-1]]
+
+        total_gb = sizes.sum() / gb
+        result = f"Radarr storage: {total_gb:,.1f} GB across {int(on_disk.sum())} movies on disk\n\n"
+        result += f"**By {group_by}:**\n"
+        for i in order:
+            if counts[i] == 0:
+                continue
+            result += f"  • {labels[i]} — {totals[i] / gb:,.1f} GB ({counts[i]} movies)\n"
+        if group_by == "genre":
+            result += "  *(movies with several genres count toward each of them)*\n"
+
+        result += "\n**Largest movies:**\n"
+        for rank, i in enumerate(largest, 1):
+            title, year, tag = table["titles"][i]
+            result += f"  {rank}. {title} ({year}){tag} — {sizes[i] / gb:.1f} GB\n"
+
+        await emit_status(__event_emitter__, "Done", done=True)
+        return self._with_partial(result, errors)
 
     async def get_recent_movies(self, days: int = 30, __event_emitter__=None) -> str:
         """
@@ -349,12 +835,12 @@ class Tools:
         from datetime import datetime, timedelta
 
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         cutoff = datetime.now() - timedelta(days=days)
         recent = []
@@ -371,18 +857,19 @@ class Tools:
                         recent.append({
                             "title": movie.get("title"),
                             "year": movie.get("year"),
-                            "added": added_date.strftime("%Y-%m-%d")
+                            "added": added_date.strftime("%Y-%m-%d"),
+                            "tag": self._instance_tag(movie),
                         })
                 except:
                     pass
 
         if not recent:
-            return f"No movies added in the last {days} days."
+            return self._with_partial(f"No movies added in the last {days} days.", errors)
 
         recent.sort(key=lambda x: x["added"], reverse=True)
         
         result = f"Movies added in the last {days} days:\n\n"
         for m in recent[:15]:
-            result += f"• **{m['title']}** ({m['year']}) - Added {m['added']}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} - Added {m['added']}\n"
 
-        return result
+        return self._with_partial(result, errors)
@@ -3,15 +3,25 @@ title: Midnight Tautulli Tool
 author: Peter Marino
 description: Viewing analytics and activity monitoring via Tautulli
 required_open_webui_version: 0.4.0
-requirements: httpx, pydantic
+requirements: httpx, pydantic, numpy
 version: 2.1.0
 licence: MIT
 """
 
+import os
+import sqlite3
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import numpy as np
 from pydantic import BaseModel, Field
 
 # === BEGIN inlined from midnight/_shared.py — DO NOT EDIT, regenerate via build_tools.py ===
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from difflib import SequenceMatcher
 
 import httpx
@@ -50,6 +60,31 @@ async def http_post_json(
         return response.json()
 
 
+def parse_instances(spec: str) -> list:
+    """
+    Parse extra service instances from a Valve string.
+
+    Entries are `label|url|api_key`, separated by `;` or newlines, e.g.
+    `4K|http://192.168.4.46:7879|abc123; Anime|http://192.168.4.46:7880|def456`.
+    Raises ValueError on a malformed entry so a misconfigured Valve surfaces
+    as a visible error instead of silently dropping an instance.
+
+    :param spec: Raw Valve value (may be empty)
+    :return: List of (label, url, api_key) tuples, url without trailing slash
+    """
+    instances = []
+    for entry in spec.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) != 3 or not all(parts[:2]):
+            raise ValueError(f"malformed instance entry {entry!r} (expected 'label|url|api_key')")
+        label, url, api_key = parts
+        instances.append((label, url.rstrip("/"), api_key))
+    return instances
+
+
 def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     """
     Find fuzzy matches for a query in a list of candidates. Typo-tolerant.
@@ -73,6 +108,13 @@ def fuzzy_match(query: str, candidates: list, threshold: float = 0.6) -> list:
     return sorted(matches, key=lambda x: x[2], reverse=True)
 
 
+def title_key(title: str) -> str:
+    """Normalise a title for index lookups: ASCII-folded, lowercase, alphanumerics only, no leading article."""
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower().strip()
+    folded = re.sub(r"^(the|a|an)\s+", "", folded)
+    return re.sub(r"[^a-z0-9]", "", folded)
+
+
 async def emit_status(emitter, description: str, done: bool = False) -> None:
     """
     Send an OpenWebUI status event if an emitter is wired.
@@ -89,9 +131,402 @@ async def emit_status(emitter, description: str, done: bool = False) -> None:
             "type": "status",
             "data": {"description": description, "done": done},
         })
+
+
+class TTLSnapshot:
+    """
+    Cached result of an async loader, reused until it is older than max_age.
+
+    The first get() awaits the loader. After that, a stale read returns the
+    cached value immediately and refreshes it in the background, so only the
+    very first call pays backend latency. Concurrent callers share a single
+    in-flight load. A failed load propagates to the callers waiting on it and
+    leaves any previous value in place (a failed background refresh is kept
+    on `.error` instead of being raised).
+
+    `version` increments on every successful load. Derived structures
+    (indexes, NumPy tables) record the version they were built from and
+    rebuild when it moves.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._task = None
+        self.value = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.error = None
+
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)."""
+        if not self.version:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    def invalidate(self) -> None:
+        """Mark the value stale so the next get() starts a refresh."""
+        self.loaded_at = 0.0
+
+    async def get(self, max_age: float, force: bool = False):
+        """Return the cached value, loading or refreshing it as needed.
+
+        :param max_age: Seconds a value stays fresh before a background refresh
+        :param force: Wait for a fresh load even if a cached value exists
+        """
+        if self.version and not force:
+            if self.age() > max_age:
+                self._start()
+            return self.value
+        return await asyncio.shield(self._start())
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+            self._task.add_done_callback(self._reap)
+        return self._task
+
+    def _reap(self, task) -> None:
+        # Retrieve the exception so background failures don't log as
+        # "Task exception was never retrieved".
+        if not task.cancelled() and task.exception() is not None:
+            self.error = task.exception()
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self.value = value
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self.error = None
+            return value
+        finally:
+            self._task = None
+
+
+class TTLCache:
+    """
+    Small LRU map whose entries expire after a per-entry TTL.
+
+    For memoising query results: `get` returns `default` for missing or
+    expired keys, and `set` takes the TTL so negative results can be kept
+    for less time than positive ones. Once `max_entries` is reached the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeyBatcher:
+    """
+    Coalesce concurrent single-key lookups into multi-key requests.
+
+    Callers await `get(key)`. Keys requested within `window` seconds of each
+    other are sent together as one `fetch_many(keys)` call, which returns
+    {key: value}; each caller receives its own value (None if the backend
+    didn't return it). A batch is sent early once it reaches `max_batch`
+    keys, and at most `concurrency` batches are in flight. Callers asking
+    for the same pending key share one slot. A failed batch raises in every
+    caller waiting on it.
+    """
+
+    def __init__(self, fetch_many, window: float = 0.02, max_batch: int = 100, concurrency: int = 4):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._max_batch = max_batch
+        self._concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}
+        self._timer = None
+
+    async def get(self, key):
+        """Return the value for `key`, fetched as part of the next batch."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                results = await self._fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may all have gone; don't log "never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class ArrInstances:
+    """
+    Multi-instance plumbing shared by the Radarr and Sonarr tools.
+
+    A tool mixes this in and supplies the per-service differences:
+    `SERVICE` ("Radarr"), `VALVE_PREFIX` ("RADARR", for the *_URL /
+    *_API_KEY / *_EXTRA_INSTANCES Valves), `_fetch_library(url, api_key)`
+    for its library endpoint and `_size_on_disk(item)`. Its __init__ sets
+    `_libraries`, `_profiles` (dicts of per-instance TTLSnapshots) and
+    `_storage_table` (None); the Valves carry LIBRARY_CACHE_SECONDS.
+    """
+
+    SERVICE = ""
+    VALVE_PREFIX = ""
+
+    def _get_headers(self, api_key: str = None) -> dict:
+        """Get API headers."""
+        if api_key is None:
+            api_key = getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY")
+        return {"X-Api-Key": api_key}
+
+    def _instances(self) -> list:
+        """(label, url, api_key) for the primary URL (labelled "main") plus every *_EXTRA_INSTANCES entry."""
+        primary = (
+            "main",
+            getattr(self.valves, f"{self.VALVE_PREFIX}_URL").rstrip("/"),
+            getattr(self.valves, f"{self.VALVE_PREFIX}_API_KEY"),
+        )
+        return [primary] + parse_instances(getattr(self.valves, f"{self.VALVE_PREFIX}_EXTRA_INSTANCES"))
+
+    async def _fetch_quality_profiles(self, url: str, api_key: str) -> dict:
+        """Fetch one instance's quality profiles as {id: name}. Raises on transport/HTTP error."""
+        profiles = await http_get_json(f"{url}/api/v3/qualityprofile", headers=self._get_headers(api_key))
+        return {p.get("id"): p.get("name", "Unknown") for p in profiles}
+
+    def _snapshot(self, cache: dict, fetch, url: str, api_key: str) -> TTLSnapshot:
+        """Per-instance TTLSnapshot, created on first use (Valves may change at runtime)."""
+        snap = cache.get((url, api_key))
+        if snap is None:
+            snap = cache[(url, api_key)] = TTLSnapshot(lambda: fetch(url, api_key))
+        return snap
+
+    async def _get_libraries(self) -> tuple:
+        """
+        Fetch every instance's library snapshot concurrently.
+
+        Returns ([(label, snapshot, items)], errors). One unreachable instance
+        degrades to partial results; raises only when every instance failed.
+        """
+        instances = self._instances()
+        snaps = [self._snapshot(self._libraries, self._fetch_library, url, key) for _, url, key in instances]
+        responses = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in snaps],
+            return_exceptions=True,
+        )
+        libraries = []
+        errors = []
+        for (label, url, _), snap, resp in zip(instances, snaps, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                libraries.append((label, snap, resp))
+        if not libraries:
+            raise RuntimeError("; ".join(errors))
+        return libraries, errors
+
+    @staticmethod
+    def _instance_tag(item: dict) -> str:
+        """' [main, 4K]' when several instances are configured, else ''."""
+        labels = item.get("_instances")
+        return f" [{', '.join(labels)}]" if labels else ""
+
+    def _with_partial(self, result: str, errors: list) -> str:
+        """Append the partial-results caveat when some instances were unreachable."""
+        if errors:
+            result += f"\n\n⚠️ Partial results — {len(errors)} {self.SERVICE} instance(s) unreachable: {'; '.join(errors)}"
+        return result
+
+    async def _get_storage_table(self) -> tuple:
+        """
+        Columnar (NumPy) view of the library snapshots for storage analytics.
+
+        Returns (table, errors). Rows are per instance, not deduplicated — a
+        title held by both the HD and 4K instances occupies disk twice. The
+        table is rebuilt only when a snapshot version moves, so repeated
+        questions pay for the Python-side column extraction once and every
+        aggregate after that is a vectorised pass. Genres are multi-valued, so
+        they get their own exploded (row, genre_code) arrays.
+        """
+        import numpy as np  # only the tools that mix this in require numpy
+
+        libraries, errors = await self._get_libraries()
+        instances = {label: (url, key) for label, url, key in self._instances()}
+        profile_snaps = [
+            self._snapshot(self._profiles, self._fetch_quality_profiles, *instances[label])
+            for label, _, _ in libraries
+        ]
+        profile_maps = await asyncio.gather(
+            *[snap.get(self.valves.LIBRARY_CACHE_SECONDS) for snap in profile_snaps],
+            return_exceptions=True,
+        )
+        # Unreachable profile endpoint falls back to "Profile <id>" labels
+        profile_maps = [{} if isinstance(m, Exception) else m for m in profile_maps]
+
+        key = tuple((label, snap.version, psnap.version) for (label, snap, _), psnap in zip(libraries, profile_snaps))
+        if self._storage_table and self._storage_table["key"] == key:
+            return self._storage_table, errors
+
+        items = [item for _, _, library in libraries for item in library]
+        profiles = [pmap for (_, _, library), pmap in zip(libraries, profile_maps) for _ in library]
+        multi = len(instances) > 1
+        labels = [f" [{label}]" if multi else "" for label, _, library in libraries for _ in library]
+        n = len(items)
+        sizes = np.fromiter((self._size_on_disk(item) for item in items), dtype=np.float64, count=n)
+        years = np.fromiter((item.get("year") or 0 for item in items), dtype=np.int32, count=n)
+        profile_vocab = {}
+        profile_codes = np.fromiter(
+            (
+                profile_vocab.setdefault(
+                    pmap.get(item.get("qualityProfileId")) or f"Profile {item.get('qualityProfileId')}",
+                    len(profile_vocab),
+                )
+                for item, pmap in zip(items, profiles)
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        genre_vocab = {}
+        genre_rows = []
+        genre_codes = []
+        for i, item in enumerate(items):
+            for genre in item.get("genres") or ["Unknown"]:
+                genre_rows.append(i)
+                genre_codes.append(genre_vocab.setdefault(genre, len(genre_vocab)))
+        titles = [
+            (item.get("title", "Unknown"), item.get("year", "N/A"), label)
+            for item, label in zip(items, labels)
+        ]
+
+        self._storage_table = {
+            "key": key,
+            "sizes": sizes,
+            "years": years,
+            "profile_codes": profile_codes,
+            "profile_names": list(profile_vocab),
+            "genre_rows": np.asarray(genre_rows, dtype=np.int64),
+            "genre_codes": np.asarray(genre_codes, dtype=np.int32),
+            "genre_names": list(genre_vocab),
+            "titles": titles,
+        }
+        return self._storage_table, errors
 # === END inlined from midnight/_shared.py ===
 
 
+# get_most_watched categories -> (get_home_stats stat_id, section header)
+HOME_STATS = {
+    "movies": ("top_movies", "**Top Movies:**"),
+    "tv": ("top_tv", "**Top TV Shows:**"),
+    "users": ("top_users", "**Most Active Users:**"),
+    "platforms": ("top_platforms", "**Top Platforms:**"),
+    "libraries": ("top_libraries", "**Top Libraries:**"),
+    "concurrent": ("most_concurrent", "**Most Concurrent Streams:**"),
+}
+HOME_STATS_COUNT = 5
+# Every stat group for a time range is reused this long
+HOME_STATS_CACHE_SECONDS = 120
+
+# Local play-history warehouse: one row per play session (get_history with
+# grouping=0), keyed by Tautulli's history row id
+HISTORY_PAGE_SIZE = 1000
+HISTORY_COLUMNS = (
+    "id", "started", "stopped", "duration", "user_id", "friendly_name", "media_type", "title",
+    "grandparent_title", "parent_media_index", "media_index", "year", "rating_key",
+    "grandparent_rating_key", "platform", "player", "percent_complete",
+)
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY, started INTEGER NOT NULL, stopped INTEGER, duration INTEGER,
+    user_id INTEGER, friendly_name TEXT, media_type TEXT, title TEXT, grandparent_title TEXT,
+    parent_media_index INTEGER, media_index INTEGER, year INTEGER, rating_key INTEGER,
+    grandparent_rating_key INTEGER, platform TEXT, player TEXT, percent_complete INTEGER
+);
+CREATE INDEX IF NOT EXISTS history_started ON history (started);
+CREATE INDEX IF NOT EXISTS history_user_started ON history (user_id, started);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER);
+"""
+# Upsert that leaves identical rows untouched, so total_changes counts only real changes
+HISTORY_UPSERT = (
+    f"INSERT INTO history VALUES ({', '.join('?' * len(HISTORY_COLUMNS))}) ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{col} = excluded.{col}" for col in HISTORY_COLUMNS[1:])
+    + f" WHERE ({', '.join(f'history.{col}' for col in HISTORY_COLUMNS[1:])})"
+    + f" IS NOT ({', '.join(f'excluded.{col}' for col in HISTORY_COLUMNS[1:])})"
+)
+# get_history_stats groupings -> SQL expression (episode plays count under their show)
+HISTORY_GROUPS = {
+    "user": "friendly_name",
+    "title": "CASE WHEN media_type = 'episode' THEN grandparent_title ELSE title END",
+    "platform": "platform",
+    "media_type": "media_type",
+    "month": "strftime('%Y-%m', started, 'unixepoch', 'localtime')",
+}
+# Shared activity poller: it stops after this long without a reader, and
+# keeps this many started/stopped events for get_activity_changes
+ACTIVITY_IDLE_SECONDS = 900
+ACTIVITY_EVENT_LOG = 200
+
+# get_viewing_analytics: a play counts as finished at this percent_complete
+COMPLETED_PERCENT = 90
+MEDIA_TYPE_CODES = {"movie": 1, "episode": 2}
+HEATMAP_SHADES = " ░▒▓█"
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _user_tautulli_name(user: dict) -> str:
+    """Read TAUTULLI_USERNAME from a user's UserValves dict-or-Pydantic-model."""
+    if not user:
+        return ""
+    valves = user.get("valves") if isinstance(user, dict) else None
+    if valves is None:
+        return ""
+    if hasattr(valves, "TAUTULLI_USERNAME"):
+        return valves.TAUTULLI_USERNAME or ""
+    if isinstance(valves, dict):
+        return valves.get("TAUTULLI_USERNAME", "") or ""
+    return ""
+
 
 class Tools:
     """Tautulli analytics tools for Midnight."""
@@ -106,9 +541,49 @@ class Tools:
             default="",
             description="Tautulli API key"
         )
+        ACTIVITY_POLL_SECONDS: int = Field(
+            default=10,
+            description="How often one shared background poller refreshes current activity; every 'who's watching?' question reads that snapshot"
+        )
+        USERS_REFRESH_SECONDS: int = Field(
+            default=3600,
+            description="How often the Tautulli user list (for matching OpenWebUI users to Plex accounts) is refreshed"
+        )
+        HISTORY_DB_PATH: str = Field(
+            default="data/midnight_tautulli_history.db",
+            description="SQLite file holding the local copy of Tautulli play history (relative to OpenWebUI's working directory, /app/backend in Docker; ':memory:' keeps it in RAM only)"
+        )
+        HISTORY_SYNC_SECONDS: int = Field(
+            default=300,
+            description="How often the local play history asks Tautulli for new plays"
+        )
+
+    class UserValves(BaseModel):
+        """Per-user preferences (set in OpenWebUI Account → Tools)."""
+        TAUTULLI_USERNAME: str = Field(
+            default="",
+            description="Your Plex username or Tautulli friendly name, if 'my history' picks the wrong account (default: matched by email, then name)",
+        )
 
     def __init__(self):
         self.valves = self.Valves()
+        self._users = TTLSnapshot(self._fetch_users)
+        self._user_map: dict = {}  # OpenWebUI user key -> (users snapshot version, Tautulli user or None)
+        self._home_stats = TTLCache(max_entries=16)  # time range (days) -> {stat_id: rows}
+        self._db = None  # (HISTORY_DB_PATH, sqlite3 connection)
+        self._history = TTLSnapshot(self._sync_history)
+        self._history_revision = 0  # bumped whenever a sync changes warehouse rows
+        self._history_rewrites = 0  # bumped when a sync updates rows or inserts below the newest id
+        self._play_table = None  # NumPy columns over the warehouse, see _get_play_table
+        self._poller = None  # background get_activity task, running while someone asks
+        self._activity = None  # get_activity data from the last successful poll
+        self._activity_error = None  # exception from the last poll, if it failed
+        self._activity_ready = None  # asyncio.Event, set once the current poller has polled
+        self._activity_read = 0.0  # time.monotonic() of the last read
+        self._activity_events = deque(maxlen=ACTIVITY_EVENT_LOG)  # (seq, time, "started"/"stopped", session)
+        self._activity_seq = 0
+        self._activity_cursors = {}  # OpenWebUI user id -> (seq, time) of their last get_activity_changes
+        self._tracking_since = 0.0  # when the current poller started
 
     async def _api_call(self, cmd: str, params: dict = None) -> dict:
         """Make Tautulli API call. Raises on transport/HTTP error."""
@@ -125,20 +600,330 @@ class Tools:
         )
         return body.get("response", {}).get("data", {})
 
+    def _connect(self) -> sqlite3.Connection:
+        """The history warehouse for HISTORY_DB_PATH, created on first use."""
+        path = self.valves.HISTORY_DB_PATH
+        if self._db is None or self._db[0] != path:
+            if path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = sqlite3.connect(path)
+            db.executescript(HISTORY_SCHEMA)
+            self._db = (path, db)
+        return self._db[1]
+
+    async def _import_pages(self, db: sqlite3.Connection, params: dict, start: int = 0, progress: str = None) -> None:
+        """
+        Upsert get_history pages from offset `start` until the list is exhausted.
+
+        Each page is committed as it arrives, together with the next offset
+        under `progress` in sync_state when given, so an interrupted walk can
+        resume there. Bumps `_history_revision` for any page that changed a
+        row, and `_history_rewrites` as well when that change was more than
+        appending plays newer than every stored id (an update, or an older
+        play filled in), so the play table knows it can't simply append.
+        Raises on transport/HTTP error.
+        """
+        while True:
+            data = await self._api_call("get_history", {**params, "start": start})
+            rows = (data or {}).get("data") or []
+            values = [
+                tuple((row.get("started") or row.get("date")) if col == "started" else row.get(col) for col in HISTORY_COLUMNS)
+                for row in rows
+                if row.get("id") is not None and (row.get("started") or row.get("date"))
+            ]
+            ids = [v[0] for v in values]
+            newest_id = db.execute("SELECT MAX(id) FROM history").fetchone()[0]
+            known = {r[0] for r in db.execute(f"SELECT id FROM history WHERE id IN ({', '.join('?' * len(ids))})", ids)} if ids else set()
+            added = [i for i in ids if i not in known]
+            changes = db.total_changes
+            db.executemany(HISTORY_UPSERT, values)
+            changed = db.total_changes - changes
+            if changed:
+                self._history_revision += 1
+                if changed > len(added) or (newest_id is not None and min(added, default=newest_id) < newest_id):
+                    self._history_rewrites += 1
+            start += len(rows)
+            if progress:
+                db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (progress, start))
+            db.commit()
+            if len(rows) < HISTORY_PAGE_SIZE or start >= (data or {}).get("recordsFiltered", 0):
+                return
+
+    async def _sync_history(self) -> int:
+        """
+        Copy plays Tautulli has that the warehouse doesn't, newest first.
+
+        Until one walk through all of get_history has finished, every sync
+        continues it from the offset it reached (recorded in sync_state), so
+        a page that failed mid-import is retried rather than leaving a
+        permanent gap. Once the walk is complete, syncs pass only `after`
+        (the day before the newest stored play) so Tautulli returns the last
+        day or so. Rows are upserted by id and committed page by page, so a
+        still-running import already answers for recent windows. Unchanged
+        rows are left alone; any page that inserts or updates a row bumps
+        `_history_revision`. Returns the number of plays stored. Raises on
+        transport/HTTP error.
+        """
+        db = self._connect()
+        newest = db.execute("SELECT MAX(started) FROM history").fetchone()[0]
+        state = dict(db.execute("SELECT key, value FROM sync_state"))
+        params = {"grouping": 0, "order_column": "date", "order_dir": "desc", "length": HISTORY_PAGE_SIZE}
+        if newest:
+            # `after` is a whole-day filter; the overlap is upserted in place
+            after = (datetime.fromtimestamp(newest) - timedelta(days=1)).strftime("%Y-%m-%d")
+            await self._import_pages(db, {**params, "after": after})
+        if not state.get("backfill_complete"):
+            # New plays only push older ones to higher offsets, so resuming re-reads overlap but skips nothing
+            await self._import_pages(db, params, start=state.get("backfill_offset", 0), progress="backfill_offset")
+            db.execute("INSERT OR REPLACE INTO sync_state VALUES ('backfill_complete', 1)")
+            db.commit()
+        return db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    async def _get_history_db(self, wait: float = 15.0) -> tuple:
+        """
+        The synced history warehouse, as (connection, note).
+
+        Syncs at most every HISTORY_SYNC_SECONDS; later syncs run in the
+        background while the current copy answers. If the first sync is
+        still running after `wait` seconds it carries on in the background,
+        and `note` says how far back the copy reaches so far; the same note
+        appears while an interrupted import waits for the next sync to
+        resume it. Raises when the first sync fails.
+        """
+        task = asyncio.ensure_future(self._history.get(self.valves.HISTORY_SYNC_SECONDS))
+        await asyncio.wait([task], timeout=wait)
+        if task.done():
+            task.result()
+        else:
+            task.cancel()  # the shielded sync keeps running
+        db = self._connect()
+        if db.execute("SELECT value FROM sync_state WHERE key = 'backfill_complete'").fetchone():
+            return db, ""
+        count, oldest = db.execute("SELECT COUNT(*), MIN(started) FROM history").fetchone()
+        since = datetime.fromtimestamp(oldest).strftime("%Y-%m-%d") if oldest else "nothing yet"
+        return db, f"\n⚠️ Still importing history from Tautulli — {count} plays so far (back to {since})."
+
+    @staticmethod
+    def _window_bounds(start: str, end: str) -> tuple:
+        """Epoch bounds [lo, hi) for YYYY-MM-DD `start`..`end` (both inclusive, local time; None = open)."""
+        lo = int(datetime.strptime(start, "%Y-%m-%d").timestamp()) if start else None
+        hi = int((datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)).timestamp()) if end else None
+        return lo, hi
+
+    @classmethod
+    def _history_window(cls, start: str, end: str) -> tuple:
+        """SQL conditions and parameters for YYYY-MM-DD `start`..`end`. Raises ValueError on a bad date."""
+        lo, hi = cls._window_bounds(start, end)
+        clauses = []
+        params = []
+        if lo is not None:
+            clauses.append("started >= ?")
+            params.append(lo)
+        if hi is not None:
+            clauses.append("started < ?")
+            params.append(hi)
+        return clauses, params
+
+    @staticmethod
+    def _local_seconds(started: np.ndarray) -> np.ndarray:
+        """Epoch seconds shifted to local wall-clock time (UTC offset looked up once per hour)."""
+        hours, inverse = np.unique(started // 3600, return_inverse=True)
+        offsets = np.array(
+            [datetime.fromtimestamp(int(h) * 3600).astimezone().utcoffset().total_seconds() for h in hours],
+            dtype=np.int64,
+        )
+        return started + offsets[inverse]
+
+    async def _get_play_table(self) -> tuple:
+        """
+        Every stored play as NumPy columns, as (table, note).
+
+        Columns (one entry per play): `started` (epoch), `local` (local
+        wall-clock seconds, for day/hour bucketing), `duration` (s),
+        `percent`, `media` (MEDIA_TYPE_CODES, 0 = other), `user` and `show`
+        (codes into `user_names` / `show_names`; show 0 for non-episodes).
+        After a sync that only added plays newer than every stored id, just
+        those rows are appended. A sync that updated rows or filled in older
+        plays (the first import runs newest-first) bumps `_history_rewrites`,
+        and the table is then rebuilt from scratch.
+        """
+        db, note = await self._get_history_db()
+        path = self.valves.HISTORY_DB_PATH
+        table = self._play_table
+        if table and (table["path"], table["rewrites"]) != (path, self._history_rewrites):
+            table = None
+        if table and table["revision"] == self._history_revision:
+            return table, note
+
+        last_id = table["last_id"] if table else -1
+        rows = db.execute(
+            "SELECT id, started, COALESCE(duration, 0), COALESCE(percent_complete, 0), "
+            "CASE media_type WHEN 'movie' THEN 1 WHEN 'episode' THEN 2 ELSE 0 END, "
+            "COALESCE(friendly_name, 'Unknown'), CASE WHEN media_type = 'episode' THEN grandparent_title END "
+            "FROM history WHERE id > ? ORDER BY id",
+            (last_id,),
+        ).fetchall()
+        if table is None:
+            table = {"last_id": -1, "user_vocab": {}, "show_vocab": {None: 0}, "user_names": [], "show_names": [""]}
+            for name in ("started", "local", "duration", "percent", "media"):
+                table[name] = np.zeros(0, dtype=np.int64)
+            table["user"] = np.zeros(0, dtype=np.int32)
+            table["show"] = np.zeros(0, dtype=np.int32)
+        if rows:
+            ids, started, duration, percent, media, users, shows = zip(*rows)
+            started = np.array(started, dtype=np.int64)
+            user_vocab = table["user_vocab"]
+            show_vocab = table["show_vocab"]
+            new = {
+                "started": started,
+                "local": self._local_seconds(started),
+                "duration": np.array(duration, dtype=np.int64),
+                "percent": np.array(percent, dtype=np.int64),
+                "media": np.array(media, dtype=np.int64),
+                "user": np.fromiter((user_vocab.setdefault(u, len(user_vocab)) for u in users), dtype=np.int32, count=len(rows)),
+                "show": np.fromiter((show_vocab.setdefault(t, len(show_vocab)) for t in shows), dtype=np.int32, count=len(rows)),
+            }
+            for name, column in new.items():
+                table[name] = np.concatenate([table[name], column])
+            table["last_id"] = ids[-1]
+            table["user_names"] = list(user_vocab)
+            table["show_names"] = [name or "" for name in show_vocab]
+        table.update(path=path, rewrites=self._history_rewrites, revision=self._history_revision)
+        self._play_table = table
+        return table, note
+
+    @staticmethod
+    def _match_user(db: sqlite3.Connection, user: str) -> Optional[str]:
+        """The stored friendly_name best matching `user` (typos tolerated)."""
+        names = [row[0] for row in db.execute("SELECT DISTINCT friendly_name FROM history WHERE friendly_name IS NOT NULL")]
+        matches = fuzzy_match(user, [(name, name) for name in names], threshold=0.6)
+        return matches[0][0] if matches else None
+
+    async def _fetch_users(self) -> list:
+        """Tautulli users as [{"user_id", "username", "friendly_name", "email"}]. Raises on error."""
+        data = await self._api_call("get_users")
+        return [
+            {key: user.get(key) or "" for key in ("user_id", "username", "friendly_name", "email")}
+            for user in data or []
+            if user.get("user_id")
+        ]
+
+    async def _resolve_user(self, user: dict) -> Optional[dict]:
+        """
+        The Tautulli user an OpenWebUI user is, or None if none matches.
+
+        Tries the user's TAUTULLI_USERNAME UserValve, then the OpenWebUI
+        email against Tautulli emails, then the OpenWebUI name (or email
+        local part) against usernames and friendly names, exactly and then
+        fuzzily. Matches are cached per OpenWebUI user until the user list
+        (refreshed every USERS_REFRESH_SECONDS) changes. Raises when the
+        user list can't be fetched.
+        """
+        users = await self._users.get(self.valves.USERS_REFRESH_SECONDS)
+        if not user:
+            return None
+        override = _user_tautulli_name(user).strip().lower()
+        email = (user.get("email") or "").strip().lower()
+        names = {n.strip().lower() for n in (user.get("name"), email.split("@")[0]) if n and n.strip()}
+        cache_key = (user.get("id") or email, override)
+        cached = self._user_map.get(cache_key)
+        if cached is not None and cached[0] == self._users.version:
+            return cached[1]
+
+        def by_name(wanted: set) -> Optional[dict]:
+            for candidate in users:
+                if {candidate["username"].lower(), candidate["friendly_name"].lower()} & wanted:
+                    return candidate
+            pairs = [(n, c) for c in users for n in (c["friendly_name"], c["username"]) if n]
+            for name in wanted:
+                matches = fuzzy_match(name, pairs, threshold=0.8)
+                if matches:
+                    return matches[0][1]
+            return None
+
+        if override:
+            match = by_name({override})
+        else:
+            match = next((c for c in users if email and c["email"].lower() == email), None) or by_name(names)
+        self._user_map[cache_key] = (self._users.version, match)
+        return match
+
+    async def _poll_activity(self) -> None:
+        """
+        Refresh the shared activity snapshot every ACTIVITY_POLL_SECONDS.
+
+        Consecutive snapshots are diffed by session_key into started/stopped
+        events. Exits once nobody has read the snapshot for
+        ACTIVITY_IDLE_SECONDS; the next read starts a new poller.
+        """
+        self._tracking_since = time.time()
+        previous = None
+        try:
+            while time.monotonic() - self._activity_read < ACTIVITY_IDLE_SECONDS:
+                try:
+                    data = await self._api_call("get_activity") or {}
+                except Exception as e:
+                    self._activity_error = e
+                else:
+                    sessions = {s.get("session_key"): s for s in data.get("sessions", [])}
+                    if previous is not None:
+                        now = time.time()
+                        changes = [("started", s) for k, s in sessions.items() if k not in previous]
+                        changes += [("stopped", s) for k, s in previous.items() if k not in sessions]
+                        for change, session in changes:
+                            self._activity_seq += 1
+                            self._activity_events.append((self._activity_seq, now, change, session))
+                    previous = sessions
+                    self._activity = data
+                    self._activity_error = None
+                self._activity_ready.set()
+                await asyncio.sleep(self.valves.ACTIVITY_POLL_SECONDS)
+        finally:
+            self._poller = None
+
+    async def _read_activity(self) -> dict:
+        """
+        The shared activity snapshot, starting the poller if none is running.
+
+        Waits only for a new poller's first poll. Raises the last poll's
+        error rather than serving an outdated snapshot.
+        """
+        self._activity_read = time.monotonic()
+        if self._poller is None:
+            self._activity_ready = asyncio.Event()
+            self._poller = asyncio.ensure_future(self._poll_activity())
+        await self._activity_ready.wait()
+        if self._activity_error is not None:
+            raise self._activity_error
+        return self._activity
+
+    @staticmethod
+    def _session_label(session: dict) -> str:
+        """**Title** (year) / **Show** S01E02 for one activity session."""
+        media_type = session.get("media_type", "unknown")
+        if media_type == "movie":
+            return f"**{session.get('title', 'Unknown')}** ({session.get('year', '')})"
+        if media_type == "episode":
+            season = int(session.get("parent_media_index") or 0)
+            episode = int(session.get("media_index") or 0)
+            return f"**{session.get('grandparent_title', 'Unknown')}** S{season:02d}E{episode:02d}"
+        return f"**{session.get('title', 'Unknown')}**"
+
     async def get_activity(self, __user__: dict = None, __event_emitter__=None) -> str:
         """
         Get current Plex activity - who's watching what right now.
         Use this when users ask who's watching, what's playing, or current streams.
-        If the active user matches a session's friendly_name, it is highlighted as "you".
+        The asking user's own stream (matched to their Tautulli account) is highlighted as "you".
 
         :param __user__: OpenWebUI user context (auto-injected). Used to label "your" stream.
         :return: Current streaming activity
         """
         await emit_status(__event_emitter__, "Fetching current Plex activity…")
-        try:
-            data = await self._api_call("get_activity")
-        except Exception as e:
-            return f"Tautulli error: {e}"
+        activity, me = await asyncio.gather(self._read_activity(), self._resolve_user(__user__), return_exceptions=True)
+        if isinstance(activity, Exception):
+            return f"Tautulli error: {activity}"
+        data = activity
+        me_id = None if isinstance(me, Exception) or me is None else str(me["user_id"])
 
         if not data:
             return "Tautulli returned no activity data."
@@ -149,15 +934,6 @@ class Tools:
         if stream_count == 0:
             return "🔴 No one is currently watching anything on Plex."
 
-        # Resolve the active user's display name for "you" highlighting
-        active_user = ""
-        if __user__:
-            active_user = (
-                __user__.get("name")
-                or __user__.get("email", "").split("@")[0]
-                or ""
-            ).lower()
-
         result = f"🟢 **{stream_count} active stream(s)**:\n\n"
 
         for session in sessions:
@@ -171,7 +947,7 @@ class Tools:
             state_icon = "▶️" if state == "playing" else "⏸️"
 
             user_label = f"**{user}**"
-            if active_user and active_user in user.lower():
+            if me_id is not None and str(session.get("user_id")) == me_id:
                 user_label = f"**you** ({user})"
 
             if media_type == "movie":
@@ -189,6 +965,44 @@ class Tools:
 
         return result
 
+    async def get_activity_changes(self, __user__: dict = None, __event_emitter__=None) -> str:
+        """
+        Show which streams started or stopped since this user last asked.
+        Use this for "anything new since I checked?", "did anyone stop
+        watching?" or "what changed on Plex?".
+
+        :param __user__: OpenWebUI user context (auto-injected). Each user has their own "last asked".
+        :return: Streams started/stopped since the last ask, and how many are active now
+        """
+        await emit_status(__event_emitter__, "Checking Plex activity changes…")
+        try:
+            data = await self._read_activity()
+        except Exception as e:
+            return f"Tautulli error: {e}"
+
+        user_key = (__user__ or {}).get("id") or "default"
+        last = self._activity_cursors.get(user_key)
+        self._activity_cursors[user_key] = (self._activity_seq, time.time())
+        since_seq, since_time = last or (0, self._tracking_since)
+        events = [event for event in self._activity_events if event[0] > since_seq]
+        clock = datetime.fromtimestamp(since_time).strftime("%H:%M")
+
+        result = f"Plex activity since {'you last asked' if last else 'tracking began'} ({clock}):\n\n"
+        if last and last[1] < self._tracking_since:
+            tracked = datetime.fromtimestamp(self._tracking_since).strftime("%H:%M")
+            result += f"⚠️ Activity wasn't tracked before {tracked} — changes earlier than that are unknown.\n"
+        if self._activity_events and self._activity_events[0][0] > since_seq + 1:
+            result += "⚠️ Older changes were dropped from the log; only the most recent are shown.\n"
+        if not events:
+            result += "No streams started or stopped.\n"
+        for _, at, change, session in events:
+            icon = "▶️" if change == "started" else "⏹️"
+            who = session.get("friendly_name", "Unknown")
+            result += f"{icon} {datetime.fromtimestamp(at).strftime('%H:%M')} **{who}** {change} {self._session_label(session)}\n"
+
+        result += f"\nNow: {int(data.get('stream_count') or 0)} active stream(s)."
+        return result
+
     async def get_watch_history(self, count: int = 15, __event_emitter__=None) -> str:
         """
         Get recent watch history from Plex.
@@ -232,62 +1046,512 @@ class Tools:
 
         return result
 
-    async def get_most_watched(self, days: int = 30, __event_emitter__=None) -> str:
+    async def _get_home_stats(self, days: int, stat_ids: list) -> tuple:
+        """
+        Home-stat rows for a time range, as ({stat_id: rows}, errors).
+
+        One get_home_stats call without a stat_id returns every stat group
+        the server has enabled in its home-stats cards. Wanted stat_ids that
+        call left out (a disabled card, or a server that doesn't answer with
+        a list of groups) are fetched concurrently one stat_id each. The
+        groups are cached per time range for HOME_STATS_CACHE_SECONDS, but
+        only once every wanted group was fetched. Raises on transport/HTTP
+        error of the combined call.
+        """
+        stats = self._home_stats.get(days)
+        fetched = stats is None
+        if fetched:
+            data = await self._api_call("get_home_stats", {"stats_count": HOME_STATS_COUNT, "time_range": days})
+            stats = {group.get("stat_id"): group.get("rows") or [] for group in data} if isinstance(data, list) else {}
+        missing = [stat_id for stat_id in stat_ids if stat_id not in stats]
+        if not missing:
+            if fetched:
+                self._home_stats.set(days, stats, HOME_STATS_CACHE_SECONDS)
+            return stats, []
+
+        responses = await asyncio.gather(
+            *[
+                self._api_call("get_home_stats", {"stat_id": stat_id, "stats_count": HOME_STATS_COUNT, "time_range": days})
+                for stat_id in missing
+            ],
+            return_exceptions=True,
+        )
+        stats = dict(stats)
+        errors = []
+        for stat_id, resp in zip(missing, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{stat_id}: {resp}")
+            else:
+                stats[stat_id] = (resp or {}).get("rows") or []
+        if not errors:
+            self._home_stats.set(days, stats, HOME_STATS_CACHE_SECONDS)
+        return stats, errors
+
+    async def _me_or_error(self, user: dict) -> tuple:
+        """(Tautulli user, None) for the asking user, or (None, message to return)."""
+        try:
+            me = await self._resolve_user(user)
+        except Exception as e:
+            return None, f"Tautulli error: {e}"
+        if me is None:
+            return None, (
+                "Couldn't match you to a Plex account in Tautulli. Set your Plex username as "
+                "TAUTULLI_USERNAME in this tool's user settings (Account → Tools)."
+            )
+        return me, None
+
+    async def get_my_history(self, count: int = 15, __user__: dict = None, __event_emitter__=None) -> str:
+        """
+        Get the asking user's own recent watch history.
+        Use this when users ask "what did I watch?", "my history" or "where was I?".
+
+        :param count: Number of history items to show (default 15)
+        :param __user__: OpenWebUI user context (auto-injected). Matched to a Tautulli user.
+        :return: The user's recent plays with dates and completion
+        """
+        await emit_status(__event_emitter__, "Fetching your watch history…")
+        me, error = await self._me_or_error(__user__)
+        if error:
+            return error
+        try:
+            data = await self._api_call("get_history", {"user_id": me["user_id"], "length": count})
+        except Exception as e:
+            return f"Tautulli error: {e}"
+
+        history = (data or {}).get("data") or []
+        name = me["friendly_name"] or me["username"]
+        if not history:
+            return f"No watch history for {name}."
+
+        result = f"Recent watch history for **{name}**:\n\n"
+        for item in history:
+            day = datetime.fromtimestamp(int(item.get("date") or 0)).strftime("%b %d")
+            percent = item.get("percent_complete")
+            done = f" ({percent}%)" if percent is not None else ""
+            media_type = item.get("media_type", "unknown")
+            if media_type == "movie":
+                result += f"🎬 {day} — **{item.get('title', 'Unknown')}** ({item.get('year', '')}){done}\n"
+            elif media_type == "episode":
+                season = int(item.get("parent_media_index") or 0)
+                episode = int(item.get("media_index") or 0)
+                result += (
+                    f"📺 {day} — **{item.get('grandparent_title', 'Unknown')}** S{season:02d}E{episode:02d} - "
+                    f"{item.get('title', 'Unknown')}{done}\n"
+                )
+            else:
+                result += f"🎵 {day} — **{item.get('title', 'Unknown')}**{done}\n"
+        return result
+
+    async def get_my_stats(self, days: int = 30, __user__: dict = None, __event_emitter__=None) -> str:
+        """
+        Get the asking user's own viewing statistics.
+        Use this when users ask "how much have I watched?", "my stats" or "what do I watch most?".
+
+        :param days: Period for the top titles (default 30)
+        :param __user__: OpenWebUI user context (auto-injected). Matched to a Tautulli user.
+        :return: The user's watch time (24 h, 7 days, `days`, all time), devices, and top titles
+        """
+        await emit_status(__event_emitter__, "Fetching your viewing stats…")
+        me, error = await self._me_or_error(__user__)
+        if error:
+            return error
+        user_id = me["user_id"]
+        watch_time, players, top = await asyncio.gather(
+            self._api_call("get_user_watch_time_stats", {"user_id": user_id, "query_days": f"1,7,{days},0"}),
+            self._api_call("get_user_player_stats", {"user_id": user_id}),
+            self._api_call("get_home_stats", {"user_id": user_id, "time_range": days, "stats_count": HOME_STATS_COUNT}),
+            return_exceptions=True,
+        )
+        parts = {"watch time": watch_time, "devices": players, "top titles": top}
+        errors = [f"{label}: {resp}" for label, resp in parts.items() if isinstance(resp, Exception)]
+        if len(errors) == len(parts):
+            return f"Tautulli error: {'; '.join(errors)}"
+
+        result = f"Viewing stats for **{me['friendly_name'] or me['username']}**:\n\n"
+        if not isinstance(watch_time, Exception):
+            result += "**Watch time:**\n"
+            for row in watch_time or []:
+                span = {1: "Last 24 hours", 7: "Last 7 days", 0: "All time"}.get(int(row.get("query_days") or 0), f"Last {row.get('query_days')} days")
+                result += f"  • {span}: {row.get('total_plays', 0)} plays, {int(row.get('total_time') or 0) / 3600:.1f} h\n"
+        if not isinstance(players, Exception) and players:
+            result += "\n**Devices:**\n"
+            for row in players[:HOME_STATS_COUNT]:
+                result += f"  • {row.get('player_name') or row.get('platform', 'Unknown')} ({row.get('total_plays', 0)} plays)\n"
+        if not isinstance(top, Exception) and isinstance(top, list):
+            groups = {group.get("stat_id"): group.get("rows") or [] for group in top}
+            for stat_id, header in (("top_movies", "Top movies"), ("top_tv", "Top shows")):
+                if groups.get(stat_id):
+                    result += f"\n**{header} (last {days} days):**\n"
+                    for i, row in enumerate(groups[stat_id][:HOME_STATS_COUNT], 1):
+                        result += f"  {i}. {row.get('title', 'Unknown')} ({row.get('total_plays', 0)} plays)\n"
+
+        if errors:
+            result += f"\n⚠️ Partial results — {'; '.join(errors)}"
+        return result
+
+    async def get_most_watched(self, days: int = 30, categories: str = "movies,tv,users", __event_emitter__=None) -> str:
         """
         Get most watched content statistics.
         Use this when users ask about popular content, top watched, or stats.
+        Also answers "which devices/libraries get used most?" and "what's
+        the most concurrent streams we've had?" via `categories`.
 
         :param days: Time period in days (default 30)
+        :param categories: Comma-separated: movies, tv, users, platforms, libraries, concurrent, or "all" (default "movies,tv,users")
         :return: Most watched movies and shows
         """
+        wanted = list(HOME_STATS) if categories.strip().lower() == "all" else [
+            c.strip().lower() for c in categories.split(",") if c.strip()
+        ]
+        unknown = [c for c in wanted if c not in HOME_STATS]
+        if unknown or not wanted:
+            return f"Unknown stat category {', '.join(unknown) or repr(categories)}. Use: {', '.join(HOME_STATS)}, or all."
+
         await emit_status(__event_emitter__, f"Computing most-watched stats for last {days} days…")
-        result = f"Most watched content (last {days} days):\n\n"
-        sections_added = 0
-        errors = []
+        try:
+            stats, errors = await self._get_home_stats(days, [HOME_STATS[c][0] for c in wanted])
+        except Exception as e:
+            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
+            return f"Tautulli error: {e}"
 
-        for stat_id, header in (
-            ("top_movies", "**Top Movies:**"),
-            ("top_tv", "**Top TV Shows:**"),
-            ("top_users", "**Most Active Users:**"),
-        ):
-            try:
-                data = await self._api_call("get_home_stats", {
-                    "stat_id": stat_id,
-                    "stats_count": 5,
-                    "time_range": days,
-                })
-            except Exception as e:
-                errors.append(f"{stat_id}: {e}")
-                continue
+        if errors and not stats:
+            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
+            return f"Tautulli error: {'; '.join(errors)}"
 
-            rows = data.get("rows") if data else None
+        result = f"Most watched content (last {days} days):\n\n"
+        sections_added = 0
+        for category in wanted:
+            stat_id, header = HOME_STATS[category]
+            rows = stats.get(stat_id)
             if not rows:
                 continue
 
             result += ("\n" if sections_added else "") + header + "\n"
             sections_added += 1
-            for i, item in enumerate(rows[:5], 1):
+            for i, item in enumerate(rows[:HOME_STATS_COUNT], 1):
+                plays = item.get("total_plays", 0)
                 if stat_id == "top_movies":
                     title = item.get("title", "Unknown")
                     year = item.get("year", "")
-                    plays = item.get("total_plays", 0)
                     year_str = f" ({year})" if year else ""
                     result += f"  {i}. {title}{year_str} ({plays} plays)\n"
                 elif stat_id == "top_tv":
                     title = item.get("title", "Unknown")
-                    plays = item.get("total_plays", 0)
                     result += f"  {i}. {title} ({plays} plays)\n"
-                else:
+                elif stat_id == "top_users":
                     user = item.get("friendly_name", "Unknown")
-                    plays = item.get("total_plays", 0)
                     result += f"  {i}. {user} ({plays} plays)\n"
+                elif stat_id == "top_platforms":
+                    platform = item.get("platform", "Unknown")
+                    result += f"  {i}. {platform} ({plays} plays)\n"
+                elif stat_id == "top_libraries":
+                    library = item.get("section_name", "Unknown")
+                    result += f"  {i}. {library} ({plays} plays)\n"
+                else:
+                    label = item.get("title", "Streams")
+                    result += f"  • {label}: {item.get('count', 0)}\n"
 
-        if errors and sections_added == 0:
-            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
-            return f"Tautulli error: {'; '.join(errors)}"
+        if sections_added == 0:
+            result += "No plays recorded in this period.\n"
 
         if errors:
             result += f"\n⚠️ Partial results — {'; '.join(errors)}"
 
         await emit_status(__event_emitter__, "Done", done=True)
         return result
+
+    async def query_history(
+        self, start: str = "", end: str = "", user: str = "", title: str = "", limit: int = 25, __event_emitter__=None
+    ) -> str:
+        """
+        Look up plays in any date range from the local copy of Plex watch history.
+        Use this for questions about older viewing ("what did we watch last
+        Christmas?", "when did Sam last watch Severance?") that go beyond
+        the most recent plays.
+
+        :param start: First day to include, YYYY-MM-DD (default: beginning of history)
+        :param end: Last day to include, YYYY-MM-DD (default: today)
+        :param user: Only this user's plays (typos tolerated)
+        :param title: Only plays whose movie, episode or show title contains this
+        :param limit: Maximum plays to list, newest first (default 25)
+        :return: Matching plays with dates, newest first, and the total count
+        """
+        await emit_status(__event_emitter__, "Searching local watch history…")
+        try:
+            clauses, params = self._history_window(start, end)
+        except ValueError:
+            return f"Invalid date range '{start}'..'{end}'. Use YYYY-MM-DD."
+        try:
+            db, note = await self._get_history_db()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
+            return f"Tautulli error: {e}"
+
+        if user:
+            name = self._match_user(db, user)
+            if name is None:
+                return f"No plays by a user named '{user}' in Tautulli history." + note
+            clauses.append("friendly_name = ?")
+            params.append(name)
+        if title:
+            clauses.append("(title LIKE ? OR grandparent_title LIKE ?)")
+            params += [f"%{title}%", f"%{title}%"]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        total = db.execute(f"SELECT COUNT(*) FROM history {where}", params).fetchone()[0]
+        if not total:
+            return "No plays match that window and filters." + note
+        rows = db.execute(
+            f"SELECT started, friendly_name, media_type, title, grandparent_title, parent_media_index, media_index, year "
+            f"FROM history {where} ORDER BY started DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+
+        result = f"Plays found: {total} (showing {len(rows)}, newest first):\n\n"
+        for started, who, media_type, item_title, show, season, episode, year in rows:
+            day = datetime.fromtimestamp(started).strftime("%b %d, %Y")
+            if media_type == "episode":
+                result += f"📺 {day} — **{who}** watched **{show}** S{season or 0:02d}E{episode or 0:02d} - {item_title}\n"
+            elif media_type == "movie":
+                result += f"🎬 {day} — **{who}** watched **{item_title}** ({year})\n"
+            else:
+                result += f"🎵 {day} — **{who}** played **{item_title}**\n"
+
+        await emit_status(__event_emitter__, "Done", done=True)
+        return result + note
+
+    async def get_history_stats(
+        self, start: str = "", end: str = "", user: str = "", group_by: str = "user", top: int = 10, __event_emitter__=None
+    ) -> str:
+        """
+        Play counts and watch hours over any date range, from the local copy of history.
+        Use this for "who watched the most this year?", "what did I watch
+        most in 2023?", "which devices get used?" or "viewing per month".
+
+        :param start: First day to include, YYYY-MM-DD (default: beginning of history)
+        :param end: Last day to include, YYYY-MM-DD (default: today)
+        :param user: Only this user's plays (typos tolerated)
+        :param group_by: "user", "title" (episodes count under their show), "platform", "media_type", or "month"
+        :param top: How many groups to list (default 10)
+        :return: Plays and hours watched per group, plus the window's totals
+        """
+        group_by = group_by.lower().strip()
+        if group_by not in HISTORY_GROUPS:
+            return f"Unsupported grouping '{group_by}'. Use {', '.join(repr(g) for g in HISTORY_GROUPS)}."
+        await emit_status(__event_emitter__, f"Aggregating watch history by {group_by}…")
+        try:
+            clauses, params = self._history_window(start, end)
+        except ValueError:
+            return f"Invalid date range '{start}'..'{end}'. Use YYYY-MM-DD."
+        try:
+            db, note = await self._get_history_db()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
+            return f"Tautulli error: {e}"
+
+        scope = ""
+        if user:
+            name = self._match_user(db, user)
+            if name is None:
+                return f"No plays by a user named '{user}' in Tautulli history." + note
+            clauses.append("friendly_name = ?")
+            params.append(name)
+            scope = f" for **{name}**"
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        plays, seconds = db.execute(f"SELECT COUNT(*), COALESCE(SUM(duration), 0) FROM history {where}", params).fetchone()
+        if not plays:
+            return "No plays in that window." + note
+        order = "grp DESC" if group_by == "month" else "plays DESC"
+        rows = db.execute(
+            f"SELECT {HISTORY_GROUPS[group_by]} AS grp, COUNT(*) AS plays, COALESCE(SUM(duration), 0) "
+            f"FROM history {where} GROUP BY grp ORDER BY {order} LIMIT ?",
+            params + [top],
+        ).fetchall()
+
+        window = f"{start or 'start of history'} to {end or 'today'}"
+        result = f"Watch history{scope}, {window}: {plays} plays, {seconds / 3600:.1f} hours\n\n"
+        result += f"**By {group_by.replace('_', ' ')}:**\n"
+        for i, (label, count, duration) in enumerate(rows, 1):
+            result += f"  {i}. {label or 'Unknown'} — {count} plays, {duration / 3600:.1f} h\n"
+
+        await emit_status(__event_emitter__, "Done", done=True)
+        return result + note
+
+    @staticmethod
+    def _watch_time_report(table: dict, rows: np.ndarray, weeks: int, top: int) -> str:
+        """Hours watched per user in each of the last `weeks` weeks (Monday-based, local time)."""
+        days = table["local"][rows] // 86400
+        week = (days + 3) // 7  # 1970-01-01 was a Thursday
+        first = week.max() - weeks + 1
+        recent = week >= first
+        n_users = len(table["user_names"])
+        cells = table["user"][rows][recent].astype(np.int64) * weeks + (week[recent] - first)
+        hours = np.bincount(cells, weights=table["duration"][rows][recent], minlength=n_users * weeks)
+        hours = hours.reshape(n_users, weeks) / 3600
+        totals = hours.sum(axis=1)
+        order = [u for u in np.argsort(-totals, kind="stable")[:top] if totals[u] > 0]
+
+        starts = [datetime.fromtimestamp(int((first + k) * 7 - 3) * 86400, timezone.utc).strftime("%b %d") for k in range(weeks)]
+        result = f"**Watch time per user (hours, weeks starting):**\n\n| User | {' | '.join(starts)} | Total |\n"
+        result += "|---" * (weeks + 2) + "|\n"
+        for u in order:
+            cells_str = " | ".join(f"{h:.1f}" for h in hours[u])
+            result += f"| {table['user_names'][u]} | {cells_str} | {totals[u]:.1f} |\n"
+        return result
+
+    @staticmethod
+    def _heatmap_report(table: dict, rows: np.ndarray) -> str:
+        """Hours watched by day of week and hour of day, as a shaded grid."""
+        local = table["local"][rows]
+        weekday = (local // 86400 + 3) % 7
+        hour = (local % 86400) // 3600
+        grid = np.bincount(weekday * 24 + hour, weights=table["duration"][rows], minlength=168).reshape(7, 24) / 3600
+        levels = np.ceil(grid / grid.max() * (len(HEATMAP_SHADES) - 1)).astype(int) if grid.max() > 0 else np.zeros((7, 24), int)
+        peak_day, peak_hour = np.unravel_index(np.argmax(grid), grid.shape)
+
+        result = "**When people watch (hours by day and hour, local time):**\n\n```\n     0     6     12    18\n"
+        for d in range(7):
+            result += f"{WEEKDAYS[d]}  {''.join(HEATMAP_SHADES[level] for level in levels[d])}\n"
+        result += "```\n"
+        result += f"Busiest slot: {WEEKDAYS[peak_day]} {peak_hour:02d}:00 ({grid[peak_day, peak_hour]:.1f} h)\n"
+        return result
+
+    @staticmethod
+    def _completion_report(table: dict, rows: np.ndarray, top: int) -> str:
+        """Share of plays watched to COMPLETED_PERCENT, per media type and per user."""
+        finished = (table["percent"][rows] >= COMPLETED_PERCENT).astype(np.float64)
+        result = f"**Completion (plays watched to {COMPLETED_PERCENT}%+):**\n"
+        media = table["media"][rows]
+        plays = np.bincount(media, minlength=3)
+        done = np.bincount(media, weights=finished, minlength=3)
+        for label, code in (("Movies", MEDIA_TYPE_CODES["movie"]), ("Episodes", MEDIA_TYPE_CODES["episode"])):
+            if plays[code]:
+                result += f"  • {label}: {done[code] / plays[code]:.0%} ({int(done[code])} of {plays[code]} plays)\n"
+
+        users = table["user"][rows]
+        plays = np.bincount(users, minlength=len(table["user_names"]))
+        done = np.bincount(users, weights=finished, minlength=len(table["user_names"]))
+        for u in [u for u in np.argsort(-plays, kind="stable")[:top] if plays[u]]:
+            result += f"  • {table['user_names'][u]}: {done[u] / plays[u]:.0%} of {plays[u]} plays\n"
+        return result
+
+    @staticmethod
+    def _binge_report(table: dict, rows: np.ndarray, episodes: int, hours: float, top: int) -> str:
+        """
+        Binge sessions: at least `episodes` episodes of one show by one user
+        within `hours`. Overlapping qualifying windows merge into one session.
+        """
+        header = f"**Binge sessions ({episodes}+ episodes of one show within {hours:g} h):**\n"
+        rows = rows[table["media"][rows] == MEDIA_TYPE_CODES["episode"]]
+        n_shows = len(table["show_names"])
+        order = rows[np.lexsort((table["started"][rows], table["show"][rows], table["user"][rows]))]
+        key = table["user"][order].astype(np.int64) * n_shows + table["show"][order]
+        started = table["started"][order]
+        span = int(hours * 3600)
+        if len(order) < episodes:
+            return header + "  None found.\n"
+
+        # Window i covers plays i..i+episodes-1; sorted by key, equal ends mean one user and show
+        last = np.arange(episodes - 1, len(order))
+        first = last - (episodes - 1)
+        qualifies = (key[last] == key[first]) & (started[last] - started[first] <= span)
+        member = np.zeros(len(order), dtype=bool)
+        for offset in range(episodes):
+            member[first[qualifies] + offset] = True
+        if not member.any():
+            return header + "  None found.\n"
+
+        idx = np.flatnonzero(member)
+        continues = np.zeros(len(idx), dtype=bool)
+        continues[1:] = (key[idx[1:]] == key[idx[:-1]]) & (started[idx[1:]] - started[idx[:-1]] <= span)
+        session = np.cumsum(~continues) - 1
+        sizes = np.bincount(session)
+        session_first = idx[~continues]
+
+        users = table["user"][order][session_first]
+        per_user = np.bincount(users, minlength=len(table["user_names"]))
+        result = header + f"  {len(sizes)} sessions — " + ", ".join(
+            f"{table['user_names'][u]} {per_user[u]}" for u in np.argsort(-per_user, kind="stable") if per_user[u]
+        ) + "\n"
+        for s in np.argsort(-sizes, kind="stable")[:top]:
+            play = session_first[s]
+            day = datetime.fromtimestamp(int(started[play])).strftime("%b %d, %Y")
+            result += (
+                f"  • {table['user_names'][table['user'][order][play]]} — "
+                f"{table['show_names'][table['show'][order][play]]}: {sizes[s]} episodes on {day}\n"
+            )
+        return result
+
+    async def get_viewing_analytics(
+        self,
+        report: str = "all",
+        start: str = "",
+        end: str = "",
+        user: str = "",
+        weeks: int = 8,
+        binge_episodes: int = 3,
+        binge_hours: float = 4.0,
+        top: int = 10,
+        __event_emitter__=None,
+    ) -> str:
+        """
+        Viewing-habit analytics from the local copy of watch history.
+        Use this for "how much TV does everyone watch per week?", "when do we
+        usually watch?", "do we finish what we start?" or "who binges what?".
+
+        :param report: "watch_time" (hours per user per week), "heatmap" (day × hour), "completion", "binges", or "all" (default)
+        :param start: First day to include, YYYY-MM-DD (default: beginning of history)
+        :param end: Last day to include, YYYY-MM-DD (default: today)
+        :param user: Only this user's plays (typos tolerated)
+        :param weeks: Weeks shown by the watch_time report (default 8)
+        :param binge_episodes: Episodes of one show that make a binge (default 3)
+        :param binge_hours: ...watched within this many hours (default 4)
+        :param top: How many users/sessions to list (default 10)
+        :return: The requested analytics sections
+        """
+        reports = ("watch_time", "heatmap", "completion", "binges")
+        report = report.lower().strip()
+        if report != "all" and report not in reports:
+            return f"Unknown report '{report}'. Use {', '.join(repr(r) for r in reports)}, or 'all'."
+        try:
+            lo, hi = self._window_bounds(start, end)
+        except ValueError:
+            return f"Invalid date range '{start}'..'{end}'. Use YYYY-MM-DD."
+
+        await emit_status(__event_emitter__, "Analyzing viewing habits…")
+        try:
+            table, note = await self._get_play_table()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Tautulli unreachable", done=True)
+            return f"Tautulli error: {e}"
+
+        keep = np.ones(len(table["started"]), dtype=bool)
+        if lo is not None:
+            keep &= table["started"] >= lo
+        if hi is not None:
+            keep &= table["started"] < hi
+        scope = ""
+        if user:
+            matches = fuzzy_match(user, [(name, code) for code, name in enumerate(table["user_names"])], threshold=0.6)
+            if not matches:
+                return f"No plays by a user named '{user}' in Tautulli history." + note
+            keep &= table["user"] == matches[0][1]
+            scope = f" for **{matches[0][0]}**"
+        rows = np.flatnonzero(keep)
+        if not rows.size:
+            return "No plays in that window." + note
+
+        sections = []
+        if report in ("all", "watch_time"):
+            sections.append(self._watch_time_report(table, rows, max(1, weeks), top))
+        if report in ("all", "heatmap"):
+            sections.append(self._heatmap_report(table, rows))
+        if report in ("all", "completion"):
+            sections.append(self._completion_report(table, rows, top))
+        if report in ("all", "binges"):
+            sections.append(self._binge_report(table, rows, max(2, binge_episodes), binge_hours, top))
+
+        window = f"{start or 'start of history'} to {end or 'today'}"
+        await emit_status(__event_emitter__, "Done", done=True)
+        return f"Viewing analytics{scope}, {window} ({rows.size} plays):\n\n" + "\n".join(sections) + note
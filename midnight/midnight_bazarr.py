@@ -14,6 +14,18 @@ from pydantic import BaseModel, Field
 
 # {{INLINE_SHARED}}
 
+CATALOGUE_PAGE_SIZE = 500  # rows per /api/movies or /api/series page
+CATALOGUE_CONCURRENCY = 4  # pages requested at once after the first
+WANTED_SHOWN = 10  # rows listed per wanted list (movies, episodes)
+WANTED_PAGE_SIZE = 100  # /wanted page length when filtering by language
+WANTED_SCAN_LIMIT = 5000  # rows read per wanted list before giving up on a rare language
+
+# kind -> (label, Bazarr id field, id filter param, subtitle-state fields kept per item)
+CATALOGUES = {
+    "movies": ("Movies", "radarrId", "radarrid[]", ("subtitles", "missing_subtitles")),
+    "series": ("Series", "sonarrSeriesId", "seriesid[]", ("episodeMissingCount", "episodeFileCount")),
+}
+
 
 class Tools:
     """Bazarr subtitle management tools for Midnight."""
@@ -28,6 +40,14 @@ class Tools:
             default="",
             description="Bazarr API key"
         )
+        CATALOGUE_REFRESH_SECONDS: int = Field(
+            default=600,
+            description="Reuse the paged movie/series catalogue (the title index check_subtitles searches) for this many seconds before refreshing it in the background"
+        )
+        LIVE_SUBTITLE_STATE: bool = Field(
+            default=True,
+            description="After matching a title in the cached catalogue, fetch the matched items' current subtitle state in one targeted request. Off = answer from the catalogue snapshot alone."
+        )
 
     class UserValves(BaseModel):
         """Per-user preferences (set in OpenWebUI Account → Tools)."""
@@ -38,11 +58,152 @@ class Tools:
 
     def __init__(self):
         self.valves = self.Valves()
+        self._catalogues: dict = {}  # (url, api_key, kind) -> TTLSnapshot of compact items
+        self._title_indexes: dict = {}  # kind -> (snapshot, version, {title key: [item]})
 
     def _get_headers(self) -> dict:
         """Get API headers."""
         return {"X-API-KEY": self.valves.BAZARR_API_KEY}
 
+    @staticmethod
+    def _compact(kind: str, item: dict) -> dict:
+        """Keep only what check_subtitles renders: id, title and the kind's subtitle-state fields."""
+        _, id_field, _, fields = CATALOGUES[kind]
+        record = {"id": item.get(id_field), "title": item.get("title", "")}
+        for field in fields:
+            value = item.get(field)
+            if isinstance(value, list):
+                value = [s.get("code2", "??") for s in value]
+            record[field] = value
+        return record
+
+    async def _fetch_catalogue(self, url: str, api_key: str, kind: str) -> list:
+        """
+        Page through /api/movies or /api/series with start/length.
+
+        The first page reports `total`; the remaining pages are requested
+        concurrently (at most CATALOGUE_CONCURRENCY at a time) using the page
+        size the server actually honoured. Items are compacted and
+        deduplicated by id. Raises on transport/HTTP error.
+        """
+        headers = {"X-API-KEY": api_key}
+        first = await http_get_json(f"{url}/api/{kind}", headers=headers, params={"start": 0, "length": CATALOGUE_PAGE_SIZE})
+        items = list(first.get("data", []))
+        step = len(items)
+        gate = asyncio.Semaphore(CATALOGUE_CONCURRENCY)
+
+        async def page(start: int) -> list:
+            async with gate:
+                body = await http_get_json(f"{url}/api/{kind}", headers=headers, params={"start": start, "length": step})
+            return body.get("data", [])
+
+        if step:
+            for rows in await asyncio.gather(*[page(start) for start in range(step, first.get("total", step), step)]):
+                items.extend(rows)
+        by_id = {}
+        for item in items:
+            record = self._compact(kind, item)
+            by_id.setdefault(record["id"], record)
+        return list(by_id.values())
+
+    async def _iter_wanted(self, kind: str, page_size: int):
+        """
+        Async-iterate /api/movies/wanted or /api/episodes/wanted, one start/length page at a time.
+
+        Stops after the last page (per `total`) or an empty page. Callers
+        that stop early never request the remaining pages.
+        """
+        start = 0
+        while True:
+            body = await http_get_json(
+                f"{self.valves.BAZARR_URL.rstrip('/')}/api/{kind}/wanted",
+                headers=self._get_headers(),
+                params={"start": start, "length": page_size},
+            )
+            rows = body.get("data", [])
+            for row in rows:
+                yield row
+            start += len(rows)
+            if not rows or start >= body.get("total", 0):
+                return
+
+    async def _collect_wanted(self, kind: str, langs: list) -> tuple:
+        """
+        Walk one wanted list until WANTED_SHOWN rows missing one of `langs` are found.
+
+        Returns (rows, more). Without a language filter every row counts, so
+        a single page of WANTED_SHOWN + 1 rows is enough. With one, pages of
+        WANTED_PAGE_SIZE are read until the budget is full, the list ends, or
+        WANTED_SCAN_LIMIT rows have been read. `more` means matching rows may
+        remain unread.
+        """
+        rows = []
+        scanned = 0
+        pages = self._iter_wanted(kind, WANTED_PAGE_SIZE if langs else WANTED_SHOWN + 1)
+        try:
+            async for row in pages:
+                codes = [s.get("code2", "").lower() for s in row.get("missing_subtitles") or []]
+                if not langs or any(c in langs for c in codes):
+                    if len(rows) >= WANTED_SHOWN:
+                        return rows, True
+                    rows.append(row)
+                scanned += 1
+                if scanned >= WANTED_SCAN_LIMIT:
+                    return rows, True
+            return rows, False
+        finally:
+            await pages.aclose()
+
+    async def _get_title_index(self, kind: str) -> tuple:
+        """
+        Return (items, {title key: [item]}) for one catalogue kind.
+
+        The catalogue is a TTLSnapshot per (url, api_key, kind), so only the
+        first call waits for the paged load; the index is rebuilt only when
+        the snapshot version moves. Raises if the first load fails.
+        """
+        url = self.valves.BAZARR_URL.rstrip("/")
+        api_key = self.valves.BAZARR_API_KEY
+        snap = self._catalogues.get((url, api_key, kind))
+        if snap is None:
+            snap = self._catalogues[(url, api_key, kind)] = TTLSnapshot(lambda: self._fetch_catalogue(url, api_key, kind))
+        items = await snap.get(self.valves.CATALOGUE_REFRESH_SECONDS)
+        cached = self._title_indexes.get(kind)
+        if cached and cached[0] is snap and cached[1] == snap.version:
+            return items, cached[2]
+        index = {}
+        for item in items:
+            index.setdefault(title_key(item["title"]), []).append(item)
+        self._title_indexes[kind] = (snap, snap.version, index)
+        return items, index
+
+    async def _lookup(self, kind: str, title: str) -> tuple:
+        """
+        Match `title` in one catalogue and return (items, note).
+
+        An exact normalised-title hit is a dict lookup; otherwise the top 5
+        fuzzy matches (>= 0.6). With LIVE_SUBTITLE_STATE the matched items'
+        current state is fetched in one id-filtered request; if that fails
+        the snapshot state is returned with a note instead.
+        """
+        items, index = await self._get_title_index(kind)
+        matches = index.get(title_key(title))
+        if not matches:
+            matches = [item for _, item, _ in fuzzy_match(title, [(i["title"], i) for i in items], threshold=0.6)[:5]]
+        if not matches or not self.valves.LIVE_SUBTITLE_STATE:
+            return matches, None
+        label, _, param, _ = CATALOGUES[kind]
+        try:
+            body = await http_get_json(
+                f"{self.valves.BAZARR_URL.rstrip('/')}/api/{kind}",
+                headers=self._get_headers(),
+                params={param: [item["id"] for item in matches]},
+            )
+        except Exception as e:
+            return matches, f"{label} subtitle state is from the cached catalogue — live refresh failed: {e}"
+        fresh = {r["id"]: r for r in (self._compact(kind, item) for item in body.get("data", []))}
+        return [fresh.get(item["id"], item) for item in matches], None
+
     async def check_subtitles(self, title: str, __event_emitter__=None) -> str:
         """
         Check subtitle status for a movie or TV show.
@@ -54,12 +215,12 @@ class Tools:
         await emit_status(__event_emitter__, f"Checking Bazarr for '{title}'…")
         results = []
         errors = []
+        notes = []
 
-        # Fan out movies + series queries in parallel
-        headers = self._get_headers()
+        # Movies + series lookups in parallel; each is an index hit once the catalogue is warm
         movies_resp, series_resp = await asyncio.gather(
-            http_get_json(f"{self.valves.BAZARR_URL}/api/movies", headers=headers),
-            http_get_json(f"{self.valves.BAZARR_URL}/api/series", headers=headers),
+            self._lookup("movies", title),
+            self._lookup("series", title),
             return_exceptions=True,
         )
 
@@ -67,18 +228,17 @@ class Tools:
         if isinstance(movies_resp, Exception):
             errors.append(f"Movies query failed: {movies_resp}")
         else:
-            movies = movies_resp.get("data", [])
-            candidates = [(m.get("title", ""), m) for m in movies]
-            for movie_title, movie, score in fuzzy_match(title, candidates, threshold=0.6)[:5]:
-                missing = movie.get("missing_subtitles", [])
-                existing = movie.get("subtitles", [])
+            movies, note = movies_resp
+            if note:
+                notes.append(note)
+            for movie in movies:
+                missing = movie.get("missing_subtitles") or []
+                existing = movie.get("subtitles") or []
                 result = f"🎬 **{movie.get('title')}**\n"
                 if existing:
-                    langs = [s.get("code2", "??") for s in existing]
-                    result += f"  ✓ Subtitles: {', '.join(langs)}\n"
+                    result += f"  ✓ Subtitles: {', '.join(existing)}\n"
                 if missing:
-                    langs = [s.get("code2", "??") for s in missing]
-                    result += f"  ✗ Missing: {', '.join(langs)}\n"
+                    result += f"  ✗ Missing: {', '.join(missing)}\n"
                 if not existing and not missing:
                     result += "  No subtitle data available\n"
                 results.append(result)
@@ -87,11 +247,12 @@ class Tools:
         if isinstance(series_resp, Exception):
             errors.append(f"Series query failed: {series_resp}")
         else:
-            series = series_resp.get("data", [])
-            candidates = [(s.get("title", ""), s) for s in series]
-            for show_title, show, score in fuzzy_match(title, candidates, threshold=0.6)[:5]:
-                episodes_missing = show.get("episodeMissingCount", 0)
-                episodes_total = show.get("episodeFileCount", 0)
+            series, note = series_resp
+            if note:
+                notes.append(note)
+            for show in series:
+                episodes_missing = show.get("episodeMissingCount") or 0
+                episodes_total = show.get("episodeFileCount") or 0
                 result = f"📺 **{show.get('title')}**\n"
                 if episodes_missing > 0:
                     result += f"  ⚠️ {episodes_missing} episodes missing subtitles\n"
@@ -108,6 +269,8 @@ class Tools:
             return f"No content found matching '{title}' in Bazarr. Try checking the spelling."
 
         output = "Subtitle status:\n\n" + "\n".join(results)
+        if notes:
+            output += f"\n\n⚠️ {'; '.join(notes)}"
         if errors:
             output += f"\n\n⚠️ Partial results — {'; '.join(errors)}"
         await emit_status(__event_emitter__, f"Found {len(results)} result(s)", done=True)
@@ -131,48 +294,44 @@ class Tools:
             pref_raw = user_valves.get("PREFERRED_LANGUAGES", "") if isinstance(user_valves, dict) else ""
         pref_langs = [c.strip().lower() for c in (pref_raw or "").split(",") if c.strip()]
 
-        def langs_match(missing_list):
-            if not pref_langs:
-                return True
-            codes = [s.get("code2", "").lower() for s in (missing_list or [])]
-            return any(c in pref_langs for c in codes)
-
         result = "Content missing subtitles:\n\n"
         if pref_langs:
             result = f"Content missing subtitles (filtered to {','.join(pref_langs)}):\n\n"
         count = 0
         errors = []
+        truncated = False
 
-        # Fan out movies-wanted + episodes-wanted queries in parallel
-        headers = self._get_headers()
+        # Walk movies-wanted + episodes-wanted concurrently; each stops paging once its list is full
         movies_resp, episodes_resp = await asyncio.gather(
-            http_get_json(f"{self.valves.BAZARR_URL}/api/movies/wanted", headers=headers, params={"length": 20}),
-            http_get_json(f"{self.valves.BAZARR_URL}/api/episodes/wanted", headers=headers, params={"length": 20}),
+            self._collect_wanted("movies", pref_langs),
+            self._collect_wanted("episodes", pref_langs),
             return_exceptions=True,
         )
 
         if isinstance(movies_resp, Exception):
             errors.append(f"Movies-wanted query failed: {movies_resp}")
         else:
-            movies = movies_resp.get("data", [])
-            filtered_movies = [m for m in movies if langs_match(m.get("missing_subtitles", []))]
-            if filtered_movies:
+            movies, more = movies_resp
+            truncated = truncated or more
+            if movies:
                 result += "**Movies:**\n"
-                for movie in filtered_movies[:10]:
+                for movie in movies:
                     title = movie.get("title", "Unknown")
                     missing = movie.get("missing_subtitles", [])
                     langs = [s.get("code2", "??") for s in missing]
                     result += f"  • {title} (missing: {', '.join(langs)})\n"
                     count += 1
+                if more:
+                    result += "  • …and more\n"
 
         if isinstance(episodes_resp, Exception):
             errors.append(f"Episodes-wanted query failed: {episodes_resp}")
         else:
-            episodes = episodes_resp.get("data", [])
-            filtered_eps = [e for e in episodes if langs_match(e.get("missing_subtitles", []))]
-            if filtered_eps:
+            episodes, more = episodes_resp
+            truncated = truncated or more
+            if episodes:
                 result += "\n**TV Episodes:**\n"
-                for ep in filtered_eps[:10]:
+                for ep in episodes:
                     show = ep.get("seriesTitle", "Unknown")
                     season = ep.get("season", 0)
                     episode = ep.get("episode", 0)
@@ -180,11 +339,20 @@ class Tools:
                     langs = [s.get("code2", "??") for s in missing]
                     result += f"  • {show} S{season:02d}E{episode:02d} (missing: {', '.join(langs)})\n"
                     count += 1
+                if more:
+                    result += "  • …and more\n"
 
         if errors and count == 0:
             return f"Bazarr error: {'; '.join(errors)}"
 
         if count == 0:
+            if truncated:
+                return (
+                    f"No wanted item among the first {WANTED_SCAN_LIMIT} per list is missing "
+                    f"{','.join(pref_langs)} subtitles; older wanted items were not checked."
+                )
+            if pref_langs:
+                return f"✓ No content is missing {','.join(pref_langs)} subtitles!"
             return "✓ No content is missing subtitles!"
 
         if errors:
@@ -3,20 +3,25 @@ title: Midnight Radarr Tool
 author: Peter Marino
 description: Search and query movies from Radarr for the Midnight media assistant
 required_open_webui_version: 0.4.0
-requirements: httpx, pydantic
+requirements: httpx, pydantic, numpy
 version: 2.1.0
 licence: MIT
 """
 
+import asyncio
 from typing import Optional
+import numpy as np
 from pydantic import BaseModel, Field
 
 # {{INLINE_SHARED}}
 
 
-class Tools:
+class Tools(ArrInstances):
     """Radarr movie library tools for Midnight."""
 
+    SERVICE = "Radarr"
+    VALVE_PREFIX = "RADARR"
+
     class Valves(BaseModel):
         """Configuration for Radarr API connection."""
         RADARR_URL: str = Field(
@@ -27,20 +32,65 @@ class Tools:
             default="",
             description="Radarr API key"
         )
+        LIBRARY_CACHE_SECONDS: int = Field(
+            default=300,
+            description="Reuse the fetched movie library for this many seconds before refreshing it in the background"
+        )
+        RADARR_EXTRA_INSTANCES: str = Field(
+            default="",
+            description="Additional Radarr instances (e.g. 4K, anime) as 'label|url|api_key', separated by ';'. Queried alongside RADARR_URL, which is labelled 'main'."
+        )
 
     def __init__(self):
         self.valves = self.Valves()
+        self._libraries: dict = {}  # (url, api_key) -> TTLSnapshot of /api/v3/movie
+        self._profiles: dict = {}  # (url, api_key) -> TTLSnapshot of {profile_id: name}
+        self._merged = None  # (snapshot versions, deduplicated movie list)
+        self._storage_table = None  # columnar view of the snapshots, see _get_storage_table
 
-    def _get_headers(self) -> dict:
-        """Get API headers."""
-        return {"X-Api-Key": self.valves.RADARR_API_KEY}
+    async def _fetch_library(self, url: str, api_key: str) -> list:
+        """Fetch all movies from one Radarr instance. Raises on transport/HTTP error."""
+        return await http_get_json(f"{url}/api/v3/movie", headers=self._get_headers(api_key))
 
-    async def _get_all_movies(self) -> list:
-        """Fetch all movies from Radarr. Raises on transport/HTTP error."""
-        return await http_get_json(
-            f"{self.valves.RADARR_URL}/api/v3/movie",
-            headers=self._get_headers(),
-        )
+    @staticmethod
+    def _size_on_disk(movie: dict) -> float:
+        """Bytes on disk for one movie, as the storage table counts it."""
+        return movie.get("sizeOnDisk") or 0
+
+    async def _get_all_movies(self) -> tuple:
+        """
+        Return (movies, errors): the library merged across instances.
+
+        With one instance this is the snapshot itself. With several, movies are
+        deduplicated by tmdbId into copies carrying `_instances` (labels that
+        hold the title), `hasFile` if any copy has a file, and the summed
+        `sizeOnDisk`. Raises if no instance is reachable.
+        """
+        libraries, errors = await self._get_libraries()
+        if len(self._instances()) == 1:
+            return libraries[0][2], errors
+
+        key = tuple((label, snap.version) for label, snap, _ in libraries)
+        if self._merged and self._merged[0] == key:
+            return self._merged[1], errors
+
+        by_id = {}
+        merged = []
+        for label, _, movies in libraries:
+            for movie in movies:
+                tmdb_id = movie.get("tmdbId")
+                existing = by_id.get(tmdb_id) if tmdb_id else None
+                if existing is None:
+                    copy = dict(movie, _instances=[label])
+                    merged.append(copy)
+                    if tmdb_id:
+                        by_id[tmdb_id] = copy
+                else:
+                    existing["_instances"].append(label)
+                    existing["hasFile"] = existing.get("hasFile") or movie.get("hasFile", False)
+                    existing["sizeOnDisk"] = (existing.get("sizeOnDisk") or 0) + (movie.get("sizeOnDisk") or 0)
+        self._merged = (key, merged)
+        return merged, errors
 
     async def search_movies_by_title(self, query: str, __event_emitter__=None) -> str:
         """
@@ -68,12 +118,12 @@ class Tools:
             return f"For actor searches, please use the Plex tool's search_by_actor function to find movies with '{actor_name}'"
         
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         # Build candidates for fuzzy matching (title -> movie data)
         candidates = [(movie.get("title", ""), movie) for movie in movies]
@@ -91,22 +141,23 @@ class Tools:
                 "year": year,
                 "rating": rating,
                 "status": status,
+                "tag": self._instance_tag(movie),
                 "score": score
             })
 
         if not matches:
-            return f"No movies found matching '{query}' in the library. Try checking the spelling."
+            return self._with_partial(f"No movies found matching '{query}' in the library. Try checking the spelling.", errors)
 
         # Format results
         result = f"Found {len(matches)} movie(s) matching '{query}':\n\n"
         for m in matches[:15]:  # Limit to 15 results
             rating_str = f"⭐ {m['rating']}" if m['rating'] != "N/A" else ""
-            result += f"• **{m['title']}** ({m['year']}) {rating_str} - {m['status']}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} {rating_str} - {m['status']}\n"
 
         if len(matches) > 15:
             result += f"\n... and {len(matches) - 15} more."
 
-        return result
+        return self._with_partial(result, errors)
 
     async def list_movies_by_genre(self, genre: str, __event_emitter__=None) -> str:
         """
@@ -153,12 +204,12 @@ class Tools:
         }
         
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         genre_lower = genre.lower().strip()
         
@@ -187,11 +238,12 @@ class Tools:
                 matches.append({
                     "title": movie.get("title"),
                     "year": movie.get("year", "N/A"),
-                    "rating": movie.get("ratings", {}).get("imdb", {}).get("value", "N/A")
+                    "rating": movie.get("ratings", {}).get("imdb", {}).get("value", "N/A"),
+                    "tag": self._instance_tag(movie),
                 })
 
         if not matches:
-            return f"No '{genre}' movies found in the downloaded library."
+            return self._with_partial(f"No '{genre}' movies found in the downloaded library.", errors)
 
         def rating_value(value: object) -> float:
             try:
@@ -202,13 +254,13 @@ class Tools:
         result = f"Found {len(matches)} '{genre}' movie(s):\n\n"
         for m in sorted(matches, key=lambda x: rating_value(x.get("rating")), reverse=True)[:20]:
             rating_str = f"⭐ {m['rating']}" if m['rating'] != "N/A" else ""
-            result += f"• **{m['title']}** ({m['year']}) {rating_str}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} {rating_str}\n"
 
         if len(matches) > 20:
             result += f"\n... and {len(matches) - 20} more."
 
         await emit_status(__event_emitter__, f"Found {len(matches)} match(es)", done=True)
-        return result
+        return self._with_partial(result, errors)
 
     async def get_movie_details(self, title: str, __event_emitter__=None) -> str:
         """
@@ -220,12 +272,12 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Fetching details for '{title}'…")
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         # Strip year from query if present (e.g., "Movie Title (2024)" -> "Movie Title")
         import re
@@ -245,18 +297,94 @@ class Tools:
                 has_file = movie.get("hasFile", False)
                 status = "✓ Downloaded" if has_file else "✗ Not downloaded"
                 size_gb = movie.get("sizeOnDisk", 0) / (1024**3)
+                instances = ""
+                if movie.get("_instances"):
+                    instances = f"\n• **Instances**: {', '.join(movie['_instances'])}"
 
-                return f"""**{movie.get('title')}** ({year})
+                return self._with_partial(f"""**{movie.get('title')}** ({year})
 
-• **Status**: {status}
+• **Status**: {status}{instances}
 • **Runtime**: {runtime} minutes
 • **Genres**: {genres}
 • **Rating**: ⭐ {rating}/10
 • **Size**: {size_gb:.1f} GB
 
-**Overview**: {overview}"""
+**Overview**: {overview}""", errors)
+
+        return self._with_partial(f"Movie '{title}' not found in library.", errors)
+
+    async def get_storage_breakdown(self, group_by: str = "genre", top: int = 10, __event_emitter__=None) -> str:
+        """
+        Show what is using disk space in the movie library.
+        Use this when users ask how much space movies take, what's eating the disk,
+        or which movies are the largest.
+
+        :param group_by: How to group disk usage - "genre", "decade", or "quality" (quality profile)
+        :param top: How many groups and largest movies to list (default 10, 1-50)
+        :return: Disk usage per group plus the largest movies on disk
+        """
+        await emit_status(__event_emitter__, f"Computing Radarr storage by {group_by}…")
+        group_by = group_by.lower().strip()
+        if group_by not in ("genre", "decade", "quality"):
+            return f"Unsupported grouping '{group_by}'. Use 'genre', 'decade', or 'quality'."
+        top = max(1, min(top, 50))
+
+        try:
+            table, errors = await self._get_storage_table()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Radarr unreachable", done=True)
+            return f"Radarr error: {e}"
+
+        sizes = table["sizes"]
+        on_disk = sizes > 0
+        if not on_disk.any():
+            return self._with_partial("No movies with files on disk in Radarr.", errors)
+
+        gb = 1024 ** 3
+        if group_by == "genre":
+            rows = table["genre_rows"]
+            codes = table["genre_codes"]
+            keep = on_disk[rows]
+            n_groups = len(table["genre_names"])
+            totals = np.bincount(codes[keep], weights=sizes[rows][keep], minlength=n_groups)
+            counts = np.bincount(codes[keep], minlength=n_groups)
+            labels = table["genre_names"]
+        elif group_by == "decade":
+            decades = (table["years"] // 10) * 10
+            labels_arr, codes = np.unique(decades[on_disk], return_inverse=True)
+            totals = np.bincount(codes, weights=sizes[on_disk])
+            counts = np.bincount(codes)
+            labels = [f"{d}s" if d else "Unknown year" for d in labels_arr]
+        else:
+            codes = table["profile_codes"][on_disk]
+            n_groups = len(table["profile_names"])
+            totals = np.bincount(codes, weights=sizes[on_disk], minlength=n_groups)
+            counts = np.bincount(codes, minlength=n_groups)
+            labels = table["profile_names"]
+
+        order = np.argsort(totals)[::-1][:top]
+
+        k = min(top, int(on_disk.sum()))
+        largest = np.argpartition(sizes, -k)[-k:]
+        largest = largest[np.argsort(sizes[largest])[::-1]]
+
+        total_gb = sizes.sum() / gb
+        result = f"Radarr storage: {total_gb:,.1f} GB across {int(on_disk.sum())} movies on disk\n\n"
+        result += f"**By {group_by}:**\n"
+        for i in order:
+            if counts[i] == 0:
+                continue
+            result += f"  • {labels[i]} — {totals[i] / gb:,.1f} GB ({counts[i]} movies)\n"
+        if group_by == "genre":
+            result += "  *(movies with several genres count toward each of them)*\n"
+
+        result += "\n**Largest movies:**\n"
+        for rank, i in enumerate(largest, 1):
+            title, year, tag = table["titles"][i]
+            result += f"  {rank}. {title} ({year}){tag} — {sizes[i] / gb:.1f} GB\n"
 
-        return f"Movie '{title}' not found in library."
+        await emit_status(__event_emitter__, "Done", done=True)
+        return self._with_partial(result, errors)
 
     async def get_recent_movies(self, days: int = 30, __event_emitter__=None) -> str:
         """
@@ -270,12 +398,12 @@ class Tools:
         from datetime import datetime, timedelta
 
         try:
-            movies = await self._get_all_movies()
+            movies, errors = await self._get_all_movies()
         except Exception as e:
             return f"Radarr error: {e}"
 
         if not movies:
-            return "Radarr returned no movies. The library may be empty."
+            return self._with_partial("Radarr returned no movies. The library may be empty.", errors)
 
         cutoff = datetime.now() - timedelta(days=days)
         recent = []
@@ -292,18 +420,19 @@ class Tools:
                         recent.append({
                             "title": movie.get("title"),
                             "year": movie.get("year"),
-                            "added": added_date.strftime("%Y-%m-%d")
+                            "added": added_date.strftime("%Y-%m-%d"),
+                            "tag": self._instance_tag(movie),
                         })
                 except:
                     pass
 
         if not recent:
-            return f"No movies added in the last {days} days."
+            return self._with_partial(f"No movies added in the last {days} days.", errors)
 
         recent.sort(key=lambda x: x["added"], reverse=True)
         
         result = f"Movies added in the last {days} days:\n\n"
         for m in recent[:15]:
-            result += f"• **{m['title']}** ({m['year']}) - Added {m['added']}\n"
+            result += f"• **{m['title']}** ({m['year']}){m['tag']} - Added {m['added']}\n"
 
-        return result
+        return self._with_partial(result, errors)
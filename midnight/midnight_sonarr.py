@@ -3,20 +3,27 @@ title: Midnight Sonarr Tool
 author: Peter Marino
 description: Search and query TV shows from Sonarr for the Midnight media assistant
 required_open_webui_version: 0.4.0
-requirements: httpx, pydantic
+requirements: httpx, pydantic, numpy
 version: 2.1.0
 licence: MIT
 """
 
+import asyncio
+import re
+import time
 from typing import Optional
+import numpy as np
 from pydantic import BaseModel, Field
 
 # {{INLINE_SHARED}}
 
 
-class Tools:
+class Tools(ArrInstances):
     """Sonarr TV show library tools for Midnight."""
 
+    SERVICE = "Sonarr"
+    VALVE_PREFIX = "SONARR"
+
     class Valves(BaseModel):
         """Configuration for Sonarr API connection."""
         SONARR_URL: str = Field(
@@ -27,20 +34,593 @@ class Tools:
             default="",
             description="Sonarr API key"
         )
+        LIBRARY_CACHE_SECONDS: int = Field(
+            default=300,
+            description="Reuse the fetched series library for this many seconds before refreshing it in the background"
+        )
+        SONARR_EXTRA_INSTANCES: str = Field(
+            default="",
+            description="Additional Sonarr instances (e.g. 4K, anime) as 'label|url|api_key', separated by ';'. Queried alongside SONARR_URL, which is labelled 'main'."
+        )
+        CALENDAR_PREFETCH_DAYS: int = Field(
+            default=35,
+            description="Days of the airing calendar kept cached ahead of today; windows within this horizon need no Sonarr request"
+        )
+        CALENDAR_REFRESH_SECONDS: int = Field(
+            default=900,
+            description="How often the cached calendar is refreshed in the background"
+        )
+        EPISODE_INDEX_SECONDS: int = Field(
+            default=3600,
+            description="How long a show's cached episode list (titles, air dates, overviews) is reused before it is re-fetched"
+        )
+        EPISODE_INDEX_CONCURRENCY: int = Field(
+            default=4,
+            description="Maximum concurrent /api/v3/episode requests while indexing the whole library in the background"
+        )
+        EPISODE_FILE_REFRESH_SECONDS: int = Field(
+            default=21600,
+            description="How long the episode-file table (resolution, codec, size per file) is reused before it is rebuilt in the background"
+        )
 
     def __init__(self):
         self.valves = self.Valves()
+        self._libraries: dict = {}  # (url, api_key) -> TTLSnapshot of /api/v3/series
+        self._profiles: dict = {}  # (url, api_key) -> TTLSnapshot of {profile_id: name}
+        self._merged = None  # (snapshot versions, deduplicated series list)
+        self._title_index = None  # (snapshot versions, {lookup key: [(label, show)]})
+        self._storage_table = None  # columnar view of the snapshots, see _get_storage_table
+        self._calendars: dict = {}  # (url, api_key) -> TTLSnapshot of day-bucketed calendar
+        self._episode_index: dict = {}  # (url, api_key, series_id) -> TTLSnapshot of compact episode rows
+        self._hydration_task = None  # background whole-library episode indexing
+        self._hydrated_at = 0.0
+        self._episode_files: dict = {}  # (url, api_key) -> TTLSnapshot of per-file NumPy columns
+        self._file_table = None  # episode-file columns joined to series, see _get_file_table
+
+    async def _fetch_library(self, url: str, api_key: str) -> list:
+        """Fetch all TV series from one Sonarr instance. Raises on transport/HTTP error."""
+        return await http_get_json(f"{url}/api/v3/series", headers=self._get_headers(api_key))
+
+    @staticmethod
+    def _size_on_disk(show: dict) -> float:
+        """Bytes on disk for one show, as the storage table counts it."""
+        return (show.get("statistics") or {}).get("sizeOnDisk") or 0
+
+    async def _fan_out(self, path: str, params: dict = None) -> tuple:
+        """
+        GET `path` from every instance concurrently.
+
+        Returns ([(label, url, api_key, body)], errors). One unreachable
+        instance degrades to partial results; raises only when all failed.
+        """
+        instances = self._instances()
+        responses = await asyncio.gather(
+            *[http_get_json(f"{url}{path}", headers=self._get_headers(key), params=params) for _, url, key in instances],
+            return_exceptions=True,
+        )
+        bodies = []
+        errors = []
+        for (label, url, key), resp in zip(instances, responses):
+            if isinstance(resp, Exception):
+                errors.append(f"{label} ({url}): {resp}")
+            else:
+                bodies.append((label, url, key, resp))
+        if not bodies:
+            raise RuntimeError("; ".join(errors))
+        return bodies, errors
+
+    async def _iter_pages(self, url: str, api_key: str, path: str, params: dict, page_size: int = 50):
+        """
+        Async-iterate the records of a paged Sonarr endpoint, one page at a time.
+
+        Stops after the last page (per `totalRecords`) or an empty page. Callers
+        that stop early never request the remaining pages, and close the
+        generator (`aclose()`) so it is finalised right away rather than at GC.
+        """
+        page = 1
+        while True:
+            body = await http_get_json(
+                f"{url}{path}",
+                headers=self._get_headers(api_key),
+                params={**params, "page": page, "pageSize": page_size},
+            )
+            records = body.get("records", [])
+            for record in records:
+                yield record
+            if not records or page * page_size >= body.get("totalRecords", 0):
+                return
+            page += 1
+
+    async def _collect_recent_downloads(self, url: str, api_key: str, cutoff, limit: int) -> list:
+        """
+        Walk one instance's download history newest-first until `cutoff` or `limit`.
+
+        /api/v3/history has no date filter (and /history/since is unpaged), so
+        the cutoff is enforced by sorting on date descending and stopping at
+        the first older record. Re-downloads of the same episode (upgrades)
+        count once toward the limit.
+        """
+        from datetime import datetime
 
-    def _get_headers(self) -> dict:
-        """Get API headers."""
-        return {"X-Api-Key": self.valves.SONARR_API_KEY}
+        records = []
+        seen = set()
+        params = {
+            "eventType": 3,  # downloaded
+            "sortKey": "date",
+            "sortDirection": "descending",
+            "includeSeries": "true",
+            "includeEpisode": "true",
+        }
+        pages = self._iter_pages(url, api_key, "/api/v3/history", params, page_size=min(max(limit * 2, 20), 100))
+        try:
+            async for record in pages:
+                try:
+                    date = datetime.fromisoformat(record.get("date", "").replace("Z", "+00:00"))
+                except ValueError:
+                    continue
+                if date < cutoff:
+                    break
+                episode_id = record.get("episodeId")
+                if episode_id is not None:
+                    if episode_id in seen:
+                        continue
+                    seen.add(episode_id)
+                records.append(record)
+                if len(records) >= limit:
+                    break
+        finally:
+            await pages.aclose()
+        return records
+
+    async def _collect_missing(self, url: str, api_key: str, limit: int) -> tuple:
+        """
+        Walk one instance's /api/v3/wanted/missing newest-aired first, up to `limit` episodes.
 
-    async def _get_all_series(self) -> list:
-        """Fetch all TV series from Sonarr. Raises on transport/HTTP error."""
-        return await http_get_json(
-            f"{self.valves.SONARR_URL}/api/v3/series",
-            headers=self._get_headers(),
+        Returns (records, truncated). `truncated` means the walk stopped on the
+        budget with pages left unread, so more episodes may be missing.
+        """
+        records = []
+        params = {
+            "includeSeries": "true",
+            "monitored": "true",
+            "sortKey": "airDateUtc",
+            "sortDirection": "descending",
+        }
+        pages = self._iter_pages(url, api_key, "/api/v3/wanted/missing", params, page_size=min(max(limit + 1, 20), 100))
+        try:
+            async for record in pages:
+                if len(records) >= limit:
+                    return records, True
+                records.append(record)
+            return records, False
+        finally:
+            await pages.aclose()
+
+    async def _fetch_calendar_range(self, url: str, api_key: str, start, end) -> dict:
+        """
+        Fetch one instance's calendar for [start, end) as {local_date: [rows]}.
+
+        Requested without includeSeries — series metadata is joined from the
+        library snapshot at read time instead of being re-downloaded with
+        every episode. Rows are (series_id, season, episode, title,
+        airDateUtc). The request is padded a day each side so the buckets are
+        complete in local time whatever the UTC offset.
+        """
+        from datetime import datetime, timedelta
+
+        episodes = await http_get_json(
+            f"{url}/api/v3/calendar",
+            headers=self._get_headers(api_key),
+            params={
+                "start": (start - timedelta(days=1)).isoformat(),
+                "end": (end + timedelta(days=1)).isoformat(),
+                "includeSeries": "false",
+            },
         )
+        buckets = {}
+        for ep in episodes:
+            air = ep.get("airDateUtc")
+            if not air:
+                continue
+            day = datetime.fromisoformat(air.replace("Z", "+00:00")).astimezone().date()
+            if start <= day < end:
+                buckets.setdefault(day, []).append((
+                    ep.get("seriesId"),
+                    ep.get("seasonNumber", 0),
+                    ep.get("episodeNumber", 0),
+                    ep.get("title") or "TBA",
+                    air,
+                ))
+        return buckets
+
+    async def _fetch_calendar(self, url: str, api_key: str) -> dict:
+        """Prefetch CALENDAR_PREFETCH_DAYS from today into day buckets."""
+        from datetime import date, timedelta
+
+        start = date.today()
+        end = start + timedelta(days=self.valves.CALENDAR_PREFETCH_DAYS)
+        return {"start": start, "end": end, "buckets": await self._fetch_calendar_range(url, api_key, start, end)}
+
+    async def _calendar_window(self, url: str, api_key: str, start, end) -> list:
+        """
+        Rows airing in [start, end) for one instance, sliced from the cached buckets.
+
+        Windows inside the prefetched horizon cost nothing; anything reaching
+        outside it (last week, three months out) is fetched for that window only.
+        """
+        from datetime import timedelta
+
+        cal = await self._snapshot(self._calendars, self._fetch_calendar, url, api_key).get(
+            self.valves.CALENDAR_REFRESH_SECONDS
+        )
+        if cal["start"] <= start and end <= cal["end"]:
+            buckets = cal["buckets"]
+        else:
+            buckets = await self._fetch_calendar_range(url, api_key, start, end)
+        rows = []
+        day = start
+        while day < end:
+            rows.extend(buckets.get(day, ()))
+            day += timedelta(days=1)
+        return rows
+
+    async def _fetch_episodes(self, url: str, api_key: str, series_id: int) -> tuple:
+        """
+        Fetch one series' episodes as compact rows. Raises on transport/HTTP error.
+
+        Each row is (season, episode, title, air_date, overview, haystack) —
+        a tuple instead of Sonarr's ~40-field episode dict, with `haystack`
+        the lowercased "title\noverview" that searches scan.
+        """
+        episodes = await http_get_json(
+            f"{url}/api/v3/episode",
+            headers=self._get_headers(api_key),
+            params={"seriesId": series_id},
+        )
+        rows = []
+        for ep in episodes:
+            title = ep.get("title") or "TBA"
+            overview = ep.get("overview") or ""
+            rows.append((
+                ep.get("seasonNumber", 0),
+                ep.get("episodeNumber", 0),
+                title,
+                (ep.get("airDate") or "")[:10],
+                overview,
+                f"{title}\n{overview}".lower(),
+            ))
+        return tuple(rows)
+
+    def _episode_snapshot(self, url: str, api_key: str, series_id: int) -> TTLSnapshot:
+        """Per-series episode snapshot, created on first use."""
+        key = (url, api_key, series_id)
+        snap = self._episode_index.get(key)
+        if snap is None:
+            snap = self._episode_index[key] = TTLSnapshot(lambda: self._fetch_episodes(url, api_key, series_id))
+        return snap
+
+    async def _hydrate_episode_index(self) -> None:
+        """
+        Index every series' episodes, at most EPISODE_INDEX_CONCURRENCY at a time.
+
+        Only series that were never loaded or are older than
+        EPISODE_INDEX_SECONDS are fetched. A failed series stays unindexed
+        and is retried on the next hydration.
+        """
+        libraries, _ = await self._get_libraries()
+        urls = {label: (url, key) for label, url, key in self._instances()}
+        ttl = self.valves.EPISODE_INDEX_SECONDS
+        semaphore = asyncio.Semaphore(max(1, self.valves.EPISODE_INDEX_CONCURRENCY))
+
+        async def load(snap: TTLSnapshot) -> None:
+            async with semaphore:
+                try:
+                    await snap.get(ttl, force=True)
+                except Exception:
+                    pass
+
+        snaps = [
+            self._episode_snapshot(*urls[label], show.get("id"))
+            for label, _, series in libraries
+            for show in series
+        ]
+        await asyncio.gather(*[load(snap) for snap in snaps if snap.age() > ttl])
+        self._hydrated_at = time.monotonic()
+
+    def _start_hydration(self) -> None:
+        """Kick off background indexing unless it is running or ran recently."""
+        if self._hydration_task and not self._hydration_task.done():
+            return
+        if self._hydrated_at and time.monotonic() - self._hydrated_at < self.valves.EPISODE_INDEX_SECONDS:
+            return
+        self._hydration_task = asyncio.ensure_future(self._hydrate_episode_index())
+        self._hydration_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    @staticmethod
+    def _file_resolution(record: dict) -> int:
+        """Vertical resolution of an episode file (0 if unknown)."""
+        resolution = ((record.get("quality") or {}).get("quality") or {}).get("resolution")
+        if resolution:
+            return int(resolution)
+        _, _, height = ((record.get("mediaInfo") or {}).get("resolution") or "").partition("x")
+        return int(height) if height.isdigit() else 0
+
+    @staticmethod
+    def _file_codec(record: dict) -> str:
+        """Normalized video codec name of an episode file."""
+        codec = ((record.get("mediaInfo") or {}).get("videoCodec") or "").strip()
+        aliases = {"x265": "HEVC", "h265": "HEVC", "hevc": "HEVC", "x264": "H.264", "h264": "H.264", "avc": "H.264"}
+        return aliases.get(codec.lower(), codec or "Unknown")
+
+    async def _fetch_episode_files(self, url: str, api_key: str) -> dict:
+        """
+        Build one instance's episode-file table from /api/v3/episodefile?seriesId=.
+
+        Sonarr has no library-wide episode-file listing, so this costs one
+        request per series, at most EPISODE_INDEX_CONCURRENCY at a time. Only
+        the four columns the analytics need are kept, as NumPy arrays. Series
+        whose request fails are left out and counted in `failed`.
+        """
+        series = await self._snapshot(self._libraries, self._fetch_library, url, api_key).get(
+            self.valves.LIBRARY_CACHE_SECONDS
+        )
+        semaphore = asyncio.Semaphore(max(1, self.valves.EPISODE_INDEX_CONCURRENCY))
+
+        async def load(series_id: int):
+            async with semaphore:
+                return await http_get_json(
+                    f"{url}/api/v3/episodefile",
+                    headers=self._get_headers(api_key),
+                    params={"seriesId": series_id},
+                )
+
+        ids = [show.get("id") for show in series]
+        responses = await asyncio.gather(*[load(sid) for sid in ids], return_exceptions=True)
+
+        codec_vocab = {}
+        series_ids = []
+        resolutions = []
+        codecs = []
+        sizes = []
+        failed = 0
+        last_error = None
+        for series_id, files in zip(ids, responses):
+            if isinstance(files, Exception):
+                failed += 1
+                last_error = files
+                continue
+            for record in files:
+                series_ids.append(series_id)
+                resolutions.append(self._file_resolution(record))
+                codecs.append(codec_vocab.setdefault(self._file_codec(record), len(codec_vocab)))
+                sizes.append(record.get("size") or 0)
+        if failed == len(ids) and ids:
+            raise RuntimeError(f"all {failed} /api/v3/episodefile requests failed (last: {last_error})")
+        return {
+            "series_ids": np.asarray(series_ids, dtype=np.int64),
+            "resolutions": np.asarray(resolutions, dtype=np.int32),
+            "codec_codes": np.asarray(codecs, dtype=np.int32),
+            "codec_names": list(codec_vocab),
+            "sizes": np.asarray(sizes, dtype=np.float64),
+            "failed": failed,
+        }
+
+    async def _get_all_series(self) -> tuple:
+        """
+        Return (series, errors): the library merged across instances.
+
+        With one instance this is the snapshot itself. With several, shows are
+        deduplicated by tvdbId into copies carrying `_instances` (labels that
+        hold the show). Raises if no instance is reachable.
+        """
+        libraries, errors = await self._get_libraries()
+        if len(self._instances()) == 1:
+            return libraries[0][2], errors
+
+        key = tuple((label, snap.version) for label, snap, _ in libraries)
+        if self._merged and self._merged[0] == key:
+            return self._merged[1], errors
+
+        by_id = {}
+        merged = []
+        for label, _, series in libraries:
+            for show in series:
+                tvdb_id = show.get("tvdbId")
+                existing = by_id.get(tvdb_id) if tvdb_id else None
+                if existing is None:
+                    copy = dict(show, _instances=[label])
+                    merged.append(copy)
+                    if tvdb_id:
+                        by_id[tvdb_id] = copy
+                else:
+                    existing["_instances"].append(label)
+        self._merged = (key, merged)
+        return merged, errors
+
+    async def _get_title_index(self) -> tuple:
+        """
+        Return ({lookup key: [(label, show)]}, errors) over every instance's snapshot.
+
+        Keys are the normalised title, sortTitle and alternateTitles — each
+        also without a trailing "(US)" / "(2005)" disambiguator — plus
+        Sonarr's cleanTitle, "tvdb:<id>" and "imdb:<id>". Rebuilt only when a
+        library snapshot version moves.
+        """
+        libraries, errors = await self._get_libraries()
+        versions = tuple((label, snap.version) for label, snap, _ in libraries)
+        if self._title_index and self._title_index[0] == versions:
+            return self._title_index[1], errors
+
+        index = {}
+        for label, _, series in libraries:
+            for show in series:
+                names = [show.get("title"), show.get("sortTitle")]
+                names += [alt.get("title") for alt in show.get("alternateTitles") or []]
+                keys = {show.get("cleanTitle") or ""}
+                for name in filter(None, names):
+                    keys.add(title_key(name))
+                    keys.add(title_key(re.sub(r"\s*\([^)]*\)\s*$", "", name)))
+                if show.get("tvdbId"):
+                    keys.add(f"tvdb:{show['tvdbId']}")
+                if show.get("imdbId"):
+                    keys.add(f"imdb:{show['imdbId'].lower()}")
+                keys.discard("")
+                for key in keys:
+                    index.setdefault(key, []).append((label, show))
+        self._title_index = (versions, index)
+        return index, errors
+
+    async def _resolve_show(self, query: str) -> tuple:
+        """
+        Resolve a show title, alternate title, TVDb id or IMDb id to [(label, show)].
+
+        Exact index hits are O(1). Otherwise falls back to fuzzy matching over
+        every indexed title, keeping only the best-scoring shows. The same
+        show held by several instances appears once per instance (same
+        tvdbId). Returns (entries, errors); entries is empty when nothing matched.
+        """
+        index, errors = await self._get_title_index()
+        q = query.strip()
+        hits = index.get(title_key(q)) or index.get(title_key(re.sub(r"\s*\([^)]*\)\s*$", "", q)))
+        if not hits:
+            id_match = re.fullmatch(r"(?:tvdb[:\s]*)?(\d+)", q, re.IGNORECASE)
+            if id_match:
+                hits = index.get(f"tvdb:{id_match.group(1)}")
+            elif re.fullmatch(r"tt\d+", q, re.IGNORECASE):
+                hits = index.get(f"imdb:{q.lower()}")
+        if hits:
+            return list(hits), errors
+
+        candidates = []
+        seen = set()
+        for entries in index.values():
+            for label, show in entries:
+                if (label, show.get("id")) in seen:
+                    continue
+                seen.add((label, show.get("id")))
+                names = [show.get("title", "")] + [alt.get("title", "") for alt in show.get("alternateTitles") or []]
+                candidates.extend((name, (label, show)) for name in names if name)
+        matches = fuzzy_match(q, candidates, threshold=0.6)
+        if not matches:
+            return [], errors
+        best = matches[0][2]
+        entries = []
+        for _, (label, show), score in matches:
+            if score == best and all(show is not e[1] for e in entries):
+                entries.append((label, show))
+        return entries, errors
+
+    def _merge_episodes(self, bodies: list, records_of, episode_of, sort_key, reverse: bool = False) -> list:
+        """
+        Merge per-instance episode lists, deduplicated by (tvdbId, season, episode).
+
+        `records_of(body)` extracts the list from one instance's response and
+        `episode_of(record)` the episode dict. With several instances each
+        surviving record gets `_instances` listing every instance that had it.
+        """
+        multi = len(bodies) > 1 or len(self._instances()) > 1
+        by_key = {}
+        merged = []
+        for label, _, _, body in bodies:
+            for record in records_of(body):
+                episode = episode_of(record)
+                tvdb_id = (record.get("series") or {}).get("tvdbId")
+                key = (tvdb_id, episode.get("seasonNumber"), episode.get("episodeNumber")) if tvdb_id else None
+                existing = by_key.get(key) if key else None
+                if existing is not None:
+                    if multi and label not in existing["_instances"]:
+                        existing["_instances"].append(label)
+                    continue
+                if multi:
+                    record = dict(record, _instances=[label])
+                merged.append(record)
+                if key:
+                    by_key[key] = record
+        merged.sort(key=sort_key, reverse=reverse)
+        return merged
+
+    async def _get_file_table(self, wait: float = 15.0) -> tuple:
+        """
+        Episode-file columns for every instance, joined to series title and network.
+
+        Returns (table, errors), or (None, errors) while no instance's table
+        is ready and at least one first build is still running after `wait`
+        seconds — the build carries on in the background. Raises when every
+        instance's build failed. Afterwards stale tables are
+        served immediately and rebuilt in the background every
+        EPISODE_FILE_REFRESH_SECONDS. The joined table is cached until a
+        file or library snapshot version moves.
+        """
+        libraries, errors = await self._get_libraries()
+        urls = {label: (url, key) for label, url, key in self._instances()}
+        ttl = self.valves.EPISODE_FILE_REFRESH_SECONDS
+        snaps = [self._snapshot(self._episode_files, self._fetch_episode_files, *urls[label]) for label, _, _ in libraries]
+        pending = [asyncio.ensure_future(snap.get(ttl)) for snap in snaps]
+        await asyncio.wait(pending, timeout=wait)
+
+        parts = []
+        building = False
+        for (label, lib_snap, series), snap, task in zip(libraries, snaps, pending):
+            if not task.done():
+                task.cancel()  # the shielded build itself keeps running
+                building = True
+                errors.append(f"{label} ({urls[label][0]}): episode-file table still building")
+            elif task.exception() is not None:
+                errors.append(f"{label} ({urls[label][0]}): {task.exception()}")
+            else:
+                parts.append((label, lib_snap, series, snap))
+        if not parts:
+            if building:
+                return None, errors
+            raise RuntimeError("; ".join(errors))
+
+        key = tuple((label, lib_snap.version, snap.version) for label, lib_snap, _, snap in parts)
+        if self._file_table and self._file_table["key"] == key:
+            return self._file_table, errors
+
+        multi = len(urls) > 1
+        network_vocab = {}
+        codec_vocab = {}
+        show_names = []
+        show_networks = []
+        show_codes = []
+        codec_codes = []
+        for label, _, series, snap in parts:
+            columns = snap.value
+            tag = f" [{label}]" if multi else ""
+            local = {}
+            for show in series:
+                local[show.get("id")] = len(show_names)
+                show_names.append(f"{show.get('title', 'Unknown')}{tag}")
+                show_networks.append(network_vocab.setdefault(show.get("network") or "Unknown", len(network_vocab)))
+            # Files of a series removed since the library snapshot get their own row
+            unknown = len(show_names)
+            show_names.append(f"Unknown series{tag}")
+            show_networks.append(network_vocab.setdefault("Unknown", len(network_vocab)))
+            show_codes.append(np.fromiter(
+                (local.get(sid, unknown) for sid in columns["series_ids"].tolist()),
+                dtype=np.int64,
+                count=len(columns["series_ids"]),
+            ))
+            remap = np.asarray(
+                [codec_vocab.setdefault(name, len(codec_vocab)) for name in columns["codec_names"]] or [0],
+                dtype=np.int32,
+            )
+            codec_codes.append(remap[columns["codec_codes"]])
+
+        self._file_table = {
+            "key": key,
+            "shows": np.concatenate(show_codes),
+            "resolutions": np.concatenate([snap.value["resolutions"] for *_, snap in parts]),
+            "codec_codes": np.concatenate(codec_codes),
+            "codec_names": list(codec_vocab),
+            "sizes": np.concatenate([snap.value["sizes"] for *_, snap in parts]),
+            "show_names": show_names,
+            "show_networks": np.asarray(show_networks, dtype=np.int32),
+            "network_names": list(network_vocab),
+            "failed": sum(snap.value["failed"] for *_, snap in parts),
+        }
+        return self._file_table, errors
 
     async def search_tv_shows(self, query: str, __event_emitter__=None) -> str:
         """
@@ -52,12 +632,12 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Searching Sonarr for '{query}'…")
         try:
-            series = await self._get_all_series()
+            series, errors = await self._get_all_series()
         except Exception as e:
             return f"Sonarr error: {e}"
 
         if not series:
-            return "Sonarr returned no series. The library may be empty."
+            return self._with_partial("Sonarr returned no series. The library may be empty.", errors)
 
         # Build candidates for fuzzy matching
         candidates = [(show.get("title", ""), show) for show in series]
@@ -77,19 +657,20 @@ class Tools:
                 "episodes": f"{episodes_have}/{episodes_total}",
                 "network": show.get("network", "Unknown"),
                 "status": show.get("status", "Unknown"),
+                "tag": self._instance_tag(show),
                 "score": score
             })
 
         if not matches:
-            return f"No TV shows found matching '{query}' in the library. Try checking the spelling."
+            return self._with_partial(f"No TV shows found matching '{query}' in the library. Try checking the spelling.", errors)
 
         result = f"Found {len(matches)} TV show(s) matching '{query}':\n\n"
         for s in matches[:15]:
             status_icon = "🟢" if s['status'] == "continuing" else "🔴"
-            result += f"• **{s['title']}** ({s['year']}) - {s['seasons']} seasons, {s['episodes']} episodes {status_icon}\n"
+            result += f"• **{s['title']}** ({s['year']}){s['tag']} - {s['seasons']} seasons, {s['episodes']} episodes {status_icon}\n"
             result += f"  Network: {s['network']}\n"
 
-        return result
+        return self._with_partial(result, errors)
 
     async def list_shows_by_genre(self, genre: str, __event_emitter__=None) -> str:
         """
@@ -132,12 +713,12 @@ class Tools:
         }
         
         try:
-            series = await self._get_all_series()
+            series, errors = await self._get_all_series()
         except Exception as e:
             return f"Sonarr error: {e}"
 
         if not series:
-            return "Sonarr returned no series. The library may be empty."
+            return self._with_partial("Sonarr returned no series. The library may be empty.", errors)
 
         genre_lower = genre.lower().strip()
         
@@ -170,22 +751,23 @@ class Tools:
                     "seasons": stats.get("seasonCount", 0),
                     "episodes": stats.get("episodeFileCount", 0),
                     "status": show.get("status", "unknown"),
-                    "network": show.get("network", "Unknown")
+                    "network": show.get("network", "Unknown"),
+                    "tag": self._instance_tag(show),
                 })
 
         if not matches:
-            return f"No '{genre}' TV shows found in the library."
+            return self._with_partial(f"No '{genre}' TV shows found in the library.", errors)
 
         result = f"Found {len(matches)} '{genre}' TV show(s):\n\n"
         for s in sorted(matches, key=lambda x: x.get("year", 0), reverse=True)[:20]:
             status_icon = "🟢" if s['status'] == "continuing" else "🔴"
-            result += f"• **{s['title']}** ({s['year']}) - {s['seasons']} seasons {status_icon}\n"
+            result += f"• **{s['title']}** ({s['year']}){s['tag']} - {s['seasons']} seasons {status_icon}\n"
 
         if len(matches) > 20:
             result += f"\n... and {len(matches) - 20} more."
 
         await emit_status(__event_emitter__, f"Found {len(matches)} match(es)", done=True)
-        return result
+        return self._with_partial(result, errors)
 
     async def get_show_details(self, title: str, __event_emitter__=None) -> str:
         """
@@ -197,28 +779,42 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Fetching show details for '{title}'…")
         try:
-            series = await self._get_all_series()
+            entries, errors = await self._resolve_show(title)
         except Exception as e:
             return f"Sonarr error: {e}"
 
-        if not series:
-            return "Sonarr returned no series. The library may be empty."
+        if not entries:
+            return self._with_partial(f"TV show '{title}' not found in library.", errors)
 
-        title_lower = title.lower()
-        
-        for show in series:
-            if title_lower in show.get("title", "").lower():
-                year = show.get("year", "N/A")
-                network = show.get("network", "Unknown")
-                status = show.get("status", "Unknown")
-                overview = show.get("overview", "No overview available.")
-                genres = ", ".join(show.get("genres", []))
-                stats = show.get("statistics", {})
-                size_gb = stats.get("sizeOnDisk", 0) / (1024**3)
-                
-                status_text = "🟢 Continuing" if status == "continuing" else "🔴 Ended"
-                
-                result = f"""**{show.get('title')}** ({year})
+        label, chosen = entries[0]
+        holders = [lbl for lbl, show in entries if show.get("tvdbId") and show.get("tvdbId") == chosen.get("tvdbId")]
+        others = []
+        for _, show in entries:
+            other = show.get("title")
+            if show.get("tvdbId") != chosen.get("tvdbId") and other not in others:
+                others.append(other)
+
+        # Fresh detail for the chosen show only — the snapshot was just for resolving it
+        url, key = {lbl: (u, k) for lbl, u, k in self._instances()}[label]
+        try:
+            show = await http_get_json(f"{url}/api/v3/series/{chosen.get('id')}", headers=self._get_headers(key))
+        except Exception as e:
+            show = chosen
+            errors.append(f"live details from {label} ({url}) failed, showing cached data: {e}")
+
+        year = show.get("year", "N/A")
+        network = show.get("network", "Unknown")
+        status = show.get("status", "Unknown")
+        overview = show.get("overview", "No overview available.")
+        genres = ", ".join(show.get("genres", []))
+        stats = show.get("statistics", {})
+        size_gb = stats.get("sizeOnDisk", 0) / (1024**3)
+
+        status_text = "🟢 Continuing" if status == "continuing" else "🔴 Ended"
+        if len(self._instances()) > 1:
+            status_text += f"\n• **Instances**: {', '.join(holders or [label])}"
+
+        result = f"""**{show.get('title')}** ({year})
 
 • **Status**: {status_text}
 • **Network**: {network}
@@ -227,57 +823,409 @@ class Tools:
 
 **Seasons**:
 """
-                for season in show.get("seasons", []):
-                    snum = season.get("seasonNumber", 0)
-                    if snum == 0:
-                        continue  # Skip specials
-                    s_stats = season.get("statistics", {})
-                    s_have = s_stats.get("episodeFileCount", 0)
-                    s_total = s_stats.get("totalEpisodeCount", 0)
-                    pct = s_stats.get("percentOfEpisodes", 0)
-                    icon = "✓" if pct == 100 else "◐" if pct > 0 else "✗"
-                    result += f"  Season {snum}: {s_have}/{s_total} episodes {icon}\n"
+        for season in show.get("seasons", []):
+            snum = season.get("seasonNumber", 0)
+            if snum == 0:
+                continue  # Skip specials
+            s_stats = season.get("statistics", {})
+            s_have = s_stats.get("episodeFileCount", 0)
+            s_total = s_stats.get("totalEpisodeCount", 0)
+            pct = s_stats.get("percentOfEpisodes", 0)
+            icon = "✓" if pct == 100 else "◐" if pct > 0 else "✗"
+            result += f"  Season {snum}: {s_have}/{s_total} episodes {icon}\n"
+
+        result += f"\n**Overview**: {overview[:300]}..."
+        if others:
+            result += f"\n\n*(also matches: {', '.join(others[:5])})*"
+        return self._with_partial(result, errors)
+
+    async def search_episodes(self, query: str, show_name: str = "", limit: int = 10, __event_emitter__=None) -> str:
+        """
+        Find TV episodes by episode title or plot keywords.
+        Use this for questions like "which episode of The Office has the wedding?"
+        or "what season is the episode 'Ozymandias' in?". Searches Sonarr's
+        episode titles and synopses; it does not need Plex.
+
+        :param query: Episode title or words from the plot (e.g. "wedding")
+        :param show_name: Optional show to search within (e.g. "The Office"). Much faster when given.
+        :param limit: Maximum number of episodes to return (default 10)
+        :return: Matching episodes with season/episode numbers, air dates, and synopses
+        """
+        await emit_status(__event_emitter__, f"Searching Sonarr episodes for '{query}'…")
+        try:
+            if show_name:
+                shows, errors = await self._resolve_show(show_name)
+            else:
+                libraries, errors = await self._get_libraries()
+                shows = [(label, show) for label, _, series in libraries for show in series]
+        except Exception as e:
+            await emit_status(__event_emitter__, "Sonarr unreachable", done=True)
+            return f"Sonarr error: {e}"
+
+        urls = {label: (url, key) for label, url, key in self._instances()}
+        note = ""
+
+        if show_name:
+            if not shows:
+                return self._with_partial(f"TV show '{show_name}' not found in library.", errors)
+            shows = shows[:5]
+            # Load just these shows' episodes on demand
+            responses = await asyncio.gather(
+                *[
+                    self._episode_snapshot(*urls[label], show.get("id")).get(self.valves.EPISODE_INDEX_SECONDS)
+                    for label, show in shows
+                ],
+                return_exceptions=True,
+            )
+            for (label, show), resp in zip(shows, responses):
+                if isinstance(resp, Exception):
+                    errors.append(f"{show.get('title')} episodes ({label}): {resp}")
+        else:
+            # Whole-library search answers from whatever is indexed so far
+            self._start_hydration()
+            indexed = sum(
+                1 for label, show in shows
+                if self._episode_snapshot(*urls[label], show.get("id")).version
+            )
+            if indexed < len(shows):
+                note = (f"\n\n*(episode index still building: {indexed} of {len(shows)} shows indexed — "
+                        f"results may be incomplete; pass show_name for a complete answer)*")
+
+        query_lower = query.lower().strip()
+        words = query_lower.split()
+        hits = []
+        seen = set()
+        for label, show in shows:
+            rows = self._episode_snapshot(*urls[label], show.get("id")).value or ()
+            for row in rows:
+                haystack = row[5]
+                title_lower = haystack.partition("\n")[0]
+                if query_lower == title_lower:
+                    score = 3
+                elif query_lower in title_lower:
+                    score = 2
+                elif words and all(w in haystack for w in words):
+                    score = 1
+                else:
+                    continue
+                key = (show.get("tvdbId") or show.get("title"), row[0], row[1])
+                if key in seen:
+                    continue
+                seen.add(key)
+                hits.append((score, show.get("title", "Unknown"), row))
+
+        if not hits:
+            where = f" in '{shows[0][1].get('title')}'" if show_name else ""
+            await emit_status(__event_emitter__, "No matches", done=True)
+            return self._with_partial(f"No episodes matching '{query}' found{where}.{note}", errors)
+
+        hits.sort(key=lambda h: (-h[0], h[1], h[2][0], h[2][1]))
+        result = f"Episodes matching '{query}':\n\n"
+        for _, series_title, (season, episode, title, air_date, overview, _) in hits[:limit]:
+            aired = f" (aired {air_date})" if air_date else ""
+            result += f"• **{series_title}** S{season:02d}E{episode:02d} - {title}{aired}\n"
+            if overview:
+                snippet = overview if len(overview) <= 200 else overview[:200] + "…"
+                result += f"  {snippet}\n"
+        if len(hits) > limit:
+            result += f"\n... and {len(hits) - limit} more."
+
+        await emit_status(__event_emitter__, f"Found {len(hits)} episode(s)", done=True)
+        return self._with_partial(result + note, errors)
+
+    async def get_missing_episodes(self, limit: int = 50, __event_emitter__=None) -> str:
+        """
+        List monitored episodes that have aired but have no file, grouped by show and season.
+        Use this when users ask what's missing from their shows or which episodes haven't downloaded.
+
+        :param limit: Maximum number of missing episodes to gather, most recently aired first (default 50)
+        :return: Missing episodes per show and season
+        """
+        await emit_status(__event_emitter__, "Scanning Sonarr for missing episodes…")
+        try:
+            limit = max(1, limit)
+            instances = self._instances()
+            responses = await asyncio.gather(
+                *[self._collect_missing(url, key, limit) for _, url, key in instances],
+                return_exceptions=True,
+            )
+            bodies = []
+            errors = []
+            truncated = False
+            for (label, url, key), resp in zip(instances, responses):
+                if isinstance(resp, Exception):
+                    errors.append(f"{label} ({url}): {resp}")
+                else:
+                    records, more = resp
+                    truncated = truncated or more
+                    bodies.append((label, url, key, records))
+            if not bodies:
+                await emit_status(__event_emitter__, "Sonarr unreachable", done=True)
+                return f"Error fetching missing episodes: {'; '.join(errors)}"
+
+            episodes = self._merge_episodes(
+                bodies,
+                records_of=lambda records: records,
+                episode_of=lambda record: record,
+                sort_key=lambda ep: ep.get("airDateUtc") or "",
+                reverse=True,
+            )
+            if len(episodes) > limit:
+                episodes = episodes[:limit]
+                truncated = True
+
+            if not episodes:
+                await emit_status(__event_emitter__, "Nothing missing", done=True)
+                return self._with_partial("No missing episodes — every monitored, aired episode has a file.", errors)
+
+            # show title -> season -> [(episode number, label)]; dicts keep newest-aired shows first
+            grouped = {}
+            for ep in episodes:
+                show = (ep.get("series") or {}).get("title", "Unknown")
+                season = ep.get("seasonNumber") or 0
+                number = ep.get("episodeNumber") or 0
+                grouped.setdefault(show, {}).setdefault(season, []).append(
+                    (number, f"E{number:02d}{self._instance_tag(ep)}")
+                )
 
-                result += f"\n**Overview**: {overview[:300]}..."
-                return result
+            result = f"Missing episodes ({len(episodes)} across {len(grouped)} shows, most recently aired first):\n\n"
+            for show, seasons in grouped.items():
+                count = sum(len(eps) for eps in seasons.values())
+                result += f"• **{show}** — {count} missing\n"
+                for season in sorted(seasons):
+                    result += f"  Season {season}: {', '.join(label for _, label in sorted(seasons[season]))}\n"
+            if truncated:
+                result += f"\n... stopped at {limit} episodes; more are missing."
 
-        return f"TV show '{title}' not found in library."
+            await emit_status(__event_emitter__, f"Found {len(episodes)} missing episode(s)", done=True)
+            return self._with_partial(result, errors)
 
-    async def get_upcoming_episodes(self, __event_emitter__=None) -> str:
+        except Exception as e:
+            return f"Error fetching missing episodes: {str(e)}"
+
+    async def get_storage_breakdown(self, group_by: str = "genre", top: int = 10, __event_emitter__=None) -> str:
         """
-        Get episodes that are airing soon.
-        Use this when users ask what's coming up or new episodes.
+        Show what is using disk space in the TV library.
+        Use this when users ask how much space TV shows take, what's eating the disk,
+        or which shows are the largest.
 
-        :return: List of upcoming episodes
+        :param group_by: How to group disk usage - "genre", "decade", or "quality" (quality profile)
+        :param top: How many groups and largest shows to list (default 10, 1-50)
+        :return: Disk usage per group plus the largest shows on disk
+        """
+        await emit_status(__event_emitter__, f"Computing Sonarr storage by {group_by}…")
+        group_by = group_by.lower().strip()
+        if group_by not in ("genre", "decade", "quality"):
+            return f"Unsupported grouping '{group_by}'. Use 'genre', 'decade', or 'quality'."
+        top = max(1, min(top, 50))
+
+        try:
+            table, errors = await self._get_storage_table()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Sonarr unreachable", done=True)
+            return f"Sonarr error: {e}"
+
+        sizes = table["sizes"]
+        on_disk = sizes > 0
+        if not on_disk.any():
+            return self._with_partial("No shows with files on disk in Sonarr.", errors)
+
+        gb = 1024 ** 3
+        if group_by == "genre":
+            rows = table["genre_rows"]
+            codes = table["genre_codes"]
+            keep = on_disk[rows]
+            n_groups = len(table["genre_names"])
+            totals = np.bincount(codes[keep], weights=sizes[rows][keep], minlength=n_groups)
+            counts = np.bincount(codes[keep], minlength=n_groups)
+            labels = table["genre_names"]
+        elif group_by == "decade":
+            decades = (table["years"] // 10) * 10
+            labels_arr, codes = np.unique(decades[on_disk], return_inverse=True)
+            totals = np.bincount(codes, weights=sizes[on_disk])
+            counts = np.bincount(codes)
+            labels = [f"{d}s" if d else "Unknown year" for d in labels_arr]
+        else:
+            codes = table["profile_codes"][on_disk]
+            n_groups = len(table["profile_names"])
+            totals = np.bincount(codes, weights=sizes[on_disk], minlength=n_groups)
+            counts = np.bincount(codes, minlength=n_groups)
+            labels = table["profile_names"]
+
+        order = np.argsort(totals)[::-1][:top]
+
+        k = min(top, int(on_disk.sum()))
+        largest = np.argpartition(sizes, -k)[-k:]
+        largest = largest[np.argsort(sizes[largest])[::-1]]
+
+        total_gb = sizes.sum() / gb
+        result = f"Sonarr storage: {total_gb:,.1f} GB across {int(on_disk.sum())} shows on disk\n\n"
+        result += f"**By {group_by}:**\n"
+        for i in order:
+            if counts[i] == 0:
+                continue
+            result += f"  • {labels[i]} — {totals[i] / gb:,.1f} GB ({counts[i]} shows)\n"
+        if group_by == "genre":
+            result += "  *(shows with several genres count toward each of them)*\n"
+
+        result += "\n**Largest shows:**\n"
+        for rank, i in enumerate(largest, 1):
+            title, year, tag = table["titles"][i]
+            result += f"  {rank}. {title} ({year}){tag} — {sizes[i] / gb:.1f} GB\n"
+
+        await emit_status(__event_emitter__, "Done", done=True)
+        return self._with_partial(result, errors)
+
+    async def get_episode_file_stats(
+        self, group_by: str = "resolution", max_resolution: int = 0, top: int = 10, __event_emitter__=None
+    ) -> str:
+        """
+        Analyze downloaded episode files by resolution, codec, network, or show.
+        Use this when users ask which shows are still in 720p, how much is HEVC,
+        or the average size per episode by network.
+
+        :param group_by: How to group files - "resolution", "codec", "network", or "show"
+        :param max_resolution: Only count files at or below this resolution, e.g. 720 for "still in 720p" (default 0 = all files)
+        :param top: How many groups to list (default 10, 1-50)
+        :return: File count, total GB, and average GB per episode for each group
+        """
+        await emit_status(__event_emitter__, f"Analyzing Sonarr episode files by {group_by}…")
+        group_by = group_by.lower().strip()
+        if group_by not in ("resolution", "codec", "network", "show"):
+            return f"Unsupported grouping '{group_by}'. Use 'resolution', 'codec', 'network', or 'show'."
+        top = max(1, min(top, 50))
+
+        try:
+            table, errors = await self._get_file_table()
+        except Exception as e:
+            await emit_status(__event_emitter__, "Sonarr unreachable", done=True)
+            return f"Sonarr error: {e}"
+        if table is None:
+            await emit_status(__event_emitter__, "Episode-file table still building", done=True)
+            return ("Sonarr episode-file table is still being built (one request per show) — "
+                    f"ask again in a minute.\n\n{'; '.join(errors)}")
+
+        resolutions = table["resolutions"]
+        sizes = table["sizes"]
+        shows = table["shows"]
+        keep = np.ones(len(sizes), dtype=bool)
+        if max_resolution:
+            keep = (resolutions > 0) & (resolutions <= max_resolution)
+        if not keep.any():
+            scope = f" at {max_resolution}p or below" if max_resolution else ""
+            return self._with_partial(f"No episode files{scope} in Sonarr.", errors)
+
+        if group_by == "resolution":
+            labels_arr, codes = np.unique(resolutions[keep], return_inverse=True)
+            labels = [f"{r}p" if r else "Unknown" for r in labels_arr]
+        elif group_by == "codec":
+            codes = table["codec_codes"][keep]
+            labels = table["codec_names"]
+        elif group_by == "network":
+            codes = table["show_networks"][shows[keep]]
+            labels = table["network_names"]
+        else:
+            codes = shows[keep]
+            labels = table["show_names"]
+        n_groups = len(labels)
+        totals = np.bincount(codes, weights=sizes[keep], minlength=n_groups)
+        counts = np.bincount(codes, minlength=n_groups)
+        order = np.argsort(totals)[::-1][:top]
+
+        gb = 1024 ** 3
+        scope = f" at {max_resolution}p or below" if max_resolution else ""
+        result = f"Sonarr episode files{scope}: {int(keep.sum()):,} files, {sizes[keep].sum() / gb:,.1f} GB\n\n"
+        result += f"**By {group_by}:**\n"
+        all_counts = np.bincount(shows, minlength=len(table["show_names"])) if group_by == "show" else None
+        for i in order:
+            if counts[i] == 0:
+                continue
+            line = f"  • {labels[i]} — {counts[i]:,} files, {totals[i] / gb:,.1f} GB, {totals[i] / counts[i] / gb:.2f} GB/episode"
+            if all_counts is not None and max_resolution:
+                line += f" ({counts[i]} of {all_counts[i]} episodes)"
+            result += line + "\n"
+        if table["failed"]:
+            result += f"\n*({table['failed']} show(s) could not be read from Sonarr; their files are not counted)*"
+
+        await emit_status(__event_emitter__, "Done", done=True)
+        return self._with_partial(result, errors)
+
+    async def get_upcoming_episodes(self, days: int = 14, start: str = "", __event_emitter__=None) -> str:
+        """
+        Get episodes airing in a date window (default: the next 14 days).
+        Use this when users ask what's coming up, what airs this weekend, or next month.
+
+        :param days: Length of the window in days (default 14)
+        :param start: First day of the window as YYYY-MM-DD (default today). E.g. for "this weekend" pass Saturday's date with days=2.
+        :return: List of episodes airing in the window
         """
         await emit_status(__event_emitter__, "Fetching Sonarr upcoming-episodes calendar…")
         try:
-            from datetime import datetime, timedelta
-            
-            start = datetime.now().strftime("%Y-%m-%d")
-            end = (datetime.now() + timedelta(days=14)).strftime("%Y-%m-%d")
-            
-            episodes = await http_get_json(
-                f"{self.valves.SONARR_URL}/api/v3/calendar",
-                headers=self._get_headers(),
-                params={"start": start, "end": end, "includeSeries": "true"},
+            from datetime import date, datetime, timedelta
+
+            try:
+                window_start = date.fromisoformat(start) if start else date.today()
+            except ValueError:
+                return f"Invalid start date '{start}'. Use YYYY-MM-DD."
+            window_end = window_start + timedelta(days=max(1, days))
+
+            libraries, errors = await self._get_libraries()
+            shows_by_id = {label: {show.get("id"): show for show in series} for label, _, series in libraries}
+            instances = [inst for inst in self._instances() if inst[0] in shows_by_id]
+            responses = await asyncio.gather(
+                *[self._calendar_window(url, key, window_start, window_end) for _, url, key in instances],
+                return_exceptions=True,
+            )
+
+            bodies = []
+            for (label, url, key), resp in zip(instances, responses):
+                if isinstance(resp, Exception):
+                    errors.append(f"{label} ({url}): {resp}")
+                    continue
+                records = []
+                for series_id, season, episode, title, air in resp:
+                    show = shows_by_id[label].get(series_id)
+                    if show is None:
+                        # Series added since the library snapshot — refresh it for next time
+                        self._snapshot(self._libraries, self._fetch_library, url, key).invalidate()
+                        show = {"title": "Unknown series"}
+                    records.append({
+                        "series": show, "seasonNumber": season, "episodeNumber": episode,
+                        "title": title, "airDateUtc": air,
+                    })
+                bodies.append((label, url, key, records))
+            if not bodies:
+                return f"Error fetching upcoming episodes: {'; '.join(errors)}"
+
+            episodes = self._merge_episodes(
+                bodies,
+                records_of=lambda records: records,
+                episode_of=lambda record: record,
+                sort_key=lambda ep: ep["airDateUtc"],
             )
 
+            if start:
+                span = f"{window_start.isoformat()} to {(window_end - timedelta(days=1)).isoformat()}"
+                empty = f"No episodes airing {span}."
+            else:
+                span = f"next {days} days"
+                empty = f"No upcoming episodes in the {span}."
             if not episodes:
-                return "No upcoming episodes in the next 14 days."
+                return self._with_partial(empty, errors)
 
-            result = "Upcoming episodes (next 14 days):\n\n"
+            result = f"Upcoming episodes ({span}):\n\n"
             for ep in episodes[:15]:
-                series_title = ep.get("series", {}).get("title", "Unknown")
-                season = ep.get("seasonNumber", 0)
-                episode = ep.get("episodeNumber", 0)
-                title = ep.get("title", "TBA")
-                air_date = ep.get("airDateUtc", "")[:10]
-                
-                result += f"• **{series_title}** S{season:02d}E{episode:02d} - {title}\n"
-                result += f"  Airs: {air_date}\n"
+                series_title = ep["series"].get("title", "Unknown")
+                season = ep["seasonNumber"]
+                episode = ep["episodeNumber"]
+                air_date = datetime.fromisoformat(ep["airDateUtc"].replace("Z", "+00:00")).astimezone()
 
-            return result
+                result += f"• **{series_title}** S{season:02d}E{episode:02d} - {ep['title']}{self._instance_tag(ep)}\n"
+                result += f"  Airs: {air_date.strftime('%Y-%m-%d')}\n"
+            if len(episodes) > 15:
+                result += f"\n... and {len(episodes) - 15} more."
+
+            return self._with_partial(result, errors)
 
         except Exception as e:
             return f"Error fetching upcoming episodes: {str(e)}"
@@ -292,47 +1240,49 @@ class Tools:
         """
         await emit_status(__event_emitter__, f"Scanning Sonarr history for last {days} days…")
         try:
-            body = await http_get_json(
-                f"{self.valves.SONARR_URL}/api/v3/history",
-                headers=self._get_headers(),
-                params={"pageSize": 30, "eventType": 3},  # eventType 3 = downloaded
+            from datetime import datetime, timedelta, timezone
+
+            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+            limit = 15
+            instances = self._instances()
+            responses = await asyncio.gather(
+                *[self._collect_recent_downloads(url, key, cutoff, limit) for _, url, key in instances],
+                return_exceptions=True,
+            )
+            bodies = []
+            errors = []
+            for (label, url, key), resp in zip(instances, responses):
+                if isinstance(resp, Exception):
+                    errors.append(f"{label} ({url}): {resp}")
+                else:
+                    bodies.append((label, url, key, resp))
+            if not bodies:
+                return f"Error fetching recent episodes: {'; '.join(errors)}"
+
+            history = self._merge_episodes(
+                bodies,
+                records_of=lambda records: records,
+                episode_of=lambda record: record.get("episode", {}),
+                sort_key=lambda record: record.get("date", ""),
+                reverse=True,
             )
-            history = body.get("records", [])
 
             if not history:
-                return "No episodes downloaded recently."
+                return self._with_partial(f"No episodes downloaded in the last {days} days.", errors)
 
-            from datetime import datetime, timedelta
-            cutoff = datetime.now() - timedelta(days=days)
-            
             result = f"Episodes downloaded in the last {days} days:\n\n"
-            count = 0
-            
-            for record in history:
-                date_str = record.get("date", "")
-                try:
-                    date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    if date.replace(tzinfo=None) < cutoff:
-                        continue
-                except:
-                    continue
-                    
+            for record in history[:limit]:
                 series = record.get("series", {}).get("title", "Unknown")
                 episode = record.get("episode", {})
                 season = episode.get("seasonNumber", 0)
                 ep_num = episode.get("episodeNumber", 0)
                 title = episode.get("title", "Unknown")
-                
-                result += f"• **{series}** S{season:02d}E{ep_num:02d} - {title}\n"
-                count += 1
-                
-                if count >= 15:
-                    break
+                date = datetime.fromisoformat(record["date"].replace("Z", "+00:00")).astimezone()
+
+                result += f"• **{series}** S{season:02d}E{ep_num:02d} - {title}{self._instance_tag(record)}\n"
+                result += f"  Downloaded: {date.strftime('%b %d, %Y')}\n"
 
-            if count == 0:
-                return f"No episodes downloaded in the last {days} days."
-                
-            return result
+            return self._with_partial(result, errors)
 
         except Exception as e:
             return f"Error fetching recent episodes: {str(e)}"